@@ -199,8 +199,51 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True") == "True"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+# Cách gửi email của drain_outbox và send_monthly_bills.
+# Số email gửi qua một kết nối SMTP trong mỗi lượt send_messages()
+BILL_EMAIL_BATCH_SIZE = int(os.getenv("BILL_EMAIL_BATCH_SIZE", 50))
+# Gửi song song: số thread (mỗi thread một kết nối SMTP), giới hạn email/giây
+# (0 = không giới hạn) và số lần gửi lại khi gặp lỗi tạm thời
+BILL_EMAIL_WORKERS = int(os.getenv("BILL_EMAIL_WORKERS", 1))
+BILL_EMAIL_RATE_LIMIT = float(os.getenv("BILL_EMAIL_RATE_LIMIT", 0))
+BILL_EMAIL_MAX_RETRIES = int(os.getenv("BILL_EMAIL_MAX_RETRIES", 3))
+
+# Cache: mặc định bộ nhớ cục bộ của tiến trình. Đổi backend qua biến môi trường,
+# vd. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache với
+# CACHE_LOCATION=/var/tmp/apartmentmanager_cache, hoặc
+# django.core.cache.backends.db.DatabaseCache với CACHE_LOCATION là tên bảng
+# (tạo bằng python manage.py createcachetable)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "apartmentmanager"),
+    }
+}
+# Số giây mỗi tiến trình dùng danh mục dịch vụ trong bộ nhớ trước khi kiểm tra
+# lại phiên bản trong bảng system_settings
+SERVICE_CATALOG_TTL = int(os.getenv("SERVICE_CATALOG_TTL", 60))
+# Số giây giữ số liệu dashboard quản lý khi không có thay đổi nào
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", 300))
+# Số giây giữ danh sách thành viên của mỗi role; giới hạn thời gian các tiến
+# trình khác dùng danh sách cũ khi cache là bộ nhớ cục bộ
+ROLE_MEMBERS_CACHE_TIMEOUT = int(os.getenv("ROLE_MEMBERS_CACHE_TIMEOUT", 60))
 
 # setup cron
 CRONJOBS = [
-    ("25 15 * * *", "appartment.tasks.send_bills.send_monthly_bills"),
+    # Email hóa đơn được xếp hàng trong outbox khi tạo hóa đơn cuối cùng và gửi
+    # bởi drain_outbox; send_monthly_bills (gửi SMTP trực tiếp) không còn chạy
+    # theo lịch để cư dân không nhận hai bản của cùng một hóa đơn
+    ("*/5 * * * *", "django.core.management.call_command", ["drain_outbox"]),
+    (
+        "30 3 * * *",
+        "django.core.management.call_command",
+        ["reconcile_unread_counters"],
+    ),
+    ("0 9 * * *", "django.core.management.call_command", ["send_payment_reminders"]),
+    ("45 3 * * *", "django.core.management.call_command", ["rebuild_rollups"]),
+    # Dựng lại toàn bộ số cư dân theo tháng: thêm dòng cho tháng vừa bắt đầu
+    # và sửa sai lệch do các thao tác hàng loạt bỏ qua signal của RoomResident
+    ("5 0 * * *", "django.core.management.call_command", ["rebuild_room_occupancy"]),
 ]
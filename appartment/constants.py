@@ -45,6 +45,18 @@ class PaymentStatus(Enum):
         return [(key.value, key.name.replace("_", " ").title()) for key in cls]
 
 
+class BillingStatus(Enum):
+    NOT_STARTED = "NOT_STARTED"
+    IN_PROGRESS = "IN_PROGRESS"
+    PENDING_CONFIRMATION = "PENDING_CONFIRMATION"
+    READY_TO_FINALIZE = "READY_TO_FINALIZE"
+    FINALIZED = "FINALIZED"
+
+    @classmethod
+    def choices(cls):
+        return [(key.value, key.name.replace("_", " ").title()) for key in cls]
+
+
 class PaymentTransactionStatus(Enum):
     PENDING = "PENDING"
     SUCCESS = "SUCCESS"
@@ -146,3 +158,18 @@ DEFAULT_PAGE_SIZE = 10
 MIN_RENTAL_PRICE = 0
 
 BILL_SEND_DAYS = [25, 26, 27, 28, 29, 30, 31]
+
+FINAL_BILL_CHUNK_SIZE = 500
+FINAL_BILL_CHUNK_RETRIES = 1
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+# Dòng SENDING quá thời gian này (tiến trình drain bị dừng) được nhận lại
+OUTBOX_CLAIM_TIMEOUT_MINUTES = 15
+
+NOTIFICATION_FANOUT_BATCH_SIZE = 1000
+# merge_broadcast_notifications: khoảng thời gian mặc định (giây) để coi các
+# thông báo giống nhau là một lần gửi hàng loạt
+BROADCAST_MERGE_WINDOW_SECONDS = 60
+# Tổng số thông báo chỉ đếm tới ngưỡng này khi phân trang theo con trỏ
+NOTIFICATION_COUNT_CAP = 1000
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from appartment.constants import DEFAULT_PAGE_SIZE
+from appartment.models import Notification, User
+from appartment.utils.cursor_utils import paginate_by_cursor
+from appartment.utils.mailbox_utils import resident_requests, staff_mailbox
+from appartment.utils.notification_utils import addressed_to
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the single OR query with the per-branch mailbox plan for a "
+        "manager/admin notification history: prints EXPLAIN output and timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", help="Manager or admin user_id.")
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=5,
+            help="Number of consecutive pages to walk for the timing.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options["user_id"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user_id']} does not exist.")
+
+        legacy = Notification.objects.filter(
+            resident_requests() | addressed_to(user) | Q(sender=user)
+        )
+        mailbox = staff_mailbox(user)
+
+        self.stdout.write("== OR query plan")
+        self.stdout.write(
+            legacy.order_by("-created_at", "-pk")[:DEFAULT_PAGE_SIZE].explain()
+        )
+        self.stdout.write("== Mailbox branch plans")
+        for branch in mailbox.branches:
+            self.stdout.write(
+                branch.order_by("-created_at", "-pk")
+                .values_list("pk", "created_at")[: DEFAULT_PAGE_SIZE + 1]
+                .explain()
+            )
+
+        legacy_time = self._walk(
+            lambda cursor: paginate_by_cursor(legacy, cursor, DEFAULT_PAGE_SIZE),
+            options["pages"],
+        )
+        mailbox_time = self._walk(
+            lambda cursor: mailbox.page(cursor, DEFAULT_PAGE_SIZE), options["pages"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['pages']} page(s): OR query {legacy_time * 1000:.1f} ms, "
+                f"mailbox {mailbox_time * 1000:.1f} ms."
+            )
+        )
+
+    def _walk(self, get_page, pages):
+        started = time.perf_counter()
+        cursor = None
+        for _ in range(pages):
+            page = get_page(cursor)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        return time.perf_counter() - started
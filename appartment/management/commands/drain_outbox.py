@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from appartment.constants import OUTBOX_BATCH_SIZE
+from appartment.utils.outbox_utils import drain_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends pending outbox emails in batches. Several drainers can run at the "
+        "same time: rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help="Number of outbox rows claimed per transaction.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches (default: until the outbox is empty).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        totals = drain_outbox(options["batch_size"], options["max_batches"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox drained: {totals['sent']} sent, {totals['failed']} failed "
+                f"in {totals['batches']} batch(es)."
+            )
+        )
@@ -1,17 +1,20 @@
-import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Count, Q
+from django.db import DatabaseError, connections
 from django.utils import timezone
-from dateutil.relativedelta import relativedelta
-
-from appartment.models import (
-    Room,
-    DraftBill,
-    Bill,
-    RentalPrice,
-    SystemSettings,
-    BillAdditionalService,
-    AdditionalService,
+
+from appartment.constants import FINAL_BILL_CHUNK_RETRIES, FINAL_BILL_CHUNK_SIZE
+from appartment.models import BillingRun, SystemSettings
+from appartment.utils.billing_utils import (
+    MonthBillingSnapshot,
+    generate_final_bills,
+    generate_final_bills_chunk,
+    get_successful_checksums,
+    init_generation_worker,
+    merge_generation_results,
+    record_failed_rooms,
 )
 
 
@@ -22,6 +25,33 @@ class Command(BaseCommand):
         parser.add_argument(
             "bill_month", type=str, help="The billing month in YYYY-MM format."
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each with its own DB connection.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=FINAL_BILL_CHUNK_SIZE,
+            help="Number of rooms processed per transaction.",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=FINAL_BILL_CHUNK_RETRIES,
+            help="How many times a failed chunk is retried on its own.",
+        )
+        parser.add_argument(
+            "--resume",
+            type=int,
+            metavar="RUN_ID",
+            help=(
+                "Resume an earlier billing run: rooms already billed successfully "
+                "whose inputs have not changed are skipped."
+            ),
+        )
 
     def handle(self, *args, **options):
         month_str = options["bill_month"]
@@ -31,20 +61,35 @@ class Command(BaseCommand):
             )
         except ValueError:
             raise CommandError("Invalid date format. Please use YYYY-MM.")
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be positive.")
 
         self.stdout.write(f"--- Starting final bill generation for {month_str} ---")
 
-        # 1. Tìm tất cả các phòng có đủ 2 HĐ nháp (Điện/Nước và Dịch vụ) đã được 'CONFIRMED'
-        confirmed_rooms_qs = (
-            DraftBill.objects.filter(
-                bill_month=bill_month_date, status=DraftBill.DraftStatus.CONFIRMED
-            )
-            .values("room")
-            .annotate(c=Count("room"))
-            .filter(c=2)
-        )  # Lọc ra những phòng có đúng 2 HĐ nháp đã confirm
+        # Sổ ghi của lần chạy: tạo mới hoặc tiếp tục lần chạy trước đó
+        if options["resume"] is not None:
+            try:
+                run = BillingRun.objects.get(pk=options["resume"])
+            except BillingRun.DoesNotExist:
+                raise CommandError(f"Billing run #{options['resume']} does not exist.")
+            if run.bill_month != bill_month_date:
+                raise CommandError(
+                    f"Billing run #{run.pk} is for {run.bill_month:%Y-%m}, not {month_str}."
+                )
+            run.status = BillingRun.RunStatus.RUNNING
+            run.finished_at = None
+            run.save(update_fields=["status", "finished_at"])
+            self.stdout.write(f"Resuming billing run #{run.pk}.")
+        else:
+            run = BillingRun.objects.create(bill_month=bill_month_date)
+            self.stdout.write(f"Started billing run #{run.pk}.")
+        self.run = run
+        self.previous_checksums = get_successful_checksums(run)
 
-        room_ids_to_process = [item["room"] for item in confirmed_rooms_qs]
+        # 1. Tìm tất cả các phòng có đủ 2 HĐ nháp (Điện/Nước và Dịch vụ) đã được 'CONFIRMED'
+        # Snapshot tải HĐ nháp của cả tháng một lần và đánh chỉ mục theo phòng
+        snapshot = MonthBillingSnapshot(bill_month_date)
+        room_ids_to_process = snapshot.confirmed_room_ids()
 
         if not room_ids_to_process:
             self.stdout.write(
@@ -52,6 +97,7 @@ class Command(BaseCommand):
                     "No rooms found with 2 confirmed draft bills for this month."
                 )
             )
+            self._finish_run(failed=False)
             return
 
         self.stdout.write(
@@ -61,119 +107,153 @@ class Command(BaseCommand):
         # 2. Xử lý logic chia đều chi phí chung
         # Lấy tổng chi phí chung từ settings
         try:
-            common_fee = float(
+            common_fee = Decimal(
                 SystemSettings.objects.get(
                     setting_key="COMMON_AREA_UTILITY_FEE"
                 ).setting_value
             )
             # Giả sử chi phí này được chia đều cho các phòng đã được tạo hóa đơn
-            shared_cost_per_room = (
-                common_fee / len(room_ids_to_process) if room_ids_to_process else 0
-            )
+            shared_cost_per_room = common_fee / len(room_ids_to_process)
         except SystemSettings.DoesNotExist:
             self.stdout.write(
                 self.style.WARNING(
                     "COMMON_AREA_UTILITY_FEE setting not found. Shared costs will be 0."
                 )
             )
-            shared_cost_per_room = 0
-
-        final_bill_count = 0
-        for room_id in room_ids_to_process:
-            room = Room.objects.get(pk=room_id)
-            self.stdout.write(f"Processing room: {room.description}...")
-
-            # 3. Lấy 2 hóa đơn nháp đã được xác nhận
-            ew_draft = DraftBill.objects.get(
-                room=room,
-                bill_month=bill_month_date,
-                draft_type=DraftBill.DraftType.ELECTRIC_WATER,
-            )
-            services_draft = DraftBill.objects.get(
-                room=room,
-                bill_month=bill_month_date,
-                draft_type=DraftBill.DraftType.SERVICES,
-            )
+            shared_cost_per_room = Decimal(0)
 
-            # 4. Lấy giá thuê phòng áp dụng tại thời điểm đó
-            rental_price_obj = (
-                RentalPrice.objects.filter(
-                    room=room, effective_date__lte=bill_month_date
+        # 3. Chia các phòng thành từng nhóm, mỗi nhóm xử lý trong transaction riêng
+        chunk_size = options["chunk_size"]
+        chunks = [
+            room_ids_to_process[i : i + chunk_size]
+            for i in range(0, len(room_ids_to_process), chunk_size)
+        ]
+        results, failed_chunks = self._run_chunks(
+            bill_month_date, chunks, shared_cost_per_room, options["workers"], snapshot
+        )
+
+        # 4. Chạy lại riêng từng nhóm bị lỗi, không làm lại cả tháng
+        for attempt in range(1, options["retries"] + 1):
+            if not failed_chunks:
+                break
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Retrying {len(failed_chunks)} failed chunk(s), attempt {attempt}..."
                 )
-                .order_by("-effective_date")
-                .first()
             )
+            # Chạy lại theo cùng cách với lần đầu (process pool nếu --workers > 1)
+            retry_results, failed_chunks = self._run_chunks(
+                bill_month_date, failed_chunks, shared_cost_per_room, options["workers"]
+            )
+            results.extend(retry_results)
 
-            if not rental_price_obj:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"  - SKIPPING: No rental price found for room {room.description}."
-                    )
-                )
-                continue
+        result = merge_generation_results(results)
 
-            # 5. Lấy chi tiết từ các hóa đơn nháp
-            ew_details = (
-                json.loads(ew_draft.details)
-                if isinstance(ew_draft.details, str)
-                else ew_draft.details
+        for room_id in result["skipped"]:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"  - SKIPPING: No rental price found for room {room_id}."
+                )
             )
-            services_details = (
-                json.loads(services_draft.details)
-                if isinstance(services_draft.details, str)
-                else services_draft.details
+
+        final_bill_count = len(result["created"]) + len(result["updated"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  - Created {len(result['created'])}, "
+                f"updated {len(result['updated'])} final bills, "
+                f"{len(result['unchanged'])} unchanged since the last successful run."
             )
+        )
+        self.stdout.write(
+            f"--- Finished. Total final bills created/updated: {final_bill_count} ---"
+        )
 
-            # 6. Tính toán tổng hóa đơn cuối cùng
-            # Tổng tiền = Tiền phòng + Tiền điện nước + Tiền dịch vụ + Tiền chi phí chung đã chia sẻ
-            total_amount = (
-                rental_price_obj.price
-                + ew_draft.total_amount
-                + services_draft.total_amount
-                + shared_cost_per_room
+        self._finish_run(failed=bool(failed_chunks))
+        if failed_chunks:
+            failed_room_ids = [room_id for chunk in failed_chunks for room_id in chunk]
+            raise CommandError(
+                f"{len(failed_chunks)} chunk(s) failed after retries: {failed_room_ids}. "
+                f"Rerun with --resume {self.run.pk} to process only the remaining rooms."
             )
 
-            # 7. Tạo hoặc cập nhật hóa đơn cuối cùng trong bảng `bills`
-            final_bill, created = Bill.objects.update_or_create(
-                room=room,
-                bill_month=bill_month_date.replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                ),
-                defaults={
-                    "electricity_amount": ew_details.get("electric_cost", 0),
-                    "water_amount": ew_details.get("water_cost", 0),
-                    "additional_service_amount": services_draft.total_amount,
-                    "total_amount": total_amount,
-                    "status": "unpaid",  # Hóa đơn cuối cùng luôn bắt đầu là 'unpaid'
-                    "due_date": (
-                        bill_month_date + relativedelta(months=1, days=14)
-                    ),  # Hạn trả là ngày 15 của tháng sau
-                },
+    def _finish_run(self, failed):
+        self.run.status = (
+            BillingRun.RunStatus.FAILED if failed else BillingRun.RunStatus.COMPLETED
+        )
+        self.run.finished_at = timezone.now()
+        self.run.save(update_fields=["status", "finished_at"])
+
+    def _checksums_for(self, chunk):
+        return {
+            room_id: self.previous_checksums[room_id]
+            for room_id in chunk
+            if room_id in self.previous_checksums
+        }
+
+    def _run_chunks(
+        self, bill_month_date, chunks, shared_cost_per_room, workers, snapshot=None
+    ):
+        if workers > 1 and len(chunks) > 1:
+            return self._run_in_pool(
+                bill_month_date, chunks, shared_cost_per_room, workers
             )
+        return self._run_inline(bill_month_date, chunks, shared_cost_per_room, snapshot)
 
-            # 8. Tạo các bản ghi chi tiết dịch vụ trong `bill_additional_services`
-            # Xóa các dịch vụ cũ của hóa đơn này để tránh trùng lặp
-            BillAdditionalService.objects.filter(bill=final_bill).delete()
-            service_records_to_create = []
-            for service_detail in services_details.get("services", []):
-                service_records_to_create.append(
-                    BillAdditionalService(
-                        bill=final_bill,
-                        additional_service_id=service_detail.get("service_id"),
-                        room=room,
-                        service_month=bill_month_date,
-                        status="active",
+    def _run_inline(self, bill_month_date, chunks, shared_cost_per_room, snapshot=None):
+        results, failed_chunks = [], []
+        for chunk in chunks:
+            try:
+                results.append(
+                    generate_final_bills(
+                        bill_month_date,
+                        chunk,
+                        shared_cost_per_room=shared_cost_per_room,
+                        snapshot=snapshot,
+                        run=self.run,
+                        previous_checksums=self._checksums_for(chunk),
                     )
                 )
-            BillAdditionalService.objects.bulk_create(service_records_to_create)
+            except Exception as exc:
+                self._report_failed_chunk(chunk, exc)
+                failed_chunks.append(chunk)
+        return results, failed_chunks
 
-            final_bill_count += 1
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"  - Successfully generated final bill #{final_bill.bill_id}."
-                )
-            )
+    def _run_in_pool(self, bill_month_date, chunks, shared_cost_per_room, workers):
+        results, failed_chunks = [], []
+        # Đóng kết nối của tiến trình cha để các tiến trình con không dùng chung
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_generation_worker
+        ) as pool:
+            futures = {
+                pool.submit(
+                    generate_final_bills_chunk,
+                    bill_month_date,
+                    chunk,
+                    shared_cost_per_room,
+                    self.run.pk,
+                    self._checksums_for(chunk),
+                ): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as exc:
+                    self._report_failed_chunk(chunk, exc)
+                    failed_chunks.append(chunk)
+        return results, failed_chunks
 
+    def _report_failed_chunk(self, chunk, exc):
         self.stdout.write(
-            f"--- Finished. Total final bills created/updated: {final_bill_count} ---"
+            self.style.ERROR(
+                f"  - Chunk {chunk[0]}..{chunk[-1]} ({len(chunk)} rooms) failed: {exc}"
+            )
         )
+        try:
+            record_failed_rooms(self.run, chunk, exc)
+        except DatabaseError as db_exc:
+            self.stdout.write(
+                self.style.WARNING(f"  - Could not record failed rooms: {db_exc}")
+            )
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from appartment.constants import BROADCAST_MERGE_WINDOW_SECONDS
+from appartment.utils.notification_utils import (
+    find_broadcast_groups,
+    merge_broadcast_groups,
+)
+from appartment.utils.unread_counter_utils import reconcile_unread_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Merges legacy per-recipient notifications that share a sender, title "
+        "and message within a time window into broadcast notifications. "
+        "Identical individual sends inside the window are merged too, so review "
+        "the --dry-run output before running it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=BROADCAST_MERGE_WINDOW_SECONDS,
+            help="Maximum gap in seconds between notifications of one broadcast.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the groups that would be merged.",
+        )
+
+    def handle(self, *args, **options):
+        groups = find_broadcast_groups(timedelta(seconds=options["window"]))
+        for group in groups:
+            self.stdout.write(
+                f"Notification {group[0][0]}: {len(group)} rows, "
+                f"{len({receiver_id for _, receiver_id, _ in group})} recipients"
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"Broadcast groups found: {len(groups)}.")
+            )
+            return
+
+        removed = merge_broadcast_groups(groups)
+        # Người nhận có nhiều dòng trong một nhóm chỉ còn một trạng thái đọc
+        reconcile_unread_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Broadcast groups merged: {len(groups)}, "
+                f"notifications removed: {removed}."
+            )
+        )
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from appartment.utils.rollup_utils import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the monthly billing rollup table from the bills table and "
+        "refreshes overdue counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only rebuild months from this one on, in YYYY-MM format "
+            "(default: every month).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--since must be in YYYY-MM format.")
+
+        rollups = rebuild_rollups(since=since)
+        for rollup in rollups:
+            self.stdout.write(
+                f"{rollup.month:%Y-%m}: {rollup.bill_count} bill(s), "
+                f"{rollup.overdue_count} overdue"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(rollups)} monthly rollup(s).")
+        )
@@ -0,0 +1,42 @@
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from appartment.utils.occupancy_utils import refresh_room_occupancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the per-room monthly occupancy table from room residents, "
+        "up to the current month."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rooms",
+            nargs="+",
+            help="Only rebuild these room_ids (default: every room).",
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            help="Only rebuild the last N months, including the current one "
+            "(default: every month since the first move-in).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["months"] is not None:
+            if options["months"] < 1:
+                raise CommandError("--months must be at least 1.")
+            since = timezone.localdate().replace(day=1) - relativedelta(
+                months=options["months"] - 1
+            )
+
+        rows = refresh_room_occupancy(options["rooms"], since=since)
+        rooms = len({row.room_id for row in rows})
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(rows)} occupancy row(s) for {rooms} room(s)."
+            )
+        )
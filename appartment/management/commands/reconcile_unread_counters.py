@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from appartment.utils.unread_counter_utils import reconcile_unread_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts unread notifications for every user and repairs counters "
+        "that drifted from the notification tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted counters, do not repair them.",
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_unread_counters(dry_run=options["dry_run"])
+        for user_id, current, expected in drift:
+            self.stdout.write(f"{user_id}: {current} -> {expected}")
+
+        action = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"Unread counters {action}: {len(drift)}.")
+        )
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from appartment.constants import UserRole, YEAR_MONTH_DAY_FORMAT
+from appartment.models import User
+from appartment.utils.reminder_utils import send_payment_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends payment reminder notifications to current residents of unpaid "
+        "bills that are past their due date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sender",
+            help="user_id of the manager sending the reminders "
+            "(default: the first active apartment manager).",
+        )
+        parser.add_argument(
+            "--bill-ids",
+            nargs="+",
+            type=int,
+            help="Only remind these bills (default: every overdue bill).",
+        )
+        parser.add_argument(
+            "--date",
+            help="Reference date in YYYY-MM-DD; bills due before it are overdue.",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            try:
+                today = datetime.strptime(
+                    options["date"], YEAR_MONTH_DAY_FORMAT
+                ).date()
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        managers = User.objects.filter(
+            role__role_name=UserRole.APARTMENT_MANAGER.value, is_active=True
+        )
+        if options["sender"]:
+            managers = managers.filter(pk=options["sender"])
+        sender = managers.order_by("user_id").first()
+        if sender is None:
+            raise CommandError("No active apartment manager to send reminders.")
+
+        bill_count, notification_count = send_payment_reminders(
+            sender, bill_ids=options["bill_ids"], today=today
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reminded {bill_count} overdue bill(s) with "
+                f"{notification_count} notification(s)."
+            )
+        )
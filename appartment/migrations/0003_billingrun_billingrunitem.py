@@ -0,0 +1,89 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0002_alter_notification_receiver_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingRun",
+            fields=[
+                ("run_id", models.AutoField(primary_key=True, serialize=False)),
+                ("bill_month", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Đang chạy"),
+                            ("COMPLETED", "Hoàn tất"),
+                            ("FAILED", "Thất bại"),
+                        ],
+                        default="RUNNING",
+                        max_length=20,
+                    ),
+                ),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "billing_runs",
+            },
+        ),
+        migrations.CreateModel(
+            name="BillingRunItem",
+            fields=[
+                (
+                    "billing_run_item_id",
+                    models.AutoField(primary_key=True, serialize=False),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("SUCCESS", "Thành công"),
+                            ("SKIPPED", "Bỏ qua"),
+                            ("FAILED", "Thất bại"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("input_checksum", models.CharField(blank=True, max_length=64)),
+                ("message", models.CharField(blank=True, max_length=255)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "bill",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="appartment.bill",
+                    ),
+                ),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="appartment.room",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="appartment.billingrun",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "billing_run_items",
+                "unique_together": {("run", "room")},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0003_billingrun_billingrunitem"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillEmailDelivery",
+            fields=[
+                (
+                    "bill_email_delivery_id",
+                    models.AutoField(primary_key=True, serialize=False),
+                ),
+                ("email", models.EmailField(max_length=254)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("SENT", "Đã gửi"), ("FAILED", "Thất bại")],
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error_message", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "bill",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="email_deliveries",
+                        to="appartment.bill",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "bill_email_deliveries",
+                "indexes": [
+                    models.Index(
+                        fields=["bill", "user"], name="bill_email__bill_id_c50eed_idx"
+                    ),
+                    models.Index(
+                        fields=["status"], name="bill_email__status_7fc733_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
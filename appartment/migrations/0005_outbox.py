@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0004_billemaildelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Outbox",
+            fields=[
+                ("outbox_id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("BILL_EMAIL", "Email hóa đơn"),
+                            ("NOTIFICATION_EMAIL", "Email thông báo"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Chờ gửi"),
+                            ("SENT", "Đã gửi"),
+                            ("FAILED", "Thất bại"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "outbox",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="outbox_status_2cd045_idx",
+                    )
+                ],
+            },
+        ),
+    ]
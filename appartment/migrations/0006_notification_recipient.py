@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Thông báo cũ (một dòng cho mỗi người nhận) được giữ nguyên: không thể biết
+# chắc dòng nào thuộc cùng một lần gửi hàng loạt. Chỉ thông báo mới được ghi
+# theo dạng hàng loạt; gộp dữ liệu cũ là bước tùy chọn qua lệnh
+# merge_broadcast_notifications.
+
+
+def split_broadcasts(apps, schema_editor):
+    """
+    Tách mỗi thông báo hàng loạt về lại một dòng Notification cho mỗi người nhận.
+    """
+    Notification = apps.get_model("appartment", "Notification")
+    NotificationRecipient = apps.get_model("appartment", "NotificationRecipient")
+
+    for notification in Notification.objects.filter(is_broadcast=True).iterator():
+        recipients = list(
+            NotificationRecipient.objects.filter(notification=notification).order_by(
+                "notification_recipient_id"
+            )
+        )
+        created_ids = [
+            Notification.objects.create(
+                sender_id=notification.sender_id,
+                receiver_id=recipient.user_id,
+                title=notification.title,
+                message=notification.message,
+                status=recipient.status,
+            ).pk
+            for recipient in recipients
+        ]
+        # created_at là auto_now_add nên phải gán lại sau khi tạo
+        Notification.objects.filter(notification_id__in=created_ids).update(
+            created_at=notification.created_at
+        )
+        notification.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0005_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="is_broadcast",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="NotificationRecipient",
+            fields=[
+                (
+                    "notification_recipient_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("unread", "Unread"), ("read", "Read")],
+                        default="unread",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recipients",
+                        to="appartment.notification",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_receipts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "notification_recipients",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "status"], name="notificatio_user_id_491776_idx"
+                    )
+                ],
+                "unique_together": {("notification", "user")},
+            },
+        ),
+        migrations.RunPython(migrations.RunPython.noop, split_broadcasts),
+    ]
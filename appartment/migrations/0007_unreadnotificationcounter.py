@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Tạo bộ đếm chưa đọc cho mọi user từ dữ liệu thông báo hiện có.
+    """
+    User = apps.get_model("appartment", "User")
+    Notification = apps.get_model("appartment", "Notification")
+    NotificationRecipient = apps.get_model("appartment", "NotificationRecipient")
+    UnreadNotificationCounter = apps.get_model(
+        "appartment", "UnreadNotificationCounter"
+    )
+
+    counts = {}
+    direct = (
+        Notification.objects.filter(receiver__isnull=False, status="unread")
+        .values_list("receiver_id")
+        .annotate(total=Count("pk"))
+    )
+    broadcast = (
+        NotificationRecipient.objects.filter(status="unread")
+        .values_list("user_id")
+        .annotate(total=Count("pk"))
+    )
+    for user_id, total in list(direct) + list(broadcast):
+        counts[user_id] = counts.get(user_id, 0) + total
+
+    UnreadNotificationCounter.objects.bulk_create(
+        [
+            UnreadNotificationCounter(user_id=user_id, unread_count=counts.get(user_id, 0))
+            for user_id in User.objects.values_list("user_id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0006_notification_recipient"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnreadNotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="unread_notification_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "unread_notification_counters",
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
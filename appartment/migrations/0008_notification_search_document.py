@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:52
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+WORD_RE = re.compile(r"\w+")
+
+SQLITE_FTS_SQL = [
+    "CREATE VIRTUAL TABLE notifications_fts USING fts5("
+    "search_document, content='notifications', content_rowid='notification_id')",
+    "CREATE TRIGGER notifications_fts_ai AFTER INSERT ON notifications BEGIN "
+    "INSERT INTO notifications_fts(rowid, search_document) "
+    "VALUES (new.notification_id, new.search_document); END",
+    "CREATE TRIGGER notifications_fts_ad AFTER DELETE ON notifications BEGIN "
+    "INSERT INTO notifications_fts(notifications_fts, rowid, search_document) "
+    "VALUES ('delete', old.notification_id, old.search_document); END",
+    "CREATE TRIGGER notifications_fts_au AFTER UPDATE OF search_document "
+    "ON notifications BEGIN "
+    "INSERT INTO notifications_fts(notifications_fts, rowid, search_document) "
+    "VALUES ('delete', old.notification_id, old.search_document); "
+    "INSERT INTO notifications_fts(rowid, search_document) "
+    "VALUES (new.notification_id, new.search_document); END",
+    "INSERT INTO notifications_fts(notifications_fts) VALUES ('rebuild')",
+]
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS notifications_fts_ai",
+    "DROP TRIGGER IF EXISTS notifications_fts_ad",
+    "DROP TRIGGER IF EXISTS notifications_fts_au",
+    "DROP TABLE IF EXISTS notifications_fts",
+]
+MYSQL_FULLTEXT_SQL = [
+    "CREATE FULLTEXT INDEX notifications_search_ft "
+    "ON notifications (search_document) WITH PARSER ngram",
+]
+MYSQL_FULLTEXT_DROP_SQL = [
+    "DROP INDEX notifications_search_ft ON notifications",
+]
+
+
+# Bản sao cố định của search_utils.fold_text/build_search_document tại thời
+# điểm tạo migration, để lịch sử migration không phụ thuộc vào code hiện tại
+def fold_text(text):
+    text = (text or "").replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def build_search_document(title, message, sender_name):
+    parts = [title, message, sender_name]
+    return fold_text(" ".join(str(part) for part in parts if part))
+
+
+def backfill_search_documents(apps, schema_editor):
+    Notification = apps.get_model("appartment", "Notification")
+    changed = []
+    for notification in (
+        Notification.objects.select_related("sender").order_by("pk").iterator()
+    ):
+        notification.search_document = build_search_document(
+            notification.title, notification.message, notification.sender.full_name
+        )
+        changed.append(notification)
+        if len(changed) >= 1000:
+            Notification.objects.bulk_update(changed, ["search_document"])
+            changed = []
+    Notification.objects.bulk_update(changed, ["search_document"])
+
+
+def run_vendor_sql(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+# Chỉ mục toàn văn phụ thuộc CSDL: FULLTEXT (ngram) trên MySQL, bảng FTS5
+# đồng bộ bằng trigger trên SQLite. CSDL khác tìm kiếm bằng LIKE.
+# Khi SQLite dựng lại bảng notifications (AlterField...), trigger bị xóa theo
+# bảng cũ: migration 0015 tạo lại trigger và đánh chỉ mục lại.
+create_search_index = run_vendor_sql(
+    {"mysql": MYSQL_FULLTEXT_SQL, "sqlite": SQLITE_FTS_SQL}
+)
+drop_search_index = run_vendor_sql(
+    {"mysql": MYSQL_FULLTEXT_DROP_SQL, "sqlite": SQLITE_FTS_DROP_SQL}
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0007_unreadnotificationcounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
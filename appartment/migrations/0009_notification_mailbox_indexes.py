@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0008_notification_search_document"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["receiver", "created_at"], name="notificatio_receive_b72807_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["sender", "created_at"], name="notificatio_sender__27efc9_idx"
+            ),
+        ),
+    ]
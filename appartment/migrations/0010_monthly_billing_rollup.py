@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:01
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Gộp toàn bộ hóa đơn hiện có thành các dòng tổng hợp theo tháng.
+    """
+    Bill = apps.get_model("appartment", "Bill")
+    MonthlyBillingRollup = apps.get_model("appartment", "MonthlyBillingRollup")
+
+    paid = Q(status="paid")
+    overdue = Q(status="overdue") | Q(status="unpaid", due_date__lt=timezone.now())
+    rows = (
+        Bill.objects.annotate(rollup_month=TruncMonth("bill_month"))
+        .values("rollup_month")
+        .annotate(
+            bill_count=Count("pk"),
+            billed_total=Sum("total_amount"),
+            paid_count=Count("pk", filter=paid),
+            paid_total=Sum("total_amount", filter=paid),
+            overdue_count=Count("pk", filter=overdue),
+            unpaid_amount=Sum("total_amount", filter=~paid),
+        )
+        .order_by()
+    )
+    MonthlyBillingRollup.objects.bulk_create(
+        [
+            MonthlyBillingRollup(
+                month=timezone.localtime(row.pop("rollup_month")).date(),
+                **{field: value or 0 for field, value in row.items()},
+            )
+            for row in rows
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0009_notification_mailbox_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyBillingRollup",
+            fields=[
+                ("month", models.DateField(primary_key=True, serialize=False)),
+                ("bill_count", models.PositiveIntegerField(default=0)),
+                (
+                    "billed_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("paid_count", models.PositiveIntegerField(default=0)),
+                (
+                    "paid_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("overdue_count", models.PositiveIntegerField(default=0)),
+                (
+                    "unpaid_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "monthly_billing_rollups",
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0010_monthly_billing_rollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["bill_month", "room"], name="bills_bill_mo_53a386_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["status", "due_date"], name="bills_status_2d6121_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="monthlymeterreading",
+            index=models.Index(
+                fields=["service_month", "room"], name="monthly_met_service_f2b36d_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:20
+
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+PERIOD_SOURCES = [
+    ("Bill", "bill_month", ("room",)),
+    ("DraftBill", "bill_month", ("room", "draft_type")),
+    ("MonthlyMeterReading", "service_month", ("room",)),
+]
+
+
+def month_period(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.year * 100 + value.month
+
+
+def backfill_periods(apps, schema_editor):
+    """
+    Điền period (YYYYMM) từ cột tháng hiện có, rồi dừng migration nếu có
+    dòng trùng (phòng, tháng) để xử lý tay trước khi thêm ràng buộc duy nhất.
+    """
+    duplicates = []
+    for model_name, month_field, key_fields in PERIOD_SOURCES:
+        Model = apps.get_model("appartment", model_name)
+        pks_by_period = defaultdict(list)
+        for pk, month in Model.objects.values_list("pk", month_field).iterator():
+            pks_by_period[month_period(month)].append(pk)
+        for period, pks in pks_by_period.items():
+            for start in range(0, len(pks), 1000):
+                Model.objects.filter(pk__in=pks[start : start + 1000]).update(
+                    period=period
+                )
+
+        rows = (
+            Model.objects.values(*key_fields, "period")
+            .annotate(total=Count("pk"))
+            .filter(total__gt=1)
+            .order_by()
+        )
+        duplicates.extend(f"{model_name} {row}" for row in rows)
+
+    if duplicates:
+        raise RuntimeError(
+            "Duplicate rows for the same room and month must be resolved before "
+            "adding the unique period constraints:\n" + "\n".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0011_month_range_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="period",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="draftbill",
+            name="period",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="monthlymeterreading",
+            name="period",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="bill",
+            name="period",
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="draftbill",
+            name="period",
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="monthlymeterreading",
+            name="period",
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name="bill",
+            unique_together={("room", "period")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="draftbill",
+            unique_together={("room", "period", "draft_type")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="monthlymeterreading",
+            unique_together={("room", "period")},
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:10
+
+from collections import defaultdict
+from datetime import datetime
+
+import django.db.models.deletion
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def local_date(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date() if isinstance(value, datetime) else value
+
+
+def backfill_occupancy(apps, schema_editor):
+    """
+    Số cư dân theo tháng của mọi phòng, từ lượt vào đầu tiên tới tháng hiện tại.
+    """
+    RoomResident = apps.get_model("appartment", "RoomResident")
+    RoomMonthOccupancy = apps.get_model("appartment", "RoomMonthOccupancy")
+
+    stays = defaultdict(list)
+    for room_id, user_id, move_in, move_out in RoomResident.objects.order_by(
+        "move_in_date", "pk"
+    ).values_list("room_id", "user_id", "move_in_date", "move_out_date"):
+        stays[room_id].append(
+            (local_date(move_in), local_date(move_out) if move_out else None, user_id)
+        )
+
+    current_month = local_date(timezone.now()).replace(day=1)
+    rows = []
+    for room_id, room_stays in stays.items():
+        month = room_stays[0][0].replace(day=1)
+        while month <= current_month:
+            next_month = month + relativedelta(months=1)
+            user_ids = []
+            for move_in, move_out, user_id in room_stays:
+                if (
+                    move_in < next_month
+                    and (move_out is None or move_out >= month)
+                    and user_id not in user_ids
+                ):
+                    user_ids.append(user_id)
+            rows.append(
+                RoomMonthOccupancy(
+                    room_id=room_id,
+                    period=month.year * 100 + month.month,
+                    resident_count=len(user_ids),
+                    resident_ids=user_ids,
+                )
+            )
+            month = next_month
+    RoomMonthOccupancy.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0012_month_period"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomMonthOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.PositiveIntegerField()),
+                ("resident_count", models.PositiveSmallIntegerField(default=0)),
+                ("resident_ids", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="month_occupancies",
+                        to="appartment.room",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "room_month_occupancy",
+                "indexes": [
+                    models.Index(
+                        fields=["period", "resident_count"],
+                        name="room_month__period_581bad_idx",
+                    )
+                ],
+                "unique_together": {("room", "period")},
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
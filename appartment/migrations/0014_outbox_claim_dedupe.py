@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0013_room_month_occupancy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outbox",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="outbox",
+            name="dedupe_key",
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="outbox",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Chờ gửi"),
+                    ("SENDING", "Đang gửi"),
+                    ("SENT", "Đã gửi"),
+                    ("FAILED", "Thất bại"),
+                ],
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+    ]
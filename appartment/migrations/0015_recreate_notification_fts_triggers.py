@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:05
+
+from django.db import migrations
+
+# Trigger đồng bộ bảng FTS5 notifications_fts (xem 0008). SQLite xóa trigger
+# khi dựng lại bảng notifications, nên bước này tạo lại trigger còn thiếu và
+# đánh chỉ mục lại toàn bộ để bù các thay đổi xảy ra khi chưa có trigger.
+# Migration nào dựng lại bảng notifications về sau cần lặp lại bước này.
+SQLITE_FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS notifications_fts_ai AFTER INSERT ON notifications "
+    "BEGIN "
+    "INSERT INTO notifications_fts(rowid, search_document) "
+    "VALUES (new.notification_id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS notifications_fts_ad AFTER DELETE ON notifications "
+    "BEGIN "
+    "INSERT INTO notifications_fts(notifications_fts, rowid, search_document) "
+    "VALUES ('delete', old.notification_id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS notifications_fts_au AFTER UPDATE OF "
+    "search_document ON notifications BEGIN "
+    "INSERT INTO notifications_fts(notifications_fts, rowid, search_document) "
+    "VALUES ('delete', old.notification_id, old.search_document); "
+    "INSERT INTO notifications_fts(rowid, search_document) "
+    "VALUES (new.notification_id, new.search_document); END",
+    "INSERT INTO notifications_fts(notifications_fts) VALUES ('rebuild')",
+]
+
+
+def recreate_fts_triggers(apps, schema_editor):
+    # Chỉ SQLite dùng trigger; chỉ mục FULLTEXT của MySQL gắn với bảng
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SQLITE_FTS_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appartment", "0014_outbox_claim_dedupe"),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,16 @@
 from .additional_services import AdditionalService
 from .bill_additional_services import BillAdditionalService
 from .bills import Bill
+from .monthly_billing_rollup import MonthlyBillingRollup
 from .provinces import Province
 from .districts import District
 from .notifications import Notification
+from .notification_recipient import NotificationRecipient
+from .unread_notification_counter import UnreadNotificationCounter
 from .rental_prices import RentalPrice
 from .roles import Role
 from .room_resident import RoomResident
+from .room_month_occupancy import RoomMonthOccupancy
 from .rooms import Room
 from .users import User
 from .wards import Ward
@@ -14,6 +18,9 @@ from .payment_history import PaymentHistory
 from .monthly_meter_reading import MonthlyMeterReading
 from .eletric_water_totals import ElectricWaterTotal
 from .draft_bill import DraftBill
+from .billing_run import BillingRun, BillingRunItem
+from .bill_email_delivery import BillEmailDelivery
+from .outbox import Outbox
 from .system_setting import SystemSettings
 from ..constants import (
     StringLength,
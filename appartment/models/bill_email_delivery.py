@@ -0,0 +1,34 @@
+from django.db import models
+from ..constants import StringLength
+
+
+# Kết quả gửi email hóa đơn tới từng người nhận
+class BillEmailDelivery(models.Model):
+    class DeliveryStatus(models.TextChoices):
+        SENT = "SENT", "Đã gửi"
+        FAILED = "FAILED", "Thất bại"
+
+    bill_email_delivery_id = models.AutoField(primary_key=True)
+    bill = models.ForeignKey(
+        "Bill", on_delete=models.CASCADE, related_name="email_deliveries"
+    )
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    email = models.EmailField()
+    status = models.CharField(
+        max_length=StringLength.SHORT.value, choices=DeliveryStatus.choices
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_message = models.CharField(
+        max_length=StringLength.DESCRIPTION.value, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Bill {self.bill_id} -> {self.email} ({self.status})"
+
+    class Meta:
+        db_table = "bill_email_deliveries"
+        indexes = [
+            models.Index(fields=["bill", "user"]),
+            models.Index(fields=["status"]),
+        ]
@@ -0,0 +1,55 @@
+from django.db import models
+from ..constants import StringLength
+
+
+# Sổ ghi các lần chạy tạo hóa đơn cuối cùng (generate_final_bills)
+class BillingRun(models.Model):
+    class RunStatus(models.TextChoices):
+        RUNNING = "RUNNING", "Đang chạy"
+        COMPLETED = "COMPLETED", "Hoàn tất"
+        FAILED = "FAILED", "Thất bại"
+
+    run_id = models.AutoField(primary_key=True)
+    bill_month = models.DateField()
+    status = models.CharField(
+        max_length=StringLength.SHORT.value,
+        choices=RunStatus.choices,
+        default=RunStatus.RUNNING,
+    )
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Billing run #{self.run_id} - {self.bill_month.strftime('%Y-%m')} ({self.status})"
+
+    class Meta:
+        db_table = "billing_runs"
+
+
+# Kết quả của từng phòng trong một lần chạy, kèm checksum dữ liệu đầu vào
+class BillingRunItem(models.Model):
+    class ItemStatus(models.TextChoices):
+        SUCCESS = "SUCCESS", "Thành công"
+        SKIPPED = "SKIPPED", "Bỏ qua"
+        FAILED = "FAILED", "Thất bại"
+
+    billing_run_item_id = models.AutoField(primary_key=True)
+    run = models.ForeignKey(BillingRun, on_delete=models.CASCADE, related_name="items")
+    room = models.ForeignKey("Room", on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=StringLength.SHORT.value, choices=ItemStatus.choices
+    )
+    input_checksum = models.CharField(max_length=64, blank=True)
+    bill = models.ForeignKey("Bill", on_delete=models.SET_NULL, null=True, blank=True)
+    message = models.CharField(max_length=StringLength.DESCRIPTION.value, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Run #{self.run_id} - Room {self.room_id} ({self.status})"
+
+    class Meta:
+        db_table = "billing_run_items"
+        unique_together = (
+            "run",
+            "room",
+        )  # Mỗi phòng chỉ có một kết quả trong một lần chạy
@@ -1,11 +1,14 @@
 from django.db import models
 
 from ..constants import StringLength, PaymentStatus, DecimalConfig
+from .month_range import BillQuerySet
 
 
 class Bill(models.Model):
     bill_id = models.AutoField(primary_key=True)
     bill_month = models.DateTimeField()
+    # Tháng dạng YYYYMM, được điền từ bill_month mỗi lần lưu (signal pre_save)
+    period = models.PositiveIntegerField(editable=False)
     electricity_amount = models.DecimalField(
         max_digits=10, decimal_places=2, null=True, blank=True
     )
@@ -23,8 +26,17 @@ class Bill(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     room = models.ForeignKey("Room", on_delete=models.RESTRICT, db_column="room_id")
 
+    objects = BillQuerySet.as_manager()
+
     class Meta:
         db_table = "bills"
+        unique_together = ("room", "period")
+        indexes = [
+            # Lọc theo khoảng tháng (for_month) kèm phòng
+            models.Index(fields=["bill_month", "room"]),
+            # Hóa đơn quá hạn: status = unpaid AND due_date < now
+            models.Index(fields=["status", "due_date"]),
+        ]
 
     def __str__(self):
         return f"Bill {self.bill_id} for Room {self.room_id}"
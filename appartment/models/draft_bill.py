@@ -17,6 +17,8 @@ class DraftBill(models.Model):
     draft_bill_id = models.AutoField(primary_key=True)
     room = models.ForeignKey("Room", on_delete=models.CASCADE)
     bill_month = models.DateField()
+    # Tháng dạng YYYYMM, được điền từ bill_month mỗi lần lưu (signal pre_save)
+    period = models.PositiveIntegerField(editable=False)
     draft_type = models.CharField(
         max_length=StringLength.SHORT.value, choices=DraftType.choices
     )
@@ -37,6 +39,6 @@ class DraftBill(models.Model):
         db_table = "draft_bills"  # Giữ tên bảng giống như SQL
         unique_together = (
             "room",
-            "bill_month",
+            "period",
             "draft_type",
         )  # Đảm bảo không có 2 hóa đơn nháp cùng loại trong cùng 1 tháng cho 1 phòng
@@ -1,6 +1,7 @@
 from django.db import models
 
 from ..constants import DecimalConfig
+from .month_range import ElectricWaterTotalQuerySet
 
 
 class ElectricWaterTotal(models.Model):
@@ -12,6 +13,8 @@ class ElectricWaterTotal(models.Model):
     water_cost = models.DecimalField(**DecimalConfig.MONEY)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ElectricWaterTotalQuerySet.as_manager()
+
     class Meta:
         db_table = "electric_water_totals"
 
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import models
+from django.utils import timezone
+
+
+def month_bounds(value):
+    """
+    Khoảng [00:00 ngày đầu tháng, 00:00 ngày đầu tháng sau) theo múi giờ hiện
+    tại, dạng aware datetime, của tháng chứa value (date hoặc datetime).
+    """
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    start = timezone.make_aware(datetime(value.year, value.month, 1))
+    return start, start + relativedelta(months=1)
+
+
+def month_period(value):
+    """
+    Khóa tháng dạng số nguyên YYYYMM (vd. 202507) của value (date hoặc
+    datetime; datetime aware được đổi về múi giờ hiện tại trước).
+    """
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.year * 100 + value.month
+
+
+class MonthRangeQuerySet(models.QuerySet):
+    """
+    QuerySet lọc theo tháng bằng điều kiện khoảng trên cột thời gian.
+
+    Khác với __year/__month/__date (bọc cột trong hàm chuyển múi giờ khi
+    USE_TZ=True), điều kiện >= / < dùng được chỉ mục trên cột.
+    Lớp con khai báo month_field là tên cột DateTimeField cần lọc.
+    """
+
+    month_field = None
+
+    def month_q(self, value):
+        start, end = month_bounds(value)
+        return models.Q(
+            **{f"{self.month_field}__gte": start, f"{self.month_field}__lt": end}
+        )
+
+    def for_month(self, value):
+        return self.filter(self.month_q(value))
+
+    def for_months(self, values):
+        """
+        Gộp nhiều tháng (OR các khoảng) trong một truy vấn.
+        """
+        condition = models.Q()
+        for value in values:
+            condition |= self.month_q(value)
+        return self.filter(condition) if condition else self.none()
+
+
+class BillQuerySet(MonthRangeQuerySet):
+    month_field = "bill_month"
+
+
+class MonthlyMeterReadingQuerySet(MonthRangeQuerySet):
+    month_field = "service_month"
+
+
+class ElectricWaterTotalQuerySet(MonthRangeQuerySet):
+    month_field = "summary_for_month"
@@ -0,0 +1,24 @@
+from django.db import models
+
+
+# Tổng của cả tháng vượt quá DecimalConfig.MONEY của một hóa đơn
+ROLLUP_MONEY = {"max_digits": 14, "decimal_places": 2}
+
+
+# Số liệu hóa đơn đã gộp sẵn theo tháng, được tính lại khi hóa đơn thay đổi
+class MonthlyBillingRollup(models.Model):
+    month = models.DateField(primary_key=True)
+    bill_count = models.PositiveIntegerField(default=0)
+    billed_total = models.DecimalField(**ROLLUP_MONEY, default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    paid_total = models.DecimalField(**ROLLUP_MONEY, default=0)
+    # Hóa đơn quá hạn tại thời điểm tính lại (rebuild_rollups chạy hằng đêm)
+    overdue_count = models.PositiveIntegerField(default=0)
+    unpaid_amount = models.DecimalField(**ROLLUP_MONEY, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.month:%m/%Y}: {self.bill_count} bills"
+
+    class Meta:
+        db_table = "monthly_billing_rollups"
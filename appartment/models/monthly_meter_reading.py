@@ -1,12 +1,15 @@
 from django.db import models
 
 from ..constants import StringLength, ElectricWaterStatus
+from .month_range import MonthlyMeterReadingQuerySet
 
 
 class MonthlyMeterReading(models.Model):
     service_id = models.AutoField(primary_key=True)
     room = models.ForeignKey("Room", on_delete=models.RESTRICT, db_column="room_id")
     service_month = models.DateTimeField()
+    # Tháng dạng YYYYMM, được điền từ service_month mỗi lần lưu (signal pre_save)
+    period = models.PositiveIntegerField(editable=False)
     electricity_index = models.IntegerField(null=True, blank=True)
     water_index = models.IntegerField(null=True, blank=True)
     status = models.CharField(
@@ -15,8 +18,14 @@ class MonthlyMeterReading(models.Model):
         default=ElectricWaterStatus.PENDING.value,
     )
 
+    objects = MonthlyMeterReadingQuerySet.as_manager()
+
     class Meta:
         db_table = "monthly_meter_readings"
+        unique_together = ("room", "period")
+        indexes = [
+            models.Index(fields=["service_month", "room"]),
+        ]
 
     def __str__(self):
         return (
@@ -0,0 +1,28 @@
+from django.db import models
+from ..constants import StringLength, NotificationStatus
+
+
+# Trạng thái đọc của từng người nhận đối với một thông báo gửi hàng loạt
+class NotificationRecipient(models.Model):
+    notification_recipient_id = models.BigAutoField(primary_key=True)
+    notification = models.ForeignKey(
+        "Notification", on_delete=models.CASCADE, related_name="recipients"
+    )
+    user = models.ForeignKey(
+        "User", on_delete=models.CASCADE, related_name="notification_receipts"
+    )
+    status = models.CharField(
+        max_length=StringLength.SHORT.value,
+        choices=NotificationStatus.choices(),
+        default=NotificationStatus.UNREAD.value,
+    )
+
+    def __str__(self):
+        return f"{self.notification_id} -> {self.user_id} ({self.status})"
+
+    class Meta:
+        db_table = "notification_recipients"
+        unique_together = ("notification", "user")
+        indexes = [
+            models.Index(fields=["user", "status"]),
+        ]
@@ -16,6 +16,9 @@ class Notification(models.Model):
         blank=True,
         related_name="received_notifications",
     )
+    # Thông báo gửi hàng loạt: nội dung lưu một lần, người nhận nằm ở
+    # NotificationRecipient
+    is_broadcast = models.BooleanField(default=False)
     title = models.CharField(max_length=StringLength.EXTRA_LONG.value)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -24,6 +27,8 @@ class Notification(models.Model):
         choices=NotificationStatus.choices(),
         default=NotificationStatus.UNREAD.value,
     )
+    # Tiêu đề, nội dung và tên người gửi đã bỏ dấu, dùng cho chỉ mục toàn văn
+    search_document = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         db_table = "notifications"
@@ -32,6 +37,9 @@ class Notification(models.Model):
             models.Index(fields=["receiver"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["status"]),
+            # Mỗi nhánh hộp thư đọc theo (điều kiện, created_at) từ chỉ mục
+            models.Index(fields=["receiver", "created_at"]),
+            models.Index(fields=["sender", "created_at"]),
         ]
 
     def __str__(self):
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+from ..constants import StringLength
+
+
+# Hàng đợi bền vững cho các email cần gửi (outbox pattern)
+class Outbox(models.Model):
+    class Kind(models.TextChoices):
+        BILL_EMAIL = "BILL_EMAIL", "Email hóa đơn"
+        NOTIFICATION_EMAIL = "NOTIFICATION_EMAIL", "Email thông báo"
+
+    class OutboxStatus(models.TextChoices):
+        PENDING = "PENDING", "Chờ gửi"
+        SENDING = "SENDING", "Đang gửi"
+        SENT = "SENT", "Đã gửi"
+        FAILED = "FAILED", "Thất bại"
+
+    outbox_id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=StringLength.SHORT.value, choices=Kind.choices)
+    payload = models.JSONField()  # subject, body, html, to
+    status = models.CharField(
+        max_length=StringLength.SHORT.value,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    # Thời điểm một tiến trình drain nhận dòng (trạng thái SENDING)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # Khóa chống xếp hàng trùng, vd. "BILL_EMAIL:<bill_id>:<user_id>"
+    dedupe_key = models.CharField(
+        max_length=StringLength.DESCRIPTION.value, null=True, blank=True, unique=True
+    )
+    last_error = models.CharField(max_length=StringLength.DESCRIPTION.value, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Outbox #{self.outbox_id} {self.kind} ({self.status})"
+
+    class Meta:
+        db_table = "outbox"
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
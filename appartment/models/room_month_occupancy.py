@@ -0,0 +1,25 @@
+from django.db import models
+
+
+# Số cư dân của mỗi phòng theo tháng, được tính lại khi cư dân vào/rời phòng
+class RoomMonthOccupancy(models.Model):
+    room = models.ForeignKey(
+        "Room", on_delete=models.CASCADE, related_name="month_occupancies"
+    )
+    # Tháng dạng YYYYMM, giống period của Bill
+    period = models.PositiveIntegerField()
+    resident_count = models.PositiveSmallIntegerField(default=0)
+    # user_id của các cư dân ở trong tháng (mỗi user một lần)
+    resident_ids = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.room_id} {self.period}: {self.resident_count}"
+
+    class Meta:
+        db_table = "room_month_occupancy"
+        unique_together = ("room", "period")
+        indexes = [
+            # "Các phòng có người ở trong tháng M"
+            models.Index(fields=["period", "resident_count"]),
+        ]
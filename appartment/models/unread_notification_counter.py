@@ -0,0 +1,19 @@
+from django.db import models
+
+
+# Số thông báo chưa đọc của mỗi user, được cập nhật khi tạo/đọc thông báo
+class UnreadNotificationCounter(models.Model):
+    user = models.OneToOneField(
+        "User",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_notification_counter",
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count}"
+
+    class Meta:
+        db_table = "unread_notification_counters"
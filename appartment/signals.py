@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .constants import NotificationStatus
+from .models import (
+    AdditionalService,
+    Bill,
+    DraftBill,
+    MonthlyMeterReading,
+    Notification,
+    PaymentHistory,
+    Role,
+    Room,
+    RoomResident,
+    User,
+)
+from .models.month_range import month_period
+from .utils.dashboard_utils import invalidate_manager_dashboard
+from .utils.occupancy_utils import refresh_stay_occupancy
+from .utils.role_utils import invalidate_role_members
+from .utils.rollup_utils import refresh_monthly_rollups
+from .utils.search_utils import (
+    fold_text,
+    notification_search_document,
+    refresh_search_documents,
+)
+from .utils.service_utils import service_catalog
+from .utils.unread_counter_utils import increment_unread
+
+
+@receiver(post_save, sender=AdditionalService)
+@receiver(post_delete, sender=AdditionalService)
+def invalidate_service_catalog(sender, **kwargs):
+    # Xóa ngay cho tiến trình hiện tại, và xóa lại sau khi commit để các
+    # tiến trình khác không kịp nạp dữ liệu cũ trong lúc transaction chưa xong
+    service_catalog.invalidate()
+    transaction.on_commit(service_catalog.invalidate)
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    # Thông báo tạo bằng bulk_create không đi qua signal, nơi gọi tự cập nhật
+    if (
+        created
+        and instance.receiver_id
+        and instance.status == NotificationStatus.UNREAD.value
+    ):
+        increment_unread([instance.receiver_id])
+
+
+@receiver(pre_save, sender=Notification)
+def fill_search_document(sender, instance, **kwargs):
+    instance.search_document = notification_search_document(instance)
+
+
+@receiver(post_save, sender=User)
+def refresh_sender_search_documents(sender, instance, created, update_fields, **kwargs):
+    # Tên người gửi nằm cuối search_document; chỉ tính lại khi tên đã đổi
+    if created or (update_fields is not None and "full_name" not in update_fields):
+        return
+    refresh_search_documents(
+        Notification.objects.filter(sender=instance).exclude(
+            search_document__endswith=fold_text(instance.full_name)
+        )
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_member_cache(sender, update_fields=None, **kwargs):
+    # Bỏ qua các lần lưu không đổi role/trạng thái (vd. cập nhật last_login)
+    if update_fields is not None and not {"role", "is_active", "role_name"} & set(
+        update_fields
+    ):
+        return
+    invalidate_role_members()
+    transaction.on_commit(invalidate_role_members)
+
+
+@receiver(pre_save, sender=Bill)
+@receiver(pre_save, sender=DraftBill)
+def fill_bill_period(sender, instance, **kwargs):
+    instance.period = month_period(instance.bill_month)
+
+
+@receiver(pre_save, sender=MonthlyMeterReading)
+def fill_reading_period(sender, instance, **kwargs):
+    instance.period = month_period(instance.service_month)
+
+
+@receiver(post_init, sender=Bill)
+def remember_bill_month(sender, instance, **kwargs):
+    # Giữ tháng lúc nạp để tính lại cả tháng cũ khi bill_month bị đổi;
+    # đọc qua __dict__ để không kích hoạt truy vấn với trường bị defer
+    instance._loaded_bill_month = instance.__dict__.get("bill_month")
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def refresh_bill_rollups(sender, instance, **kwargs):
+    # Số liệu "đã thanh toán" lấy từ Bill.status: mọi luồng thanh toán
+    # (webhook, xác nhận tiền mặt) đều lưu Bill nên chỉ cần nghe Bill
+    refresh_monthly_rollups(
+        [instance.bill_month, getattr(instance, "_loaded_bill_month", None)]
+    )
+    instance._loaded_bill_month = instance.bill_month
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+@receiver(post_save, sender=PaymentHistory)
+@receiver(post_delete, sender=PaymentHistory)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=RoomResident)
+@receiver(post_delete, sender=RoomResident)
+def invalidate_dashboard_cache(sender, **kwargs):
+    invalidate_manager_dashboard()
+    transaction.on_commit(invalidate_manager_dashboard)
+
+
+@receiver(post_init, sender=RoomResident)
+def remember_stay(sender, instance, **kwargs):
+    # Giữ phòng và ngày vào/ra lúc nạp để tính lại cả khoảng cũ khi bị sửa
+    values = instance.__dict__
+    instance._loaded_stay = (
+        values.get("room_id"),
+        values.get("move_in_date"),
+        values.get("move_out_date"),
+    )
+
+
+@receiver(post_save, sender=RoomResident)
+@receiver(post_delete, sender=RoomResident)
+def refresh_occupancy(sender, instance, **kwargs):
+    # Mọi luồng sửa lượt ở (view, admin, shell) đều cập nhật số cư dân theo tháng;
+    # bulk_create/update() bỏ qua signal và được sửa bởi lệnh rebuild hằng đêm
+    refresh_stay_occupancy(instance, getattr(instance, "_loaded_stay", None))
+    instance._loaded_stay = (
+        instance.room_id,
+        instance.move_in_date,
+        instance.move_out_date,
+    )
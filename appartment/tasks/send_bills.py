@@ -1,63 +1,95 @@
 from datetime import date
 
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.db.models import Prefetch
 
-from appartment.models import Bill, RoomResident
-from appartment.constants import BILL_SEND_DAYS
+from appartment.models import Bill, BillEmailDelivery, RoomResident
+from appartment.constants import BILL_SEND_DAYS, StringLength
+from appartment.utils.email_utils import (
+    build_email_message,
+    get_bill_email_template,
+    log_dispatch_summary,
+    render_bill_email,
+    send_tagged_emails,
+)
 
 
-def send_monthly_bills():
-    today = date.today()
+def get_bills_to_send(today):
+    """
+    Hóa đơn của tháng hiện tại kèm phòng, cư dân đang ở (chưa move out) và
+    user của họ, được tải trong số query cố định (không phụ thuộc số hóa đơn).
+    """
+    active_residents = Prefetch(
+        "room__residents",
+        queryset=RoomResident.objects.filter(move_out_date__isnull=True)
+        .select_related("user")
+        .order_by("room_resident_id"),
+        to_attr="active_residents",
+    )
+    return (
+        Bill.objects.for_month(today)
+        .select_related("room")
+        .prefetch_related(active_residents)
+        .order_by("bill_id")
+    )
 
-    if today.day not in BILL_SEND_DAYS:
-        return
 
-    # Lấy tất cả bills của tháng hiện tại
-    bills = Bill.objects.filter(
-        bill_month__month=today.month,
-        bill_month__year=today.year,
-    )
+def build_bill_email(bill, user, template, today):
+    return build_email_message(render_bill_email(bill, user, template, today))
 
-    for bill in bills:
-        room = bill.room
-        # lấy resident đang ở trong phòng (chưa move out)
-        residents = RoomResident.objects.filter(room=room, move_out_date__isnull=True)
 
-        for resident in residents:
+def iter_bill_emails(bills, today):
+    """
+    Sinh các cặp ((bill, user), email) cho từng cư dân đang ở của mỗi hóa đơn.
+    """
+    # Template được nạp (biên dịch) một lần cho toàn bộ lượt gửi
+    template = get_bill_email_template()
+    for bill in bills:
+        for resident in bill.room.active_residents:
             user = resident.user
-            subject = (
-                f"Hóa đơn tiền phòng {today.month}/{today.year} - Phòng {room.room_id}"
-            )
-            from_email = None
-            to_email = [user.email]
-
-            text_content = f"""
-            Hóa đơn phòng {bill.room.room_id} tháng {today.month}/{today.year}:
-            Điện: {bill.electricity_amount} VND
-            Nước: {bill.water_amount} VND
-            Dịch vụ khác: {bill.additional_service_amount} VND
-            Tổng: {bill.total_amount} VND
-            Hạn thanh toán: {bill.due_date.strftime('%d/%m/%Y') if bill.due_date else 'N/A'}
-            """
-
-            html_content = render_to_string(
-                "emails/auto_bill.html",
-                {
-                    "user_name": user.full_name,
-                    "room": bill.room.room_id,
-                    "month": today.month,
-                    "year": today.year,
-                    "electricity": bill.electricity_amount or 0,
-                    "water": bill.water_amount or 0,
-                    "services": bill.additional_service_amount or 0,
-                    "total": bill.total_amount or 0,
-                    "due_date": (
-                        bill.due_date.strftime("%d/%m/%Y") if bill.due_date else "N/A"
-                    ),
-                },
+            yield (bill, user), build_bill_email(bill, user, template, today)
+
+
+def save_delivery_outcomes(outcomes):
+    """
+    Lưu kết quả gửi tới từng người nhận bằng một lần bulk_create.
+    """
+    deliveries = []
+    for outcome in outcomes:
+        bill, user = outcome["tag"]
+        deliveries.append(
+            BillEmailDelivery(
+                bill=bill,
+                user=user,
+                email=user.email,
+                status=(
+                    BillEmailDelivery.DeliveryStatus.SENT
+                    if outcome["sent"]
+                    else BillEmailDelivery.DeliveryStatus.FAILED
+                ),
+                attempts=outcome["attempts"],
+                error_message=outcome["error"][: StringLength.DESCRIPTION.value],
             )
+        )
+    BillEmailDelivery.objects.bulk_create(deliveries)
+
+
+def send_monthly_bills(today=None, batch_size=None, workers=None):
+    """
+    Gửi trực tiếp qua SMTP email hóa đơn của tháng hiện tại (gửi thủ công).
+    Không chạy theo lịch: email hóa đơn thường ngày đi qua outbox khi tạo
+    hóa đơn cuối cùng.
+    """
+    today = today or date.today()
 
-            msg = EmailMultiAlternatives(subject, text_content, from_email, to_email)
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
+    if today.day not in BILL_SEND_DAYS:
+        return None
+
+    outcomes, summary = send_tagged_emails(
+        iter_bill_emails(get_bills_to_send(today), today),
+        workers=workers,
+        batch_size=batch_size,
+    )
+    # Kết quả từng người nhận được lưu vào DB ở cả hai chế độ
+    save_delivery_outcomes(outcomes)
+    log_dispatch_summary("send_monthly_bills", summary)
+    return summary
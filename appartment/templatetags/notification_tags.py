@@ -1,5 +1,7 @@
 from django import template
 
+from ..utils.unread_counter_utils import get_unread_count
+
 register = template.Library()
 
 
@@ -11,3 +13,11 @@ def notification_menu_item(context, url_name, label="Gửi thông báo"):
         "label": label,
         "active": request.resolver_match.url_name == url_name,
     }
+
+
+@register.simple_tag(takes_context=True)
+def unread_notification_count(context):
+    user = context["request"].user
+    if not user.is_authenticated:
+        return 0
+    return get_unread_count(user)
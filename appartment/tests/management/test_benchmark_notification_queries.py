@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ...constants import UserRole
+from ...models import Notification, Role, User
+
+
+class BenchmarkNotificationQueriesCommandTest(TestCase):
+    def setUp(self):
+        role = Role.objects.create(role_id=2, role_name=UserRole.APARTMENT_MANAGER.value)
+        self.manager = User.objects.create_user(
+            email="man@example.com", password="pw", user_id="MAN001", role=role
+        )
+        Notification.objects.create(sender=self.manager, title="T", message="m")
+
+    def test_prints_plans_and_timings(self):
+        out = StringIO()
+        call_command("benchmark_notification_queries", "MAN001", stdout=out)
+        output = out.getvalue()
+        self.assertIn("== OR query plan", output)
+        self.assertIn("== Mailbox branch plans", output)
+        self.assertIn("mailbox", output)
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_notification_queries", "NOPE", stdout=StringIO())
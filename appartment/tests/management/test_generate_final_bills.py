@@ -0,0 +1,289 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from ...management.commands import generate_final_bills as command_module
+from ...models import (
+    Bill,
+    BillingRun,
+    BillingRunItem,
+    DraftBill,
+    RentalPrice,
+    Room,
+)
+from ...utils import billing_utils
+from ...utils.service_utils import service_catalog
+
+
+class GenerateFinalBillsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = date(2025, 8, 1)
+        for index in range(5):
+            room = Room.objects.create(
+                room_id=f"P30{index}", description=f"Phòng 30{index}"
+            )
+            for draft_type in DraftBill.DraftType.values:
+                DraftBill.objects.create(
+                    room=room,
+                    bill_month=cls.month,
+                    draft_type=draft_type,
+                    status=DraftBill.DraftStatus.CONFIRMED,
+                    total_amount=1000,
+                    details={},
+                )
+            RentalPrice.objects.create(
+                room=room, price=3000000, effective_date=date(2025, 1, 1)
+            )
+
+    def setUp(self):
+        service_catalog.invalidate()
+
+    def test_generates_bills_in_chunks(self):
+        out = StringIO()
+        call_command("generate_final_bills", "2025-08", "--chunk-size", "2", stdout=out)
+        self.assertEqual(Bill.objects.count(), 5)
+        self.assertIn("Created 5, updated 0", out.getvalue())
+
+    def test_failed_chunk_is_retried_on_its_own(self):
+        real_generate = command_module.generate_final_bills
+        calls = []
+
+        def flaky_generate(month_date, room_ids, **kwargs):
+            calls.append(list(room_ids))
+            if room_ids == ["P302", "P303"] and calls.count(room_ids) == 1:
+                raise RuntimeError("connection lost")
+            return real_generate(month_date, room_ids, **kwargs)
+
+        out = StringIO()
+        with mock.patch.object(
+            command_module, "generate_final_bills", side_effect=flaky_generate
+        ):
+            call_command(
+                "generate_final_bills", "2025-08", "--chunk-size", "2", stdout=out
+            )
+
+        self.assertEqual(
+            calls,
+            [["P300", "P301"], ["P302", "P303"], ["P304"], ["P302", "P303"]],
+        )
+        self.assertEqual(Bill.objects.count(), 5)
+        self.assertIn("Created 5, updated 0", out.getvalue())
+
+    def test_chunk_failing_after_retries_raises(self):
+        with mock.patch.object(
+            command_module,
+            "generate_final_bills",
+            side_effect=RuntimeError("connection lost"),
+        ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "generate_final_bills",
+                    "2025-08",
+                    "--chunk-size",
+                    "5",
+                    stdout=StringIO(),
+                )
+        self.assertEqual(Bill.objects.count(), 0)
+
+    def test_run_ledger_records_outcome_and_checksums(self):
+        call_command("generate_final_bills", "2025-08", stdout=StringIO())
+
+        run = BillingRun.objects.get()
+        self.assertEqual(run.status, BillingRun.RunStatus.COMPLETED)
+        self.assertIsNotNone(run.finished_at)
+        items = run.items.order_by("room_id")
+        self.assertEqual(
+            [(item.room_id, item.status) for item in items],
+            [(f"P30{i}", BillingRunItem.ItemStatus.SUCCESS) for i in range(5)],
+        )
+        self.assertTrue(all(len(item.input_checksum) == 64 for item in items))
+        self.assertEqual(items[0].bill, Bill.objects.get(room_id="P300"))
+
+    def test_resume_skips_unchanged_rooms(self):
+        call_command("generate_final_bills", "2025-08", stdout=StringIO())
+        run = BillingRun.objects.get()
+        bill = Bill.objects.get(room_id="P300")
+        DraftBill.objects.filter(
+            room_id="P301", draft_type=DraftBill.DraftType.SERVICES
+        ).update(total_amount=2000)
+
+        out = StringIO()
+        call_command(
+            "generate_final_bills", "2025-08", "--resume", str(run.pk), stdout=out
+        )
+
+        self.assertIn("updated 1 final bills, 4 unchanged", out.getvalue())
+        self.assertEqual(BillingRun.objects.count(), 1)
+        self.assertEqual(Bill.objects.get(room_id="P301").total_amount, 3003000)
+        self.assertEqual(
+            Bill.objects.get(room_id="P300").total_amount, bill.total_amount
+        )
+
+    def test_resume_after_partial_failure_only_processes_remaining_rooms(self):
+        real_generate = command_module.generate_final_bills
+
+        def failing_generate(month_date, room_ids, **kwargs):
+            if "P304" in room_ids:
+                raise RuntimeError("connection lost")
+            return real_generate(month_date, room_ids, **kwargs)
+
+        with mock.patch.object(
+            command_module, "generate_final_bills", side_effect=failing_generate
+        ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "generate_final_bills",
+                    "2025-08",
+                    "--chunk-size",
+                    "2",
+                    stdout=StringIO(),
+                )
+
+        run = BillingRun.objects.get()
+        self.assertEqual(run.status, BillingRun.RunStatus.FAILED)
+        self.assertEqual(
+            run.items.get(room_id="P304").status, BillingRunItem.ItemStatus.FAILED
+        )
+        self.assertEqual(Bill.objects.count(), 4)
+
+        with mock.patch.object(
+            command_module, "generate_final_bills", wraps=real_generate
+        ) as generate:
+            out = StringIO()
+            call_command(
+                "generate_final_bills",
+                "2025-08",
+                "--chunk-size",
+                "2",
+                "--resume",
+                str(run.pk),
+                stdout=out,
+            )
+
+        self.assertIn("Created 1, updated 0 final bills, 4 unchanged", out.getvalue())
+        self.assertEqual(generate.call_count, 3)
+        run.refresh_from_db()
+        self.assertEqual(run.status, BillingRun.RunStatus.COMPLETED)
+        self.assertEqual(
+            run.items.filter(status=BillingRunItem.ItemStatus.SUCCESS).count(), 5
+        )
+
+    def test_resume_rejects_unknown_run_or_other_month(self):
+        run = BillingRun.objects.create(bill_month=date(2025, 7, 1))
+        with self.assertRaises(CommandError):
+            call_command("generate_final_bills", "2025-08", "--resume", str(run.pk + 1))
+        with self.assertRaises(CommandError):
+            call_command("generate_final_bills", "2025-08", "--resume", str(run.pk))
+
+
+def fail_for_room_p304(run, bill_ids, *args, **kwargs):
+    # Lỗi cố ý trong tiến trình con cho nhóm chứa P304 (kế thừa qua fork)
+    if "P304" in bill_ids:
+        raise RuntimeError("worker crashed")
+    return REAL_RECORD_RUN_ITEMS(run, bill_ids, *args, **kwargs)
+
+
+REAL_RECORD_RUN_ITEMS = billing_utils._record_run_items
+
+
+class GenerateFinalBillsPoolTest(TransactionTestCase):
+    """
+    Chạy nhánh --workers > 1 với process pool thật: dữ liệu được commit để các
+    worker (kết nối DB riêng) đọc được. Cần CSDL test dạng file hoặc server.
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Forked workers cannot see an in-memory test database.")
+        for index in range(5):
+            room = Room.objects.create(
+                room_id=f"P30{index}", description=f"Phòng 30{index}"
+            )
+            for draft_type in DraftBill.DraftType.values:
+                DraftBill.objects.create(
+                    room=room,
+                    bill_month=date(2025, 8, 1),
+                    draft_type=draft_type,
+                    status=DraftBill.DraftStatus.CONFIRMED,
+                    total_amount=1000 + index,
+                    details={},
+                )
+            RentalPrice.objects.create(
+                room=room, price=3000000, effective_date=date(2025, 1, 1)
+            )
+        service_catalog.invalidate()
+
+        # Worker được fork để kế thừa cấu hình CSDL test của tiến trình cha
+        executor = partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("fork")
+        )
+        patcher = mock.patch.object(command_module, "ProcessPoolExecutor", executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command(
+            "generate_final_bills", "2025-08", "--chunk-size", "1", *args, stdout=out
+        )
+        return out.getvalue()
+
+    def ledger(self, run):
+        return sorted(
+            run.items.values_list(
+                "room_id", "status", "input_checksum", "bill__total_amount"
+            )
+        )
+
+    def inline_baseline(self):
+        self.run_command()
+        run = BillingRun.objects.get()
+        ledger = self.ledger(run)
+        Bill.objects.all().delete()
+        run.delete()
+        return ledger
+
+    def test_pool_matches_inline_run(self):
+        expected = self.inline_baseline()
+
+        with mock.patch.object(
+            command_module, "generate_final_bills", side_effect=AssertionError
+        ):
+            # Nhánh pool không dùng generate_final_bills của tiến trình cha
+            output = self.run_command("--workers", "2")
+
+        self.assertIn("Created 5, updated 0", output)
+        run = BillingRun.objects.get()
+        self.assertEqual(run.status, BillingRun.RunStatus.COMPLETED)
+        self.assertEqual(self.ledger(run), expected)
+        self.assertEqual(Bill.objects.count(), 5)
+
+    def test_resume_interrupted_pool_run(self):
+        expected = self.inline_baseline()
+
+        with mock.patch.object(billing_utils, "_record_run_items", fail_for_room_p304):
+            with self.assertRaises(CommandError):
+                self.run_command("--workers", "2", "--retries", "1")
+
+        run = BillingRun.objects.get()
+        self.assertEqual(run.status, BillingRun.RunStatus.FAILED)
+        self.assertEqual(
+            run.items.get(room_id="P304").status, BillingRunItem.ItemStatus.FAILED
+        )
+        self.assertFalse(Bill.objects.filter(room_id="P304").exists())
+
+        output = self.run_command("--workers", "2", "--resume", str(run.pk))
+
+        self.assertIn("Created 1, updated 0 final bills, 4 unchanged", output)
+        run.refresh_from_db()
+        self.assertEqual(run.status, BillingRun.RunStatus.COMPLETED)
+        self.assertEqual(self.ledger(run), expected)
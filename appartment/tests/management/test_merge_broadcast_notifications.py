@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import NotificationStatus, UserRole
+from ...models import (
+    Notification,
+    NotificationRecipient,
+    Role,
+    UnreadNotificationCounter,
+    User,
+)
+
+
+class MergeBroadcastNotificationsCommandTest(TestCase):
+    def setUp(self):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        self.sender, self.first, self.second = [
+            User.objects.create_user(
+                email=f"{user_id.lower()}@example.com",
+                password="pw",
+                user_id=user_id,
+                role=role,
+            )
+            for user_id in ("MAN1", "RES1", "RES2")
+        ]
+        now = timezone.now()
+        self.body = self._notify(self.first, "Cắt nước", now)
+        self.copy = self._notify(
+            self.second, "Cắt nước", now + timedelta(seconds=5), read=True
+        )
+        # Cùng nội dung nhưng cách quá xa: là một lần gửi riêng khác
+        self.later = self._notify(self.second, "Cắt nước", now + timedelta(hours=1))
+        self.other = self._notify(self.second, "Bảo trì điện", now)
+
+    def _notify(self, receiver, title, created_at, read=False):
+        notification = Notification.objects.create(
+            sender=self.sender,
+            receiver=receiver,
+            title=title,
+            message="Tòa A",
+            status=(
+                NotificationStatus.READ.value
+                if read
+                else NotificationStatus.UNREAD.value
+            ),
+        )
+        # created_at là auto_now_add nên phải gán lại sau khi tạo
+        Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+        return notification
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command("merge_broadcast_notifications", "--dry-run", stdout=out)
+
+        self.assertIn("Broadcast groups found: 1.", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertFalse(NotificationRecipient.objects.exists())
+
+    def test_merges_groups_and_keeps_read_state(self):
+        out = StringIO()
+        call_command("merge_broadcast_notifications", stdout=out)
+
+        self.assertIn("notifications removed: 1.", out.getvalue())
+        self.body.refresh_from_db()
+        self.assertTrue(self.body.is_broadcast)
+        self.assertIsNone(self.body.receiver)
+        self.assertEqual(
+            dict(
+                NotificationRecipient.objects.filter(
+                    notification=self.body
+                ).values_list("user_id", "status")
+            ),
+            {
+                "RES1": NotificationStatus.UNREAD.value,
+                "RES2": NotificationStatus.READ.value,
+            },
+        )
+        self.assertFalse(Notification.objects.filter(pk=self.copy.pk).exists())
+        self.assertEqual(
+            set(Notification.objects.filter(receiver__isnull=False)),
+            {self.later, self.other},
+        )
+        self.assertEqual(
+            UnreadNotificationCounter.objects.get(user=self.second).unread_count, 2
+        )
+
+    def test_window_option_limits_grouping(self):
+        call_command(
+            "merge_broadcast_notifications", "--window", "1", stdout=StringIO()
+        )
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertFalse(NotificationRecipient.objects.exists())
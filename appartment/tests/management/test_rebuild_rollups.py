@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from ...models import Bill, MonthlyBillingRollup, Room
+
+
+class RebuildRollupsCommandTest(TestCase):
+    def setUp(self):
+        room = Room.objects.create(room_id="P101")
+        Bill.objects.create(
+            room=room,
+            bill_month=timezone.make_aware(datetime(2025, 7, 1)),
+            total_amount=1000,
+        )
+        MonthlyBillingRollup.objects.all().delete()
+
+    def test_rebuilds_rollups(self):
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+
+        rollup = MonthlyBillingRollup.objects.get(month=date(2025, 7, 1))
+        self.assertEqual(rollup.bill_count, 1)
+        self.assertIn("2025-07: 1 bill(s)", out.getvalue())
+        self.assertIn("Rebuilt 1 monthly rollup(s).", out.getvalue())
+
+    def test_since_skips_older_months(self):
+        call_command("rebuild_rollups", "--since", "2025-08", stdout=StringIO())
+        self.assertFalse(MonthlyBillingRollup.objects.exists())
+
+    def test_rejects_bad_since(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--since", "07/2025")
@@ -0,0 +1,50 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import UserRole
+from ...models import Role, Room, RoomMonthOccupancy, RoomResident, User
+from ...models.month_range import month_period
+
+
+class RebuildRoomOccupancyCommandTest(TestCase):
+    def setUp(self):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        user = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES1", role=role
+        )
+        self.room = Room.objects.create(room_id="P101")
+        self.other_room = Room.objects.create(room_id="P102")
+        RoomResident.objects.create(room=self.room, user=user)
+        RoomResident.objects.create(room=self.other_room, user=user)
+        RoomMonthOccupancy.objects.all().delete()
+        self.period = month_period(timezone.localdate())
+
+    def test_rebuilds_current_month(self):
+        out = StringIO()
+        call_command("rebuild_room_occupancy", stdout=out)
+
+        row = RoomMonthOccupancy.objects.get(room=self.room, period=self.period)
+        self.assertEqual(row.resident_count, 1)
+        self.assertIn("Rebuilt 2 occupancy row(s) for 2 room(s).", out.getvalue())
+
+    def test_rooms_and_months_limit_the_rebuild(self):
+        call_command(
+            "rebuild_room_occupancy",
+            "--rooms",
+            "P101",
+            "--months",
+            "1",
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            list(RoomMonthOccupancy.objects.values_list("room_id", "period")),
+            [("P101", self.period)],
+        )
+
+    def test_rejects_non_positive_months(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_room_occupancy", "--months", "0")
@@ -0,0 +1,48 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import PaymentStatus, UserRole
+from ...models import Bill, Notification, Role, Room, RoomResident, User
+
+
+class SendPaymentRemindersCommandTest(TestCase):
+    def setUp(self):
+        self.manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        self.manager = User.objects.create_user(
+            email="man@example.com",
+            password="pw",
+            user_id="MAN001",
+            role=self.manager_role,
+        )
+        resident = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES001", role=resident_role
+        )
+        room = Room.objects.create(room_id="P101")
+        RoomResident.objects.create(room=room, user=resident)
+        Bill.objects.create(
+            room=room,
+            bill_month=timezone.make_aware(datetime(2025, 6, 1)),
+            due_date=timezone.make_aware(datetime(2025, 7, 15)),
+            status=PaymentStatus.UNPAID.value,
+            total_amount=1000,
+        )
+
+    def test_sends_from_default_manager(self):
+        out = StringIO()
+        call_command("send_payment_reminders", "--date", "2025-08-01", stdout=out)
+        self.assertIn("Reminded 1 overdue bill(s) with 1 notification(s).", out.getvalue())
+        self.assertEqual(Notification.objects.get().sender, self.manager)
+
+    def test_invalid_sender_or_date(self):
+        with self.assertRaises(CommandError):
+            call_command("send_payment_reminders", "--sender", "NOPE", stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("send_payment_reminders", "--date", "01/08/2025", stdout=StringIO())
@@ -1,3 +1,5 @@
+from datetime import date, datetime
+
 from django.test import TestCase
 from django.utils import timezone
 from django.db import IntegrityError
@@ -51,3 +53,63 @@ class BillModelTest(TestCase):
         )
         with self.assertRaises(ValidationError):
             bill.full_clean()
+
+
+class BillForMonthTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(room_id="P101")
+
+    def bill(self, *args, room=None):
+        return Bill.objects.create(
+            room=room or self.room, bill_month=timezone.make_aware(datetime(*args))
+        )
+
+    def test_for_month_uses_local_month_boundaries(self):
+        first = self.bill(2025, 7, 1)
+        last = self.bill(
+            2025, 7, 31, 23, 59, room=Room.objects.create(room_id="P102")
+        )
+        self.bill(2025, 6, 30, 23, 59)
+        self.bill(2025, 8, 1)
+
+        bills = Bill.objects.for_month(date(2025, 7, 15))
+        self.assertQuerySetEqual(bills.order_by("pk"), [first, last])
+        # Điều kiện khoảng trên cột, không bọc cột trong hàm ngày/tháng
+        sql = str(bills.query).lower()
+        self.assertIn('"bills"."bill_month" >=', sql)
+        self.assertIn('"bills"."bill_month" <', sql)
+        self.assertNotIn("django_datetime", sql)
+
+    def test_for_months_combines_ranges(self):
+        july = self.bill(2025, 7, 1)
+        self.bill(2025, 8, 1)
+        september = self.bill(2025, 9, 1)
+
+        bills = Bill.objects.for_months([date(2025, 7, 1), date(2025, 9, 1)])
+        self.assertQuerySetEqual(bills.order_by("pk"), [july, september])
+        self.assertFalse(Bill.objects.for_months([]).exists())
+
+
+class BillPeriodTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(room_id="P101")
+
+    def test_period_follows_local_bill_month(self):
+        # 00:00 ngày 1/7 giờ Việt Nam vẫn là tháng 6 theo UTC
+        bill = Bill.objects.create(
+            room=self.room, bill_month=timezone.make_aware(datetime(2025, 7, 1))
+        )
+        self.assertEqual(bill.period, 202507)
+
+        bill.bill_month = timezone.make_aware(datetime(2025, 8, 31, 23))
+        bill.save()
+        self.assertEqual(Bill.objects.get(pk=bill.pk).period, 202508)
+
+    def test_one_bill_per_room_and_month(self):
+        Bill.objects.create(
+            room=self.room, bill_month=timezone.make_aware(datetime(2025, 7, 1))
+        )
+        with self.assertRaises(IntegrityError):
+            Bill.objects.create(
+                room=self.room, bill_month=timezone.make_aware(datetime(2025, 7, 20))
+            )
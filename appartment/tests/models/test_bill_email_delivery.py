@@ -0,0 +1,35 @@
+from django.test import TestCase
+from django.utils import timezone
+from ...models import Bill, BillEmailDelivery, Role, Room, User
+from ...constants import UserRole
+
+
+class BillEmailDeliveryModelTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(room_id="P101")
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        self.user = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="res01", role=role
+        )
+        self.bill = Bill.objects.create(
+            room=self.room, bill_month=timezone.now(), total_amount=100000
+        )
+        self.delivery = BillEmailDelivery.objects.create(
+            bill=self.bill,
+            user=self.user,
+            email=self.user.email,
+            status=BillEmailDelivery.DeliveryStatus.SENT,
+            attempts=1,
+        )
+
+    def test_delivery_creation(self):
+        """Kiểm tra tạo BillEmailDelivery thành công"""
+        self.assertEqual(self.delivery.error_message, "")
+        self.assertIsNotNone(self.delivery.created_at)
+        self.assertEqual(list(self.bill.email_deliveries.all()), [self.delivery])
+
+    def test_str(self):
+        """Kiểm tra phương thức __str__"""
+        self.assertEqual(
+            str(self.delivery), f"Bill {self.bill.pk} -> res@example.com (SENT)"
+        )
@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.test import TestCase
+from django.db import IntegrityError
+from ...models import BillingRun, BillingRunItem, Room
+from ...constants import RoomStatus
+
+
+class BillingRunModelTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            room_id="P101", status=RoomStatus.OCCUPIED.value, max_occupants=2
+        )
+        self.run = BillingRun.objects.create(bill_month=date(2025, 8, 1))
+        self.item = BillingRunItem.objects.create(
+            run=self.run,
+            room=self.room,
+            status=BillingRunItem.ItemStatus.SUCCESS,
+            input_checksum="a" * 64,
+        )
+
+    def test_billing_run_defaults(self):
+        """Kiểm tra giá trị mặc định của BillingRun"""
+        self.assertEqual(self.run.status, BillingRun.RunStatus.RUNNING)
+        self.assertIsNotNone(self.run.started_at)
+        self.assertIsNone(self.run.finished_at)
+
+    def test_str(self):
+        """Kiểm tra phương thức __str__"""
+        self.assertEqual(
+            str(self.run), f"Billing run #{self.run.pk} - 2025-08 (RUNNING)"
+        )
+        self.assertEqual(str(self.item), f"Run #{self.run.pk} - Room P101 (SUCCESS)")
+
+    def test_unique_together(self):
+        """Kiểm tra mỗi phòng chỉ có một kết quả trong một lần chạy"""
+        with self.assertRaises(IntegrityError):
+            BillingRunItem.objects.create(
+                run=self.run,
+                room=self.room,
+                status=BillingRunItem.ItemStatus.FAILED,
+            )
+
+    def test_cascade_delete_run(self):
+        """Kiểm tra CASCADE khi xóa BillingRun"""
+        self.run.delete()
+        self.assertFalse(BillingRunItem.objects.exists())
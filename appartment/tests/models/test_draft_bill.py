@@ -54,3 +54,8 @@ class DraftBillModelTest(TestCase):
                 draft_bill_id=self.draft_bill.draft_bill_id
             ).exists()
         )
+
+    def test_period_is_filled_from_bill_month(self):
+        """period (YYYYMM) được điền từ bill_month khi lưu"""
+        month = self.draft_bill.bill_month
+        self.assertEqual(self.draft_bill.period, month.year * 100 + month.month)
@@ -35,3 +35,25 @@ class MonthlyMeterReadingModelTest(TestCase):
         """Kiểm tra ràng buộc RESTRICT khi xóa Room"""
         with self.assertRaises(IntegrityError):
             self.room.delete()
+
+    def test_for_month_matches_whole_month(self):
+        """for_month lọc theo khoảng tháng thay vì service_month__date"""
+        month = timezone.localtime(self.meter_reading.service_month).date()
+        self.assertQuerySetEqual(
+            MonthlyMeterReading.objects.for_month(month.replace(day=1)),
+            [self.meter_reading],
+        )
+        self.assertFalse(
+            MonthlyMeterReading.objects.for_month(
+                month.replace(day=1) - timezone.timedelta(days=1)
+            ).exists()
+        )
+
+    def test_one_reading_per_room_and_month(self):
+        """period được điền khi lưu và là khóa duy nhất cùng room"""
+        month = timezone.localtime(self.meter_reading.service_month)
+        self.assertEqual(self.meter_reading.period, month.year * 100 + month.month)
+        with self.assertRaises(IntegrityError):
+            MonthlyMeterReading.objects.create(
+                room=self.room, service_month=month.replace(day=1, hour=0)
+            )
@@ -0,0 +1,39 @@
+from django.db import IntegrityError
+from django.test import TestCase
+from ...models import Notification, NotificationRecipient, Role, User
+from ...constants import NotificationStatus, UserRole
+
+
+class NotificationRecipientModelTest(TestCase):
+    def setUp(self):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        self.sender = User.objects.create_user(
+            email="sender@example.com", password="pw", user_id="SEN01", role=role
+        )
+        self.user = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES01", role=role
+        )
+        self.notification = Notification.objects.create(
+            sender=self.sender, title="Tiêu đề", message="Nội dung", is_broadcast=True
+        )
+        self.recipient = NotificationRecipient.objects.create(
+            notification=self.notification, user=self.user
+        )
+
+    def test_recipient_creation(self):
+        """Kiểm tra tạo NotificationRecipient với trạng thái mặc định"""
+        self.assertEqual(self.recipient.status, NotificationStatus.UNREAD.value)
+        self.assertEqual(list(self.notification.recipients.all()), [self.recipient])
+
+    def test_unique_per_notification_and_user(self):
+        """Mỗi người nhận chỉ có một dòng cho một thông báo"""
+        with self.assertRaises(IntegrityError):
+            NotificationRecipient.objects.create(
+                notification=self.notification, user=self.user
+            )
+
+    def test_str(self):
+        """Kiểm tra phương thức __str__"""
+        self.assertEqual(
+            str(self.recipient), f"{self.notification.pk} -> RES01 (unread)"
+        )
@@ -0,0 +1,98 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ...models import Bill, BillEmailDelivery, Role, Room, RoomResident, User
+from ...constants import UserRole
+from ...tasks.send_bills import send_monthly_bills
+
+
+class SendMonthlyBillsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2025, 8, 25)
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        bill_month = timezone.make_aware(datetime(2025, 8, 1))
+        for index in range(3):
+            room = Room.objects.create(room_id=f"P10{index}")
+            Bill.objects.create(
+                room=room,
+                bill_month=bill_month,
+                electricity_amount=100000,
+                water_amount=50000,
+                additional_service_amount=0,
+                total_amount=150000,
+            )
+            for number in range(2):
+                user = User.objects.create_user(
+                    email=f"res{index}{number}@example.com",
+                    password="pw",
+                    user_id=f"res{index}{number}",
+                    full_name=f"Cư dân {index}{number}",
+                    role=role,
+                )
+                RoomResident.objects.create(room=room, user=user)
+        # Cư dân đã chuyển đi không nhận hóa đơn
+        RoomResident.objects.filter(user__user_id="res01").update(
+            move_out_date=timezone.now()
+        )
+
+    def test_skips_days_outside_send_window(self):
+        self.assertIsNone(send_monthly_bills(today=date(2025, 8, 10)))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_sends_one_email_per_active_resident(self):
+        summary = send_monthly_bills(today=self.today)
+
+        self.assertEqual(summary["sent"], 5)
+        self.assertEqual(summary["failed"], 0)
+        recipients = sorted(message.to[0] for message in mail.outbox)
+        self.assertNotIn("res01@example.com", recipients)
+        self.assertEqual(len(recipients), 5)
+        self.assertIn("Phòng P100", mail.outbox[0].subject)
+        self.assertIn("Cư dân 00", mail.outbox[0].alternatives[0][0])
+
+    def test_single_worker_mode_records_outcome_per_recipient(self):
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=ConnectionError("SMTP down"),
+        ):
+            with self.assertLogs("appartment.utils.email_utils", "ERROR"):
+                summary = send_monthly_bills(today=self.today, workers=1)
+
+        self.assertEqual(summary["failed"], 5)
+        deliveries = BillEmailDelivery.objects.all()
+        self.assertEqual(len(deliveries), 5)
+        self.assertTrue(
+            all(
+                d.status == BillEmailDelivery.DeliveryStatus.FAILED
+                and d.error_message == "SMTP down"
+                for d in deliveries
+            )
+        )
+
+    @override_settings(BILL_EMAIL_BATCH_SIZE=2)
+    def test_query_count_does_not_depend_on_bills(self):
+        # hóa đơn + phòng (1), cư dân + user (1), lưu kết quả gửi (1)
+        with self.assertNumQueries(3):
+            summary = send_monthly_bills(today=self.today)
+        self.assertEqual(summary["sent"], 5)
+
+    @override_settings(BILL_EMAIL_RATE_LIMIT=0)
+    def test_concurrent_mode_records_outcome_per_recipient(self):
+        summary = send_monthly_bills(today=self.today, workers=3)
+
+        self.assertEqual(summary["sent"], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        deliveries = BillEmailDelivery.objects.order_by("email")
+        self.assertEqual(
+            [(d.email, d.status, d.attempts) for d in deliveries],
+            [
+                (email, BillEmailDelivery.DeliveryStatus.SENT, 1)
+                for email in sorted(message.to[0] for message in mail.outbox)
+            ],
+        )
+        self.assertEqual(deliveries[0].bill.room_id, "P100")
@@ -0,0 +1,287 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ...models import (
+    AdditionalService,
+    Bill,
+    BillAdditionalService,
+    DraftBill,
+    MonthlyMeterReading,
+    RentalPrice,
+    Room,
+)
+from ...constants import BillingStatus, PaymentStatus
+from ...utils.billing_utils import (
+    MonthBillingSnapshot,
+    annotate_billing_status,
+    generate_final_bills,
+)
+from ...utils.service_utils import service_catalog
+
+
+class MonthBillingSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = date(2025, 8, 1)
+        cls.room_new = Room.objects.create(room_id="P100", description="Phòng 100")
+        cls.room_progress = Room.objects.create(room_id="P101", description="Phòng 101")
+        cls.room_pending = Room.objects.create(room_id="P102", description="Phòng 102")
+        cls.room_ready = Room.objects.create(room_id="P103", description="Phòng 103")
+        cls.room_final = Room.objects.create(room_id="P104", description="Phòng 104")
+
+        cls.internet = AdditionalService.objects.create(
+            name="Internet", unit_price=250000, type="per_room"
+        )
+
+        DraftBill.objects.create(
+            room=cls.room_progress,
+            bill_month=cls.month,
+            draft_type=DraftBill.DraftType.ELECTRIC_WATER,
+            status=DraftBill.DraftStatus.SENT,
+            total_amount=1000,
+        )
+        for room, status in (
+            (cls.room_pending, DraftBill.DraftStatus.SENT),
+            (cls.room_ready, DraftBill.DraftStatus.CONFIRMED),
+        ):
+            DraftBill.objects.create(
+                room=room,
+                bill_month=cls.month,
+                draft_type=DraftBill.DraftType.ELECTRIC_WATER,
+                status=DraftBill.DraftStatus.CONFIRMED,
+                total_amount=1000,
+            )
+            DraftBill.objects.create(
+                room=room,
+                bill_month=cls.month,
+                draft_type=DraftBill.DraftType.SERVICES,
+                status=status,
+                total_amount=500000,
+                details={
+                    "services": [
+                        {"service_id": cls.internet.pk, "cost": 250000},
+                        {"service_id": cls.internet.pk, "cost": 250000},
+                    ]
+                },
+            )
+        Bill.objects.create(
+            room=cls.room_final, bill_month=cls.month, total_amount=1000
+        )
+        MonthlyMeterReading.objects.create(
+            room=cls.room_ready,
+            service_month=date(2025, 7, 1),
+            electricity_index=100,
+            water_index=10,
+        )
+
+    def setUp(self):
+        service_catalog.invalidate()
+
+    def test_billing_status_for_each_stage(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        self.assertEqual(
+            snapshot.get_billing_status("P100"), BillingStatus.NOT_STARTED.value
+        )
+        self.assertEqual(
+            snapshot.get_billing_status("P101"), BillingStatus.IN_PROGRESS.value
+        )
+        self.assertEqual(
+            snapshot.get_billing_status("P102"),
+            BillingStatus.PENDING_CONFIRMATION.value,
+        )
+        self.assertEqual(
+            snapshot.get_billing_status("P103"), BillingStatus.READY_TO_FINALIZE.value
+        )
+        self.assertEqual(
+            snapshot.get_billing_status("P104"), BillingStatus.FINALIZED.value
+        )
+
+    def test_confirmed_room_ids(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        self.assertEqual(snapshot.confirmed_room_ids(), ["P103"])
+
+    def test_query_count_does_not_depend_on_rooms(self):
+        # 4 query + phiên bản và nội dung danh mục dịch vụ
+        with self.assertNumQueries(6):
+            snapshot = MonthBillingSnapshot(self.month)
+        # Danh mục dịch vụ đã được cache, snapshot sau chỉ cần 4 query
+        with self.assertNumQueries(4):
+            snapshot = MonthBillingSnapshot(self.month)
+        rooms = list(Room.objects.prefetch_related("residents__user"))
+        with self.assertNumQueries(0):
+            rows = snapshot.build_workspace_data(rooms)
+        self.assertEqual(len(rows), 5)
+
+    def test_modal_data_contains_readings_and_services(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        modal_data = snapshot.build_modal_data(self.room_ready)
+        self.assertTrue(modal_data["is_ready_to_finalize"])
+        self.assertEqual(modal_data["prev_reading_index"], 100.0)
+        self.assertEqual(modal_data["current_reading_electricity"], "")
+        self.assertEqual(
+            modal_data["subscribed_services"],
+            [
+                {
+                    "service_id": self.internet.pk,
+                    "name": "Internet",
+                    "type": "per_room",
+                    "quantity": 2,
+                    "total_cost": 500000.0,
+                }
+            ],
+        )
+
+    def test_build_workspace_data_keeps_room_order(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        rooms = [
+            self.room_new,
+            self.room_progress,
+            self.room_pending,
+            self.room_ready,
+            self.room_final,
+        ]
+        rows = snapshot.build_workspace_data(rooms)
+        self.assertEqual(
+            [(r["room"].pk, r["billing_status"]) for r in rows],
+            [(room.pk, snapshot.get_billing_status(room.pk)) for room in rooms],
+        )
+
+    def test_room_ids_limit_snapshot_scope(self):
+        snapshot = MonthBillingSnapshot(self.month, room_ids=["P101"])
+        self.assertEqual(list(snapshot.drafts), [("P101", "ELECTRIC_WATER")])
+        self.assertEqual(snapshot.final_bills, {})
+
+    def test_annotate_billing_status_matches_snapshot(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        rooms = annotate_billing_status(Room.objects.order_by("pk"), self.month)
+        self.assertEqual(
+            {room.pk: room.billing_status for room in rooms},
+            {
+                room_id: snapshot.get_billing_status(room_id)
+                for room_id in ("P100", "P101", "P102", "P103", "P104")
+            },
+        )
+
+    def test_annotate_billing_status_filters_in_sql(self):
+        rooms = annotate_billing_status(Room.objects.all(), self.month).filter(
+            billing_status=BillingStatus.PENDING_CONFIRMATION.value
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual([room.pk for room in rooms], ["P102"])
+
+
+class GenerateFinalBillsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = date(2025, 8, 1)
+        cls.internet = AdditionalService.objects.create(
+            name="Internet", unit_price=250000, type="per_room"
+        )
+        cls.rooms = []
+        for index in range(3):
+            room = Room.objects.create(
+                room_id=f"P20{index}", description=f"Phòng 20{index}"
+            )
+            cls.rooms.append(room)
+            DraftBill.objects.create(
+                room=room,
+                bill_month=cls.month,
+                draft_type=DraftBill.DraftType.ELECTRIC_WATER,
+                status=DraftBill.DraftStatus.CONFIRMED,
+                total_amount=300000,
+                details={"electric_cost": 200000, "water_cost": 100000},
+            )
+            DraftBill.objects.create(
+                room=room,
+                bill_month=cls.month,
+                draft_type=DraftBill.DraftType.SERVICES,
+                status=DraftBill.DraftStatus.CONFIRMED,
+                total_amount=250000,
+                details={"services": [{"service_id": cls.internet.pk}]},
+            )
+        # Phòng cuối cùng không có giá thuê nên sẽ bị bỏ qua
+        for room in cls.rooms[:2]:
+            RentalPrice.objects.create(
+                room=room, price=3000000, effective_date=date(2025, 1, 1)
+            )
+            RentalPrice.objects.create(
+                room=room, price=4000000, effective_date=date(2025, 6, 1)
+            )
+        RentalPrice.objects.create(
+            room=cls.rooms[0], price=9000000, effective_date=date(2025, 9, 1)
+        )
+        cls.room_ids = [room.pk for room in cls.rooms]
+
+    def setUp(self):
+        service_catalog.invalidate()
+
+    def test_creates_bills_with_latest_price_and_shared_cost(self):
+        result = generate_final_bills(
+            self.month, self.room_ids, shared_cost_per_room=Decimal("1000") / 3
+        )
+        self.assertEqual(result["created"], ["P200", "P201"])
+        self.assertEqual(result["skipped"], ["P202"])
+
+        bill = Bill.objects.get(room_id="P200")
+        self.assertEqual(bill.total_amount, Decimal("4550333.33"))
+        self.assertEqual(bill.electricity_amount, Decimal("200000"))
+        self.assertEqual(bill.status, PaymentStatus.UNPAID.value)
+        self.assertEqual(
+            list(
+                bill.billadditionalservice_set.values_list(
+                    "additional_service_id", flat=True
+                )
+            ),
+            [self.internet.pk],
+        )
+
+    def test_rerun_updates_bills_and_replaces_service_lines(self):
+        generate_final_bills(self.month, self.room_ids)
+        DraftBill.objects.filter(
+            room_id="P200", draft_type=DraftBill.DraftType.SERVICES
+        ).update(
+            total_amount=500000,
+            details={
+                "services": [
+                    {"service_id": self.internet.pk},
+                    {"service_id": self.internet.pk},
+                ]
+            },
+        )
+
+        result = generate_final_bills(self.month, self.room_ids)
+
+        self.assertEqual(result["updated"], ["P200", "P201"])
+        self.assertEqual(Bill.objects.count(), 2)
+        bill = Bill.objects.get(room_id="P200")
+        self.assertEqual(bill.total_amount, Decimal("4800000"))
+        self.assertEqual(bill.billadditionalservice_set.count(), 2)
+        self.assertEqual(BillAdditionalService.objects.count(), 3)
+
+    def test_bill_created_after_snapshot_is_merged(self):
+        # Lần tạo khác đã ghi hóa đơn sau khi snapshot này được tải
+        snapshot = MonthBillingSnapshot(self.month)
+        generate_final_bills(self.month, ["P200"])
+        first = Bill.objects.get(room_id="P200")
+
+        result = generate_final_bills(self.month, self.room_ids, snapshot=snapshot)
+
+        self.assertEqual(result["created"], ["P200", "P201"])
+        self.assertEqual(Bill.objects.count(), 2)
+        self.assertEqual(Bill.objects.get(room_id="P200").pk, first.pk)
+        # Dòng dịch vụ của hóa đơn đã gộp được thay thế, không nhân đôi
+        self.assertEqual(first.billadditionalservice_set.count(), 1)
+
+    def test_query_count_does_not_depend_on_rooms(self):
+        snapshot = MonthBillingSnapshot(self.month)
+        # giá thuê + savepoint + thêm HĐ + xóa + thêm dịch vụ
+        # + gộp và ghi số liệu tháng + cư dân + thay email cũ + release
+        with self.assertNumQueries(10):
+            generate_final_bills(self.month, self.room_ids, snapshot=snapshot)
+
+        snapshot = MonthBillingSnapshot(self.month)
+        # Lần chạy lại: cập nhật HĐ đã có bằng cùng một câu upsert
+        with self.assertNumQueries(10):
+            generate_final_bills(self.month, self.room_ids, snapshot=snapshot)
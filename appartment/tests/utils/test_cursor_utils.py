@@ -0,0 +1,103 @@
+import base64
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import UserRole
+from ...models import Notification, Role, User
+from ...utils.cursor_utils import decode_cursor, encode_cursor, paginate_by_cursor
+
+
+class PaginateByCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(role_id=2, role_name=UserRole.APARTMENT_MANAGER.value)
+        cls.sender = User.objects.create_user(
+            email="manager@example.com", password="pw", user_id="MAN001", role=role
+        )
+        Notification.objects.bulk_create(
+            [
+                Notification(sender=cls.sender, title=f"N{i}", message="m")
+                for i in range(25)
+            ]
+        )
+        # Nhóm 3 thông báo cùng created_at để kiểm tra phân định bằng pk
+        base = timezone.now()
+        for index, notification in enumerate(Notification.objects.order_by("pk")):
+            Notification.objects.filter(pk=notification.pk).update(
+                created_at=base - timedelta(minutes=index // 3)
+            )
+        cls.expected = list(
+            Notification.objects.order_by("-created_at", "-pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+    def _walk_forward(self, page_size):
+        pages = [paginate_by_cursor(Notification.objects.all(), None, page_size)]
+        while pages[-1].has_next():
+            pages.append(
+                paginate_by_cursor(
+                    Notification.objects.all(), pages[-1].next_cursor, page_size
+                )
+            )
+        return pages
+
+    def test_forward_walk_visits_every_row_once_in_order(self):
+        pages = self._walk_forward(10)
+        seen = [n.pk for page in pages for n in page]
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_prev_cursor_returns_previous_page(self):
+        pages = self._walk_forward(10)
+        back = paginate_by_cursor(
+            Notification.objects.all(), pages[2].prev_cursor, 10
+        )
+        self.assertEqual([n.pk for n in back], [n.pk for n in pages[1]])
+        self.assertTrue(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_ascending_order(self):
+        page = paginate_by_cursor(Notification.objects.all(), None, 5, descending=False)
+        page = paginate_by_cursor(
+            Notification.objects.all(), page.next_cursor, 5, descending=False
+        )
+        self.assertEqual([n.pk for n in page], list(reversed(self.expected))[5:10])
+
+    def test_deep_page_is_single_query(self):
+        pages = self._walk_forward(10)
+        with self.assertNumQueries(1):
+            paginate_by_cursor(Notification.objects.all(), pages[1].next_cursor, 10)
+
+    def test_approximate_total_is_capped(self):
+        page = paginate_by_cursor(Notification.objects.all(), None, 10, count_cap=20)
+        self.assertEqual(page.approx_total, 20)
+        self.assertTrue(page.total_is_capped)
+
+        page = paginate_by_cursor(Notification.objects.all(), None, 10, count_cap=100)
+        self.assertEqual(page.approx_total, 25)
+        self.assertFalse(page.total_is_capped)
+
+    def test_invalid_cursor_raises_value_error(self):
+        for token in ["not-a-token", encode_cursor("sideways", [1, 2])]:
+            with self.assertRaises(ValueError):
+                paginate_by_cursor(Notification.objects.all(), token, 10)
+
+    def test_malformed_payload_raises_value_error(self):
+        tokens = [
+            base64.urlsafe_b64encode(b"5").decode(),
+            encode_cursor("next", 5),
+            encode_cursor("next", None),
+        ]
+        for token in tokens:
+            with self.assertRaisesMessage(ValueError, "Invalid cursor"):
+                decode_cursor(token)
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor("next", ["2025-01-01 00:00:00+00:00", 5])
+        self.assertEqual(
+            decode_cursor(token), ("next", ["2025-01-01 00:00:00+00:00", 5])
+        )
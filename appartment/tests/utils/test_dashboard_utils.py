@@ -0,0 +1,130 @@
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import PaymentStatus, RoomStatus, UserRole
+from ...models import Bill, Role, Room, RoomResident, User
+from ...utils.dashboard_utils import (
+    get_cached_manager_dashboard_metrics,
+    get_manager_dashboard_metrics,
+    manager_dashboard_cache_key,
+)
+
+
+def aware(year, month, day, hour=0):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class ManagerDashboardMetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        user = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES001", role=role
+        )
+        cls.room = Room.objects.create(room_id="P101", status=RoomStatus.OCCUPIED.value)
+        cls.other_room = Room.objects.create(
+            room_id="P102", status=RoomStatus.AVAILABLE.value
+        )
+        RoomResident.objects.create(room=cls.room, user=user)
+
+        def bill(month_start, amount, status, due=None, room=None):
+            return Bill.objects.create(
+                room=room or cls.room,
+                bill_month=month_start,
+                total_amount=amount,
+                status=status,
+                due_date=due,
+            )
+
+        # Tháng 7/2025: hai hóa đơn, một đã thanh toán
+        bill(aware(2025, 7, 1), 100000, PaymentStatus.PAID.value)
+        cls.overdue = bill(
+            aware(2025, 7, 1),
+            200000,
+            PaymentStatus.UNPAID.value,
+            aware(2025, 8, 10),
+            room=cls.other_room,
+        )
+        # Tháng 8/2025 và một tháng nằm ngoài biểu đồ 6 tháng
+        bill(aware(2025, 8, 1), 50000, PaymentStatus.UNPAID.value)
+        bill(aware(2025, 1, 1), 999000, PaymentStatus.PAID.value)
+
+    def test_kpis_use_previous_month_before_day_25(self):
+        with self.assertNumQueries(3):
+            metrics = get_manager_dashboard_metrics(now=aware(2025, 8, 17, 12))
+
+        self.assertEqual(metrics["total_rooms"], 2)
+        self.assertEqual(metrics["total_occupied_rooms"], 1)
+        self.assertEqual(metrics["total_residents"], 1)
+        self.assertEqual(metrics["total_bill_month"], aware(2025, 7, 1))
+        self.assertEqual(metrics["total_bills"], 2)
+        self.assertEqual(metrics["total_bill_money"], 300000)
+        self.assertEqual(metrics["total_paid_count"], 1)
+        self.assertEqual(metrics["total_paid_money"], 100000)
+        self.assertEqual(list(metrics["overdue_bills"]), [self.overdue])
+
+    def test_kpis_use_current_month_from_day_25(self):
+        metrics = get_manager_dashboard_metrics(now=aware(2025, 8, 26))
+        self.assertEqual(metrics["total_bills"], 1)
+        self.assertEqual(metrics["total_bill_money"], 50000)
+        self.assertEqual(metrics["total_paid_count"], 0)
+        self.assertEqual(metrics["total_paid_money"], 0)
+
+    def test_chart_covers_last_six_months(self):
+        metrics = get_manager_dashboard_metrics(now=aware(2025, 8, 17))
+        self.assertEqual(
+            json.loads(metrics["months_labels"]),
+            ["2025-03", "2025-04", "2025-05", "2025-06", "2025-07", "2025-08"],
+        )
+        self.assertEqual(
+            json.loads(metrics["months_amounts"]),
+            [0.0, 0.0, 0.0, 0.0, 300000.0, 50000.0],
+        )
+
+
+class ManagerDashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(room_id="P101")
+        self.now = aware(2025, 8, 17, 12)
+
+    def test_repeated_loads_skip_database(self):
+        with self.assertNumQueries(4):
+            first = get_cached_manager_dashboard_metrics(now=self.now)
+        with self.assertNumQueries(0):
+            second = get_cached_manager_dashboard_metrics(now=self.now)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second["total_rooms"], 1)
+        self.assertEqual(
+            second["dashboard_cache_key"], manager_dashboard_cache_key(self.now)
+        )
+
+    def test_saves_invalidate_cached_metrics(self):
+        get_cached_manager_dashboard_metrics(now=self.now)
+        key = manager_dashboard_cache_key(self.now)
+
+        Bill.objects.create(
+            room=self.room, bill_month=aware(2025, 7, 1), total_amount=1000
+        )
+        self.assertNotEqual(manager_dashboard_cache_key(self.now), key)
+        metrics = get_cached_manager_dashboard_metrics(now=self.now)
+        self.assertEqual(metrics["total_bills"], 1)
+
+        Room.objects.create(room_id="P102")
+        metrics = get_cached_manager_dashboard_metrics(now=self.now)
+        self.assertEqual(metrics["total_rooms"], 2)
+
+    def test_key_follows_bill_day(self):
+        self.assertNotEqual(
+            manager_dashboard_cache_key(aware(2025, 8, 24)),
+            manager_dashboard_cache_key(aware(2025, 8, 25)),
+        )
+        self.assertEqual(
+            manager_dashboard_cache_key(aware(2025, 8, 25)),
+            manager_dashboard_cache_key(aware(2025, 8, 31)),
+        )
@@ -0,0 +1,220 @@
+import smtplib
+import threading
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase
+
+from ...utils.email_utils import (
+    ConcurrentEmailSender,
+    TokenBucket,
+    iter_batches,
+    send_messages_in_batches,
+    send_tagged_in_batches,
+)
+
+
+class SendMessagesInBatchesTest(TestCase):
+    def _messages(self, count):
+        return (
+            EmailMessage(f"Subject {i}", "Body", None, [f"user{i}@example.com"])
+            for i in range(count)
+        )
+
+    def test_iter_batches(self):
+        self.assertEqual(list(iter_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_sends_all_messages_over_one_connection(self):
+        connection = get_connection()
+        with mock.patch.object(
+            connection, "send_messages", wraps=connection.send_messages
+        ) as send_messages, mock.patch.object(
+            connection, "open", wraps=connection.open
+        ) as open_connection:
+            summary = send_messages_in_batches(self._messages(5), 2, connection)
+
+        self.assertEqual(summary["sent"], 5)
+        self.assertEqual(summary["failed"], 0)
+        self.assertEqual(send_messages.call_count, 3)
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failed_batch_does_not_stop_dispatch(self):
+        connection = get_connection()
+        real_send = connection.send_messages
+
+        def flaky_send(batch):
+            if batch[0].subject == "Subject 0":
+                raise ConnectionError("SMTP down")
+            return real_send(batch)
+
+        with mock.patch.object(connection, "send_messages", side_effect=flaky_send):
+            with self.assertLogs("appartment.utils.email_utils", "ERROR"):
+                summary = send_messages_in_batches(self._messages(5), 2, connection)
+
+        self.assertEqual(summary["sent"], 3)
+        self.assertEqual(summary["failed"], 2)
+
+    def test_tagged_batches_report_outcome_per_message(self):
+        connection = get_connection()
+        real_send = connection.send_messages
+
+        def flaky_send(batch):
+            if batch[0].subject == "Subject 2":
+                raise ConnectionError("SMTP down")
+            return real_send(batch)
+
+        tagged = ((index, message) for index, message in enumerate(self._messages(5)))
+        with mock.patch.object(connection, "send_messages", side_effect=flaky_send):
+            with self.assertLogs("appartment.utils.email_utils", "ERROR"):
+                outcomes, summary = send_tagged_in_batches(tagged, 2, connection)
+
+        self.assertEqual(
+            [(o["tag"], o["sent"], o["error"]) for o in outcomes],
+            [
+                (0, True, ""),
+                (1, True, ""),
+                (2, False, "SMTP down"),
+                (3, False, "SMTP down"),
+                (4, True, ""),
+            ],
+        )
+        self.assertEqual(summary["sent"], 3)
+        self.assertEqual(summary["failed"], 2)
+
+
+class TokenBucketTest(TestCase):
+    def test_waits_when_bucket_is_empty(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            bucket.acquire()
+
+        # 2 token có sẵn, 2 token sau phải chờ 0.5 giây mỗi token
+        self.assertEqual(sleeps, [0.5, 0.5])
+        self.assertEqual(now[0], 1.0)
+
+
+class FlakyConnection:
+    """
+    Kết nối giả: lần gửi đầu tiên tới địa chỉ "flaky" bị ngắt kết nối.
+    """
+
+    lock = threading.Lock()
+    failed_once = set()
+
+    def __init__(self, sent):
+        self.sent = sent
+        self.opened = 0
+        self.closed = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        self.closed += 1
+
+    def send_messages(self, messages):
+        recipient = messages[0].to[0]
+        with self.lock:
+            if recipient.startswith("flaky") and recipient not in self.failed_once:
+                self.failed_once.add(recipient)
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            if recipient.startswith("bad"):
+                raise smtplib.SMTPRecipientsRefused({recipient: (550, b"No such user")})
+            self.sent.append(recipient)
+        return 1
+
+
+class ConcurrentEmailSenderTest(TestCase):
+    def setUp(self):
+        FlakyConnection.failed_once = set()
+        self.sent = []
+        self.connections = []
+
+    def _connection_factory(self):
+        connection = FlakyConnection(self.sent)
+        self.connections.append(connection)
+        return connection
+
+    def _tagged(self, recipients):
+        return (
+            (recipient, EmailMessage("Subject", "Body", None, [recipient]))
+            for recipient in recipients
+        )
+
+    def test_each_worker_uses_its_own_connection(self):
+        sender = ConcurrentEmailSender(3, connection_factory=self._connection_factory)
+        recipients = [f"user{i}@example.com" for i in range(10)]
+
+        outcomes, summary = sender.send(self._tagged(recipients))
+
+        self.assertEqual(len(self.connections), 3)
+        self.assertTrue(all(c.closed == 1 for c in self.connections))
+        self.assertEqual(sorted(self.sent), sorted(recipients))
+        self.assertEqual(summary["sent"], 10)
+        self.assertEqual(sorted(o["tag"] for o in outcomes), sorted(recipients))
+
+    def test_retries_transient_errors_with_backoff(self):
+        sleeps = []
+        sender = ConcurrentEmailSender(
+            2,
+            max_retries=2,
+            backoff=0.5,
+            connection_factory=self._connection_factory,
+            sleep=sleeps.append,
+        )
+
+        outcomes, summary = sender.send(
+            self._tagged(["flaky@example.com", "bad@example.com"])
+        )
+
+        outcomes = {o["tag"]: o for o in outcomes}
+        self.assertTrue(outcomes["flaky@example.com"]["sent"])
+        self.assertEqual(outcomes["flaky@example.com"]["attempts"], 2)
+        # Lỗi vĩnh viễn (5xx) không được gửi lại
+        self.assertFalse(outcomes["bad@example.com"]["sent"])
+        self.assertEqual(outcomes["bad@example.com"]["attempts"], 1)
+        self.assertEqual(sleeps, [0.5])
+        self.assertEqual(summary["sent"], 1)
+        self.assertEqual(summary["failed"], 1)
+
+    def test_unexpected_worker_error_does_not_block_sender(self):
+        sender = ConcurrentEmailSender(1, connection_factory=self._connection_factory)
+        recipients = [f"user{i}@example.com" for i in range(10)]
+        real_deliver = sender._deliver
+
+        def deliver(connection, message):
+            if message.to[0] == "user0@example.com":
+                raise ValueError("broken template")
+            return real_deliver(connection, message)
+
+        # Hàng đợi chỉ chứa 4 việc: nếu thread chết, put() sẽ treo mãi
+        with mock.patch.object(sender, "_deliver", side_effect=deliver):
+            with self.assertLogs("appartment.utils.email_utils", "ERROR"):
+                outcomes, summary = sender.send(self._tagged(recipients))
+
+        self.assertEqual(summary["sent"], 9)
+        self.assertEqual(summary["failed"], 1)
+        failed = [o for o in outcomes if not o["sent"]]
+        self.assertEqual(failed[0]["tag"], "user0@example.com")
+        self.assertEqual(failed[0]["error"], "broken template")
+
+    def test_stops_feeding_when_all_workers_are_dead(self):
+        sender = ConcurrentEmailSender(1, connection_factory=self._connection_factory)
+        sender.PUT_TIMEOUT = 0.01
+        recipients = [f"user{i}@example.com" for i in range(10)]
+
+        # Lỗi không thuộc Exception vẫn làm thread dừng hẳn
+        with mock.patch.object(sender, "_deliver", side_effect=SystemExit):
+            with self.assertRaisesMessage(RuntimeError, "email sender threads"):
+                sender.send(self._tagged(recipients))
+
+        self.assertEqual(self.connections[0].closed, 1)
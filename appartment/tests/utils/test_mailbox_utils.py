@@ -0,0 +1,100 @@
+from django.db.models import Q
+from django.test import TestCase
+
+from ...constants import UserRole
+from ...models import Notification, NotificationRecipient, Role, User
+from ...utils.mailbox_utils import resident_requests, staff_mailbox
+from ...utils.notification_utils import addressed_to
+
+
+class StaffMailboxTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        resident_role = Role.objects.create(
+            role_id=1, role_name=UserRole.RESIDENT.value
+        )
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        cls.resident = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES001", role=resident_role
+        )
+        cls.manager = User.objects.create_user(
+            email="man@example.com", password="pw", user_id="MAN001", role=manager_role
+        )
+        cls.other = User.objects.create_user(
+            email="other@example.com",
+            password="pw",
+            user_id="MAN002",
+            role=manager_role,
+        )
+        for index in range(4):
+            Notification.objects.create(
+                sender=cls.resident, title=f"Yêu cầu {index}", message="m"
+            )
+            Notification.objects.create(
+                sender=cls.other, receiver=cls.manager, title=f"Tới {index}", message="m"
+            )
+            Notification.objects.create(
+                sender=cls.manager, receiver=cls.resident, title=f"Gửi {index}", message="m"
+            )
+            # Không thuộc hộp thư của manager
+            Notification.objects.create(
+                sender=cls.other, receiver=cls.resident, title=f"Khác {index}", message="m"
+            )
+        # Tự gửi cho chính mình: khớp hai nhánh nhưng chỉ hiện một lần
+        Notification.objects.create(
+            sender=cls.manager, receiver=cls.manager, title="Ghi chú", message="m"
+        )
+        broadcast = Notification.objects.create(
+            sender=cls.other, title="Hàng loạt", message="m", is_broadcast=True
+        )
+        NotificationRecipient.objects.create(notification=broadcast, user=cls.manager)
+
+        legacy = Notification.objects.filter(
+            resident_requests() | addressed_to(cls.manager) | Q(sender=cls.manager)
+        )
+        cls.expected = list(
+            legacy.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+
+    def _walk(self, mailbox, page_size, **kwargs):
+        pages = [mailbox.page(None, page_size, **kwargs)]
+        while pages[-1].has_next():
+            pages.append(mailbox.page(pages[-1].next_cursor, page_size, **kwargs))
+        return pages
+
+    def test_pages_match_single_or_query(self):
+        pages = self._walk(staff_mailbox(self.manager), 5)
+        self.assertEqual([n.pk for page in pages for n in page], self.expected)
+        self.assertEqual(len(self.expected), 14)
+
+    def test_prev_cursor_and_ascending_order(self):
+        mailbox = staff_mailbox(self.manager)
+        pages = self._walk(mailbox, 5, descending=False)
+        self.assertEqual(
+            [n.pk for page in pages for n in page], list(reversed(self.expected))
+        )
+        back = mailbox.page(pages[1].prev_cursor, 5, descending=False)
+        self.assertEqual([n.pk for n in back], [n.pk for n in pages[0]])
+
+    def test_filters_apply_to_every_branch(self):
+        mailbox = staff_mailbox(self.manager).filter(title__startswith="Tới")
+        page = mailbox.page(None, 10, count_cap=100)
+        self.assertEqual({n.title for n in page}, {f"Tới {i}" for i in range(4)})
+        self.assertEqual(page.approx_total, 4)
+        self.assertEqual(len(staff_mailbox(self.manager).none().page(None, 10)), 0)
+
+    def test_query_count_is_per_branch(self):
+        mailbox = staff_mailbox(self.manager).select_related("sender")
+        first = mailbox.page(None, 5)
+        # 4 nhánh (SQLite chạy riêng từng nhánh) + 1 truy vấn lấy dòng
+        with self.assertNumQueries(5):
+            page = mailbox.page(first.next_cursor, 5)
+            [n.sender.full_name for n in page]
+
+    def test_queryset_matches_branches(self):
+        self.assertEqual(
+            sorted(staff_mailbox(self.manager).queryset().values_list("pk", flat=True)),
+            sorted(self.expected),
+        )
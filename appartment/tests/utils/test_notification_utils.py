@@ -0,0 +1,128 @@
+from django.test import TestCase
+
+from ...constants import NotificationStatus, UserRole
+from ...models import Notification, NotificationRecipient, Outbox, Role, User
+from ...utils.notification_utils import (
+    broadcast_notification,
+    fan_out_notification,
+)
+
+
+class FanOutNotificationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(
+            role_id=3, role_name=UserRole.RESIDENT.value
+        )
+        cls.manager = User.objects.create_user(
+            email="manager@example.com",
+            password="pw",
+            user_id="MAN001",
+            role=manager_role,
+        )
+        cls.resident_ids = []
+        for index in range(5):
+            user = User.objects.create_user(
+                email=f"res{index}@example.com",
+                password="pw",
+                user_id=f"RES00{index}",
+                role=resident_role,
+            )
+            cls.resident_ids.append(user.user_id)
+
+    def test_creates_one_notification_and_email_per_receiver(self):
+        created, unknown_ids = fan_out_notification(
+            self.manager, self.resident_ids, "Tiêu đề", "Nội dung"
+        )
+
+        self.assertEqual(created, 5)
+        self.assertEqual(unknown_ids, [])
+        notifications = Notification.objects.filter(title="Tiêu đề")
+        self.assertEqual(
+            sorted(n.receiver_id for n in notifications), sorted(self.resident_ids)
+        )
+        self.assertTrue(
+            all(n.status == NotificationStatus.UNREAD.value for n in notifications)
+        )
+        self.assertEqual(Outbox.objects.count(), 5)
+
+    def test_reports_unknown_ids_once(self):
+        created, unknown_ids = fan_out_notification(
+            self.manager,
+            ["RES000", "NOPE2", "NOPE1", "RES000"],
+            "Tiêu đề",
+            "Nội dung",
+        )
+        self.assertEqual(created, 1)
+        self.assertEqual(unknown_ids, ["NOPE1", "NOPE2"])
+
+    def test_query_count_depends_on_batches_not_receivers(self):
+        # savepoint + (user, thông báo, outbox, 2 bộ đếm) x 3 lô + release
+        with self.assertNumQueries(17):
+            created, unknown_ids = fan_out_notification(
+                self.manager, self.resident_ids, "Tiêu đề", "Nội dung", batch_size=2
+            )
+        self.assertEqual(created, 5)
+
+
+class BroadcastNotificationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(
+            role_id=3, role_name=UserRole.RESIDENT.value
+        )
+        cls.manager = User.objects.create_user(
+            email="manager@example.com",
+            password="pw",
+            user_id="MAN001",
+            role=manager_role,
+        )
+        cls.resident_ids = []
+        for index in range(5):
+            user = User.objects.create_user(
+                email=f"res{index}@example.com",
+                password="pw",
+                user_id=f"RES00{index}",
+                role=resident_role,
+            )
+            cls.resident_ids.append(user.user_id)
+
+    def test_stores_body_once_with_one_recipient_row_per_user(self):
+        created, unknown_ids = broadcast_notification(
+            self.manager, self.resident_ids + ["NOPE"], "Tiêu đề", "Nội dung"
+        )
+
+        self.assertEqual(created, 5)
+        self.assertEqual(unknown_ids, ["NOPE"])
+        notification = Notification.objects.get(title="Tiêu đề")
+        self.assertTrue(notification.is_broadcast)
+        self.assertIsNone(notification.receiver)
+        self.assertEqual(
+            sorted(notification.recipients.values_list("user_id", flat=True)),
+            self.resident_ids,
+        )
+        self.assertEqual(Outbox.objects.count(), 5)
+
+    def test_query_count_depends_on_batches_not_receivers(self):
+        # savepoint + thông báo + (user, người nhận, outbox, 2 bộ đếm) x 3 lô
+        # + release
+        with self.assertNumQueries(18):
+            created, _ = broadcast_notification(
+                self.manager, self.resident_ids, "Tiêu đề", "Nội dung", batch_size=2
+            )
+        self.assertEqual(created, 5)
+
+    def test_no_known_receivers_leaves_no_body(self):
+        created, unknown_ids = broadcast_notification(
+            self.manager, ["NOPE"], "Tiêu đề", "Nội dung"
+        )
+        self.assertEqual(created, 0)
+        self.assertEqual(unknown_ids, ["NOPE"])
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationRecipient.objects.exists())
@@ -0,0 +1,252 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import UserRole
+from ...models import Role, Room, RoomMonthOccupancy, RoomResident, User
+from ...models.month_range import month_period
+from ...utils.occupancy_utils import (
+    OccupancyIndex,
+    get_month_occupancy,
+    occupied_rooms_filter,
+    refresh_room_occupancy,
+)
+
+
+def aware(year, month, day, hour=0):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class OccupancyIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        cls.users = [
+            User.objects.create_user(
+                email=f"res{i}@example.com", password="pw", user_id=f"RES{i}", role=role
+            )
+            for i in range(3)
+        ]
+        cls.room = Room.objects.create(room_id="P101")
+        cls.other_room = Room.objects.create(room_id="P102")
+
+        def stay(user, move_in, move_out=None, room=None):
+            resident = RoomResident.objects.create(
+                room=room or cls.room, user=user, move_out_date=move_out
+            )
+            # move_in_date là auto_now_add nên phải cập nhật sau khi tạo
+            RoomResident.objects.filter(pk=resident.pk).update(move_in_date=move_in)
+            return resident
+
+        # Ở từ 15/3 đến 10/5
+        cls.first = stay(cls.users[0], aware(2025, 3, 15), aware(2025, 5, 10))
+        # Vào đúng 00:00 ngày 1/5 giờ địa phương, chưa ra
+        cls.second = stay(cls.users[1], aware(2025, 5, 1))
+        # Cùng user quay lại trong tháng 5
+        cls.again = stay(cls.users[0], aware(2025, 5, 20))
+        stay(cls.users[2], aware(2025, 1, 1), room=cls.other_room)
+
+    def setUp(self):
+        self.index = OccupancyIndex.load()
+
+    def test_stays_in_month(self):
+        self.assertEqual(self.index.stays_in_month(self.room.pk, date(2025, 2, 1)), [])
+        self.assertEqual(
+            [r.pk for r in self.index.stays_in_month(self.room.pk, date(2025, 4, 1))],
+            [self.first.pk],
+        )
+        self.assertEqual(
+            [r.pk for r in self.index.stays_in_month(self.room.pk, date(2025, 5, 1))],
+            [self.first.pk, self.second.pk, self.again.pk],
+        )
+        self.assertEqual(
+            [r.pk for r in self.index.stays_in_month(self.room.pk, date(2025, 6, 1))],
+            [self.second.pk, self.again.pk],
+        )
+
+    def test_residents_in_month_keeps_one_stay_per_user(self):
+        residents = self.index.residents_in_month(self.room.pk, aware(2025, 5, 31))
+        self.assertEqual([r.pk for r in residents], [self.first.pk, self.second.pk])
+
+    def test_count_matches_stays(self):
+        for month in [date(2025, m, 1) for m in range(1, 8)]:
+            self.assertEqual(
+                self.index.count_in_month(self.room.pk, month),
+                len(self.index.stays_in_month(self.room.pk, month)),
+            )
+        self.assertEqual(self.index.count_in_month("NOPE", date(2025, 5, 1)), 0)
+
+    def test_sweep_matches_per_month_lookup(self):
+        months = [date(2025, m, 1) for m in (7, 2, 5, 4, 3, 6)]
+        swept = self.index.stays_by_month(self.room.pk, months)
+        for month in months:
+            self.assertEqual(
+                swept[month], self.index.stays_in_month(self.room.pk, month)
+            )
+
+    def test_load_window_skips_stays_outside_months(self):
+        index = OccupancyIndex.load(
+            [self.room.pk], since=date(2025, 6, 1), until=date(2025, 7, 1)
+        )
+        self.assertEqual(
+            [r.pk for r in index.stays_in_month(self.room.pk, date(2025, 4, 1))], []
+        )
+        self.assertEqual(
+            [r.pk for r in index.stays_in_month(self.room.pk, date(2025, 6, 1))],
+            [self.second.pk, self.again.pk],
+        )
+
+    def test_batch_lookup_for_rooms_and_months(self):
+        months = [date(2025, 1, 1), date(2025, 4, 1)]
+        with self.assertNumQueries(1):
+            index = OccupancyIndex.load([self.room.pk, self.other_room.pk])
+        result = index.residents_by_month([self.room.pk, self.other_room.pk], months)
+
+        self.assertEqual(result[(self.room.pk, date(2025, 1, 1))], [])
+        self.assertEqual(len(result[(self.room.pk, date(2025, 4, 1))]), 1)
+        self.assertEqual(len(result[(self.other_room.pk, date(2025, 4, 1))]), 1)
+
+    def test_from_prefetched_rooms_runs_no_queries(self):
+        rooms = list(Room.objects.prefetch_related("residents__user"))
+        with self.assertNumQueries(0):
+            index = OccupancyIndex.from_rooms(rooms)
+            residents = index.residents_in_month(self.room.pk, date(2025, 6, 1))
+            names = [resident.user.user_id for resident in residents]
+        self.assertEqual(names, ["RES1", "RES0"])
+
+
+class RoomMonthOccupancyTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        cls.users = [
+            User.objects.create_user(
+                email=f"occ{i}@example.com", password="pw", user_id=f"OCC{i}", role=role
+            )
+            for i in range(2)
+        ]
+        cls.room = Room.objects.create(room_id="P201")
+        cls.empty_room = Room.objects.create(room_id="P202")
+        for user, move_in, move_out in [
+            (cls.users[0], aware(2025, 3, 15), aware(2025, 5, 10)),
+            (cls.users[1], aware(2025, 5, 1), None),
+        ]:
+            resident = RoomResident.objects.create(
+                room=cls.room, user=user, move_out_date=move_out
+            )
+            RoomResident.objects.filter(pk=resident.pk).update(move_in_date=move_in)
+        # Bỏ các dòng signal đã ghi để mỗi test tự dựng bảng
+        RoomMonthOccupancy.objects.all().delete()
+
+    def counts(self):
+        return dict(
+            RoomMonthOccupancy.objects.filter(room=self.room).values_list(
+                "period", "resident_count"
+            )
+        )
+
+    def test_refresh_writes_every_month_from_first_stay(self):
+        refresh_room_occupancy(until=date(2025, 7, 1))
+
+        self.assertEqual(
+            self.counts(),
+            {202503: 1, 202504: 1, 202505: 2, 202506: 1, 202507: 1},
+        )
+        row = RoomMonthOccupancy.objects.get(room=self.room, period=202505)
+        self.assertEqual(row.resident_ids, ["OCC0", "OCC1"])
+        # Phòng chưa từng có người ở không có dòng nào
+        self.assertFalse(
+            RoomMonthOccupancy.objects.filter(room=self.empty_room).exists()
+        )
+
+    def test_refresh_since_keeps_older_months(self):
+        refresh_room_occupancy(until=date(2025, 7, 1))
+        RoomMonthOccupancy.objects.filter(period=202503).update(resident_count=9)
+        RoomResident.objects.filter(user=self.users[1]).update(
+            move_out_date=aware(2025, 6, 5)
+        )
+
+        refresh_room_occupancy([self.room.pk], since=aware(2025, 6, 5))
+
+        counts = self.counts()
+        self.assertEqual(counts[202503], 9)
+        self.assertEqual(counts[202506], 1)
+        # until mặc định giữ tới tháng xa nhất đã có; tháng trống vẫn có dòng
+        self.assertEqual(counts[202507], 0)
+
+    def test_get_month_occupancy_computes_missing_row_without_saving(self):
+        occupancy = get_month_occupancy(self.room.pk, date(2025, 5, 1))
+        self.assertEqual(occupancy.resident_count, 2)
+        self.assertIsNone(occupancy.pk)
+        self.assertFalse(RoomMonthOccupancy.objects.exists())
+        self.assertEqual(
+            get_month_occupancy(self.empty_room.pk, date(2025, 5, 1)).resident_count, 0
+        )
+
+        refresh_room_occupancy(until=date(2025, 5, 1))
+        RoomMonthOccupancy.objects.filter(period=202505).update(resident_count=5)
+        with self.assertNumQueries(1):
+            occupancy = get_month_occupancy(self.room.pk, date(2025, 5, 1))
+        self.assertEqual(occupancy.resident_count, 5)
+
+    def test_occupied_rooms_filter_is_read_only(self):
+        def occupied(month):
+            return list(
+                Room.objects.filter(occupied_rooms_filter(month)).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        # Tháng chưa được tính: đếm trong bộ nhớ, không ghi bảng
+        self.assertEqual(occupied(date(2025, 4, 1)), [self.room.pk])
+        self.assertEqual(occupied(date(2025, 2, 1)), [])
+        self.assertFalse(RoomMonthOccupancy.objects.exists())
+
+        refresh_room_occupancy(until=date(2025, 4, 1))
+        RoomMonthOccupancy.objects.filter(period=202504).update(resident_count=0)
+        self.assertEqual(occupied(date(2025, 4, 1)), [])
+
+    def test_saving_a_stay_refreshes_old_and_new_months(self):
+        refresh_room_occupancy(until=date(2025, 7, 1))
+        stay = RoomResident.objects.get(user=self.users[0])
+
+        # Dời ngày ra sớm hơn: tháng 4, 5 được tính lại từ ngày ra mới
+        stay.move_out_date = aware(2025, 3, 20)
+        stay.save()
+        counts = self.counts()
+        self.assertEqual(
+            [counts[period] for period in range(202503, 202508)], [1, 0, 1, 1, 1]
+        )
+
+        # Chuyển sang phòng khác: cả hai phòng được tính lại
+        stay.room = self.empty_room
+        stay.save()
+        # Phòng cũ giờ có lượt vào đầu tiên từ tháng 5, không còn dòng tháng 3
+        self.assertNotIn(202503, self.counts())
+        self.assertEqual(
+            RoomMonthOccupancy.objects.get(
+                room=self.empty_room, period=202503
+            ).resident_count,
+            1,
+        )
+
+        stay.delete()
+        self.assertFalse(
+            RoomMonthOccupancy.objects.filter(room=self.empty_room).exists()
+        )
+
+    def test_new_stay_uses_saved_move_in_date(self):
+        user = User.objects.create_user(
+            email="occ-new@example.com",
+            password="pw",
+            user_id="OCCNEW",
+            role=self.users[0].role,
+        )
+        # move_in_date là auto_now_add: giá trị truyền vào bị thay bằng hiện tại
+        stay = RoomResident.objects.create(
+            room=self.empty_room, user=user, move_in_date=aware(2020, 1, 1)
+        )
+        occupancy = RoomMonthOccupancy.objects.get(room=self.empty_room)
+        self.assertEqual(occupancy.period, month_period(stay.move_in_date))
+        self.assertEqual(occupancy.resident_ids, ["OCCNEW"])
@@ -0,0 +1,268 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ...constants import (
+    OUTBOX_CLAIM_TIMEOUT_MINUTES,
+    OUTBOX_MAX_ATTEMPTS,
+    UserRole,
+)
+from ...models import (
+    Bill,
+    BillingRun,
+    DraftBill,
+    Outbox,
+    RentalPrice,
+    Role,
+    Room,
+    RoomResident,
+    User,
+)
+from ...utils.billing_utils import generate_final_bills
+from ...utils.email_utils import ConcurrentEmailSender
+from ...utils.outbox_utils import build_outbox_email, drain_outbox, enqueue
+from ...utils.service_utils import service_catalog
+
+
+class DrainOutboxTest(TestCase):
+    def setUp(self):
+        # Dùng file-based email backend làm SMTP giả lập cục bộ
+        self.mail_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mail_dir)
+        settings_override = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend",
+            EMAIL_FILE_PATH=self.mail_dir,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _enqueue(self, count):
+        return enqueue(
+            [
+                build_outbox_email(
+                    Outbox.Kind.NOTIFICATION_EMAIL,
+                    f"Tiêu đề {i}",
+                    "Nội dung",
+                    [f"user{i}@example.com"],
+                )
+                for i in range(count)
+            ]
+        )
+
+    def _sent_files(self):
+        return "".join(path.read_text() for path in Path(self.mail_dir).iterdir())
+
+    def test_drains_pending_items_in_batches(self):
+        self._enqueue(5)
+
+        totals = drain_outbox(batch_size=2)
+
+        self.assertEqual(totals["sent"], 5)
+        self.assertEqual(totals["batches"], 3)
+        self.assertFalse(
+            Outbox.objects.exclude(status=Outbox.OutboxStatus.SENT).exists()
+        )
+        self.assertEqual(Outbox.objects.filter(sent_at__isnull=False).count(), 5)
+        sent = self._sent_files()
+        for i in range(5):
+            self.assertIn(f"user{i}@example.com", sent)
+
+    def test_max_batches_leaves_remaining_items_pending(self):
+        self._enqueue(3)
+        totals = drain_outbox(batch_size=2, max_batches=1)
+        self.assertEqual(totals["sent"], 2)
+        self.assertEqual(
+            Outbox.objects.filter(status=Outbox.OutboxStatus.PENDING).count(), 1
+        )
+
+    def test_failed_item_is_rescheduled_then_marked_failed(self):
+        (item,) = self._enqueue(1)
+        with mock.patch(
+            "django.core.mail.backends.filebased.EmailBackend.send_messages",
+            side_effect=ConnectionError("SMTP down"),
+        ):
+            totals = drain_outbox(batch_size=10)
+            item.refresh_from_db()
+            self.assertEqual(totals["failed"], 1)
+            self.assertEqual(item.status, Outbox.OutboxStatus.PENDING)
+            self.assertEqual(item.attempts, 1)
+            self.assertGreater(item.available_at, timezone.now())
+            self.assertEqual(item.last_error, "SMTP down")
+
+            # Chưa đến giờ gửi lại nên không được nhận
+            self.assertEqual(drain_outbox(batch_size=10)["claimed"], 0)
+
+            Outbox.objects.filter(pk=item.pk).update(
+                available_at=timezone.now(), attempts=OUTBOX_MAX_ATTEMPTS - 1
+            )
+            drain_outbox(batch_size=10)
+        item.refresh_from_db()
+        self.assertEqual(item.status, Outbox.OutboxStatus.FAILED)
+
+    def test_rows_are_claimed_and_committed_before_sending(self):
+        (item,) = self._enqueue(1)
+        statuses = []
+
+        def send_messages(messages):
+            # Trong lúc gửi, dòng đã được đánh dấu SENDING (transaction nhận đã commit)
+            statuses.append(Outbox.objects.get(pk=item.pk).status)
+            return len(messages)
+
+        with mock.patch(
+            "django.core.mail.backends.filebased.EmailBackend.send_messages",
+            side_effect=send_messages,
+        ):
+            drain_outbox(batch_size=10)
+
+        self.assertEqual(statuses, [Outbox.OutboxStatus.SENDING])
+        item.refresh_from_db()
+        self.assertEqual(item.status, Outbox.OutboxStatus.SENT)
+        self.assertEqual(item.attempts, 1)
+
+    def test_only_the_failed_email_is_rescheduled(self):
+        ok, bad = self._enqueue(2)
+
+        def send_messages(messages):
+            if messages[0].to == bad.payload["to"]:
+                raise ConnectionError("SMTP down")
+            return len(messages)
+
+        with mock.patch(
+            "django.core.mail.backends.filebased.EmailBackend.send_messages",
+            side_effect=send_messages,
+        ):
+            with self.assertLogs("appartment.utils.email_utils", "ERROR"):
+                totals = drain_outbox(batch_size=10)
+
+        self.assertEqual((totals["sent"], totals["failed"]), (1, 1))
+        ok.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(ok.status, Outbox.OutboxStatus.SENT)
+        self.assertEqual(bad.status, Outbox.OutboxStatus.PENDING)
+
+    @override_settings(
+        BILL_EMAIL_WORKERS=3, BILL_EMAIL_RATE_LIMIT=0, BILL_EMAIL_MAX_RETRIES=0
+    )
+    def test_concurrent_sender_drains_outbox(self):
+        self._enqueue(5)
+
+        with mock.patch(
+            "appartment.utils.email_utils.ConcurrentEmailSender.send",
+            autospec=True,
+            side_effect=ConcurrentEmailSender.send,
+        ) as concurrent_send:
+            totals = drain_outbox(batch_size=10)
+
+        concurrent_send.assert_called_once()
+        self.assertEqual(totals["sent"], 5)
+        self.assertFalse(
+            Outbox.objects.exclude(status=Outbox.OutboxStatus.SENT).exists()
+        )
+        sent = self._sent_files()
+        for i in range(5):
+            self.assertIn(f"user{i}@example.com", sent)
+
+    def test_stale_claims_are_reclaimed(self):
+        fresh, stale = self._enqueue(2)
+        now = timezone.now()
+        Outbox.objects.filter(pk=fresh.pk).update(
+            status=Outbox.OutboxStatus.SENDING, claimed_at=now
+        )
+        Outbox.objects.filter(pk=stale.pk).update(
+            status=Outbox.OutboxStatus.SENDING,
+            claimed_at=now - timedelta(minutes=OUTBOX_CLAIM_TIMEOUT_MINUTES + 1),
+        )
+
+        totals = drain_outbox(batch_size=10)
+
+        self.assertEqual(totals["sent"], 1)
+        fresh.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(fresh.status, Outbox.OutboxStatus.SENDING)
+        self.assertEqual(stale.status, Outbox.OutboxStatus.SENT)
+
+
+class EnqueueBillEmailsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.month = date(2025, 8, 1)
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        cls.room = Room.objects.create(room_id="P101", description="Phòng 101")
+        for draft_type in DraftBill.DraftType.values:
+            DraftBill.objects.create(
+                room=cls.room,
+                bill_month=cls.month,
+                draft_type=draft_type,
+                status=DraftBill.DraftStatus.CONFIRMED,
+                total_amount=1000,
+                details={},
+            )
+        RentalPrice.objects.create(
+            room=cls.room, price=3000000, effective_date=date(2025, 1, 1)
+        )
+        for number in range(2):
+            user = User.objects.create_user(
+                email=f"res{number}@example.com",
+                password="pw",
+                user_id=f"res{number}",
+                role=role,
+            )
+            RoomResident.objects.create(room=cls.room, user=user)
+
+    def setUp(self):
+        service_catalog.invalidate()
+
+    def test_bill_generation_enqueues_email_per_active_resident(self):
+        generate_final_bills(self.month, ["P101"])
+
+        items = Outbox.objects.order_by("outbox_id")
+        self.assertEqual(
+            [item.payload["to"] for item in items],
+            [["res0@example.com"], ["res1@example.com"]],
+        )
+        self.assertTrue(all(i.kind == Outbox.Kind.BILL_EMAIL for i in items))
+        self.assertIn("8/2025 - Phòng P101", items[0].payload["subject"])
+
+    def test_regenerating_unchanged_bills_does_not_enqueue_again(self):
+        generate_final_bills(self.month, ["P101"])
+        generate_final_bills(self.month, ["P101"])
+
+        self.assertEqual(Outbox.objects.count(), 2)
+
+    def test_corrected_bill_replaces_pending_emails(self):
+        generate_final_bills(self.month, ["P101"])
+        sent = Outbox.objects.order_by("outbox_id").first()
+        Outbox.objects.filter(pk=sent.pk).update(status=Outbox.OutboxStatus.SENT)
+
+        DraftBill.objects.update(total_amount=2000)
+        generate_final_bills(self.month, ["P101"])
+
+        total = Bill.objects.get().total_amount
+        pending = Outbox.objects.filter(status=Outbox.OutboxStatus.PENDING)
+        self.assertEqual(
+            sorted(item.payload["to"][0] for item in pending),
+            ["res0@example.com", "res1@example.com"],
+        )
+        self.assertTrue(
+            all(f"Tổng: {total}" in item.payload["body"] for item in pending)
+        )
+        # Email đã gửi được giữ lại, email cũ chưa gửi bị thay thế
+        self.assertTrue(Outbox.objects.filter(pk=sent.pk).exists())
+        self.assertEqual(Outbox.objects.count(), 3)
+
+    def test_emails_are_rolled_back_with_the_bills(self):
+        run = BillingRun.objects.create(bill_month=self.month)
+        # Lỗi xảy ra sau khi email đã được xếp hàng trong transaction
+        with mock.patch(
+            "appartment.utils.billing_utils._record_run_items",
+            side_effect=RuntimeError("boom"),
+        ):
+            with self.assertRaises(RuntimeError):
+                generate_final_bills(self.month, ["P101"], run=run)
+        self.assertFalse(Outbox.objects.exists())
+        self.assertFalse(Bill.objects.exists())
@@ -0,0 +1,110 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import NotificationStatus, PaymentStatus, UserRole
+from ...models import Bill, Notification, Role, Room, RoomResident, User
+from ...utils.reminder_utils import send_payment_reminders
+from ...utils.unread_counter_utils import get_unread_count
+
+
+def aware(year, month, day):
+    return timezone.make_aware(datetime(year, month, day))
+
+
+class SendPaymentRemindersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(
+            role_id=3, role_name=UserRole.RESIDENT.value
+        )
+        cls.manager = User.objects.create_user(
+            email="man@example.com", password="pw", user_id="MAN001", role=manager_role
+        )
+        cls.bills = []
+        cls.residents = []
+        for index in range(3):
+            room = Room.objects.create(room_id=f"P10{index}", description=f"P10{index}")
+            user = User.objects.create_user(
+                email=f"res{index}@example.com",
+                password="pw",
+                user_id=f"RES00{index}",
+                full_name=f"Cư dân {index}",
+                role=resident_role,
+            )
+            RoomResident.objects.create(room=room, user=user)
+            cls.residents.append(user)
+            cls.bills.append(
+                Bill.objects.create(
+                    room=room,
+                    bill_month=aware(2025, 6, 1),
+                    due_date=aware(2025, 7, 15),
+                    status=PaymentStatus.UNPAID.value,
+                    total_amount=1500000,
+                )
+            )
+        # Cư dân đã chuyển đi không nhận nhắc nhở
+        moved_out = User.objects.create_user(
+            email="old@example.com", password="pw", user_id="OLD001", role=resident_role
+        )
+        RoomResident.objects.create(
+            room=cls.bills[0].room, user=moved_out, move_out_date=date(2025, 6, 30)
+        )
+        cls.moved_out = moved_out
+
+    def test_only_selected_overdue_bills_and_current_residents(self):
+        bill_count, created = send_payment_reminders(
+            self.manager, bill_ids=[self.bills[0].pk], today=date(2025, 8, 1)
+        )
+
+        self.assertEqual((bill_count, created), (1, 1))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.receiver, self.residents[0])
+        self.assertEqual(notification.title, "Nhắc nhở thanh toán hóa đơn tháng 06/2025")
+        self.assertIn("Chào Cư dân 0", notification.message)
+        self.assertIn("1,500,000 VNĐ", notification.message)
+        self.assertEqual(get_unread_count(self.residents[0]), 1)
+        self.assertFalse(Notification.objects.filter(receiver=self.moved_out).exists())
+
+    def test_bills_not_yet_due_or_paid_are_skipped(self):
+        Bill.objects.filter(pk=self.bills[1].pk).update(status=PaymentStatus.PAID.value)
+        bill_count, created = send_payment_reminders(
+            self.manager, today=date(2025, 7, 1)
+        )
+        self.assertEqual((bill_count, created), (0, 0))
+
+        bill_count, created = send_payment_reminders(
+            self.manager, today=date(2025, 8, 1)
+        )
+        self.assertEqual((bill_count, created), (2, 2))
+
+    def test_query_count_does_not_depend_on_bill_count(self):
+        # hóa đơn + cư dân/user + savepoint + thông báo + 2 bộ đếm + release
+        with self.assertNumQueries(7):
+            send_payment_reminders(self.manager, today=date(2025, 8, 1))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_counter_counts_each_overdue_bill(self):
+        resident = self.residents[1]
+        get_unread_count(resident)
+        Bill.objects.create(
+            room=self.bills[1].room,
+            bill_month=aware(2025, 5, 1),
+            due_date=aware(2025, 6, 15),
+            status=PaymentStatus.UNPAID.value,
+            total_amount=1200000,
+        )
+
+        send_payment_reminders(self.manager, today=date(2025, 8, 1))
+
+        self.assertEqual(
+            Notification.objects.filter(
+                receiver=resident, status=NotificationStatus.UNREAD.value
+            ).count(),
+            2,
+        )
+        self.assertEqual(get_unread_count(resident), 2)
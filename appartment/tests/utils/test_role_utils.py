@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ...constants import UserRole
+from ...models import Role, User
+from ...utils.role_utils import get_role_member_ids
+
+
+class RoleMemberIdsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        self.resident_role = Role.objects.create(
+            role_id=3, role_name=UserRole.RESIDENT.value
+        )
+        self.manager = User.objects.create_user(
+            email="man@example.com",
+            password="pw",
+            user_id="MAN001",
+            role=self.manager_role,
+        )
+        User.objects.create_user(
+            email="off@example.com",
+            password="pw",
+            user_id="MAN002",
+            role=self.manager_role,
+            is_active=False,
+        )
+
+    def test_active_members_are_cached(self):
+        self.assertEqual(
+            get_role_member_ids(UserRole.APARTMENT_MANAGER.value), ["MAN001"]
+        )
+        with self.assertNumQueries(0):
+            get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+
+    def test_role_change_invalidates(self):
+        get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+        resident = User.objects.create_user(
+            email="res@example.com",
+            password="pw",
+            user_id="RES001",
+            role=self.resident_role,
+        )
+        resident.role = self.manager_role
+        resident.save(update_fields=["role"])
+        self.assertEqual(
+            get_role_member_ids(UserRole.APARTMENT_MANAGER.value),
+            ["MAN001", "RES001"],
+        )
+
+    def test_unrelated_update_keeps_cache(self):
+        get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+        self.manager.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+
+    @override_settings(ROLE_MEMBERS_CACHE_TIMEOUT=30)
+    def test_cache_entry_expires(self):
+        # Tiến trình khác không nhận signal: danh sách chỉ cũ tối đa 30 giây
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+        self.assertEqual(cache_set.call_args.args[2], 30)
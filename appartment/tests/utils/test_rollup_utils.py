@@ -0,0 +1,116 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import PaymentStatus
+from ...models import Bill, MonthlyBillingRollup, Room
+from ...utils.rollup_utils import (
+    rebuild_rollups,
+    refresh_monthly_rollups,
+    rollup_month,
+)
+
+
+def aware(year, month, day, hour=0):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class MonthlyRollupTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(room_id="P101")
+
+    def bill(
+        self, month, amount, status=PaymentStatus.UNPAID.value, due=None, room=None
+    ):
+        return Bill.objects.create(
+            room=room or self.room,
+            bill_month=month,
+            total_amount=amount,
+            status=status,
+            due_date=due,
+        )
+
+    def rollup(self, month):
+        return MonthlyBillingRollup.objects.get(month=month)
+
+    def test_rollup_month_uses_local_time(self):
+        # 00:00 ngày 1/7 giờ Việt Nam là 17:00 ngày 30/6 theo UTC
+        utc_value = aware(2025, 7, 1).astimezone(dt_timezone.utc)
+        self.assertEqual(rollup_month(utc_value), date(2025, 7, 1))
+        self.assertEqual(rollup_month(date(2025, 7, 20)), date(2025, 7, 1))
+
+    def test_bill_saves_keep_rollup_current(self):
+        bill = self.bill(aware(2025, 7, 1), 100000)
+        self.bill(
+            aware(2025, 7, 1),
+            50000,
+            due=aware(2025, 7, 10),
+            room=Room.objects.create(room_id="P102"),
+        )
+
+        rollup = self.rollup(date(2025, 7, 1))
+        self.assertEqual(rollup.bill_count, 2)
+        self.assertEqual(rollup.billed_total, Decimal("150000"))
+        self.assertEqual(rollup.paid_count, 0)
+        self.assertEqual(rollup.overdue_count, 1)
+        self.assertEqual(rollup.unpaid_amount, Decimal("150000"))
+
+        bill.status = PaymentStatus.PAID.value
+        bill.save()
+        rollup = self.rollup(date(2025, 7, 1))
+        self.assertEqual(rollup.paid_count, 1)
+        self.assertEqual(rollup.paid_total, Decimal("100000"))
+        self.assertEqual(rollup.unpaid_amount, Decimal("50000"))
+
+    def test_moving_bill_refreshes_both_months(self):
+        bill = self.bill(aware(2025, 7, 1), 100000)
+        bill = Bill.objects.get(pk=bill.pk)
+        bill.bill_month = aware(2025, 8, 1)
+        bill.save()
+
+        self.assertEqual(self.rollup(date(2025, 7, 1)).bill_count, 0)
+        self.assertEqual(self.rollup(date(2025, 8, 1)).bill_count, 1)
+
+        bill.delete()
+        self.assertEqual(self.rollup(date(2025, 8, 1)).billed_total, 0)
+
+    def test_refresh_reads_only_requested_months(self):
+        self.bill(aware(2025, 7, 1), 100000)
+        self.bill(aware(2025, 8, 1), 200000)
+        # Ghi đè bằng update() (không phát signal) rồi tính lại riêng tháng 8
+        Bill.objects.update(total_amount=1)
+
+        with self.assertNumQueries(2):
+            refresh_monthly_rollups([aware(2025, 8, 15)])
+
+        self.assertEqual(self.rollup(date(2025, 7, 1)).billed_total, 100000)
+        self.assertEqual(self.rollup(date(2025, 8, 1)).billed_total, 1)
+
+    def test_rebuild_removes_stale_months_and_counts_overdue(self):
+        self.bill(aware(2025, 7, 1), 100000, due=aware(2025, 8, 15))
+        rebuild_rollups(now=aware(2025, 8, 1))
+        self.assertEqual(self.rollup(date(2025, 7, 1)).overdue_count, 0)
+        MonthlyBillingRollup.objects.create(month=date(2024, 1, 1), bill_count=9)
+
+        # Quá hạn không kèm lần lưu nào, chỉ lần dựng lại sau đó mới thấy
+        rollups = rebuild_rollups(now=aware(2025, 9, 1))
+
+        self.assertEqual([rollup.month for rollup in rollups], [date(2025, 7, 1)])
+        self.assertFalse(
+            MonthlyBillingRollup.objects.filter(month=date(2024, 1, 1)).exists()
+        )
+        self.assertEqual(self.rollup(date(2025, 7, 1)).overdue_count, 1)
+
+    def test_rebuild_since_keeps_older_months(self):
+        self.bill(aware(2025, 6, 1), 100000)
+        self.bill(aware(2025, 8, 1), 200000)
+        MonthlyBillingRollup.objects.filter(month=date(2025, 6, 1)).update(
+            bill_count=9
+        )
+
+        rebuild_rollups(since=date(2025, 7, 1))
+
+        self.assertEqual(self.rollup(date(2025, 6, 1)).bill_count, 9)
+        self.assertEqual(self.rollup(date(2025, 8, 1)).bill_count, 1)
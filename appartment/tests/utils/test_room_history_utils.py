@@ -0,0 +1,80 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ...constants import HISTORY_PER_PAGE_MAX, UserRole
+from ...models import RentalPrice, Role, Room, RoomResident, User
+from ...utils.room_history_utils import (
+    history_months,
+    prices_by_month,
+    room_history_page,
+)
+
+
+def aware(year, month, day, hour=0):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class RoomHistoryUtilsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        cls.user = User.objects.create_user(
+            email="res@example.com", password="pw", user_id="RES1", role=role
+        )
+        cls.room = Room.objects.create(room_id="P101")
+        for price, effective in [
+            (1000, aware(2015, 1, 10)),
+            (2000, aware(2020, 6, 30, 23)),
+            (3000, aware(2020, 7, 1)),
+        ]:
+            RentalPrice.objects.create(
+                room=cls.room, price=Decimal(price), effective_date=effective
+            )
+        resident = RoomResident.objects.create(
+            room=cls.room, user=cls.user, move_out_date=aware(2020, 8, 5)
+        )
+        RoomResident.objects.filter(pk=resident.pk).update(
+            move_in_date=aware(2020, 5, 20)
+        )
+        cls.prices = list(
+            RentalPrice.objects.filter(room=cls.room).order_by("effective_date", "pk")
+        )
+
+    def test_history_months_newest_first(self):
+        self.assertEqual(
+            history_months(date(2024, 11, 15), date(2025, 1, 3)),
+            [date(2025, 1, 1), date(2024, 12, 1), date(2024, 11, 1)],
+        )
+
+    def test_prices_by_month_merges_price_changes(self):
+        months = [date(2020, 7, 1), date(2014, 12, 1), date(2020, 6, 1)]
+        self.assertEqual(
+            prices_by_month(self.prices, months),
+            {
+                date(2014, 12, 1): None,
+                # Đổi giá lúc 23:00 ngày cuối tháng vẫn tính cho tháng đó
+                date(2020, 6, 1): Decimal(2000),
+                date(2020, 7, 1): Decimal(3000),
+            },
+        )
+
+    def test_page_hydrates_only_its_months(self):
+        months = history_months(date(2015, 1, 1), date(2025, 12, 1))
+        # Trang chứa tháng 5-8/2020 (danh sách mới nhất trước)
+        page_number = months.index(date(2020, 5, 1)) // HISTORY_PER_PAGE_MAX + 1
+
+        with self.assertNumQueries(1):
+            page = room_history_page(self.room.pk, months, self.prices, page_number)
+
+        rows = {row["month"]: row for row in page.object_list}
+        self.assertEqual(len(rows), HISTORY_PER_PAGE_MAX)
+        self.assertEqual(page.paginator.count, len(months))
+        self.assertEqual(rows[date(2020, 5, 1)]["price"], Decimal(1000))
+        self.assertEqual(rows[date(2020, 5, 1)]["number_of_residents"], 1)
+        self.assertEqual(
+            rows[date(2020, 5, 1)]["residents"],
+            [{"full_name": self.user.full_name, "user_id": "RES1"}],
+        )
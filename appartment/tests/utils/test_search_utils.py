@@ -0,0 +1,104 @@
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from ...constants import UserRole
+from ...models import Notification, Role, User
+from ...utils.notification_utils import fan_out_notification
+from ...utils.search_utils import fold_text, search_notifications
+
+
+class FoldTextTest(TestCase):
+    def test_removes_vietnamese_diacritics(self):
+        self.assertEqual(
+            fold_text("Đóng TIỀN điện, phòng 101!"), "dong tien dien phong 101"
+        )
+
+    def test_empty(self):
+        self.assertEqual(fold_text(None), "")
+
+
+class SearchNotificationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        cls.manager = User.objects.create_user(
+            email="manager@example.com",
+            password="pw",
+            user_id="MAN001",
+            full_name="Trần Quản Lý",
+            role=role,
+        )
+        cls.water = Notification.objects.create(
+            sender=cls.manager, title="Cắt nước", message="Tòa A cắt nước sáng mai."
+        )
+        cls.power = Notification.objects.create(
+            sender=cls.manager, title="Bảo trì điện", message="Phòng 101 mất điện."
+        )
+
+    def _search(self, query):
+        return set(search_notifications(Notification.objects.all(), query))
+
+    def test_matches_without_diacritics(self):
+        self.assertEqual(self._search("cat nuoc"), {self.water})
+        self.assertEqual(self._search("ĐIỆN"), {self.power})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._search("phòng 101"), {self.power})
+        self.assertEqual(self._search("nước 101"), set())
+
+    def test_matches_sender_name_and_prefix(self):
+        self.assertEqual(self._search("quan ly"), {self.water, self.power})
+        self.assertEqual(self._search("bao tr"), {self.power})
+
+    def test_sender_rename_refreshes_index(self):
+        self.manager.full_name = "Lê Văn Mới"
+        self.manager.save()
+        self.assertEqual(self._search("van moi"), {self.water, self.power})
+        self.assertEqual(self._search("quan ly"), set())
+
+    def test_bulk_created_notifications_are_indexed(self):
+        fan_out_notification(self.manager, ["MAN001"], "Họp cư dân", "Tối thứ bảy")
+        self.assertEqual(
+            {n.title for n in search_notifications(Notification.objects.all(), "hop")},
+            {"Họp cư dân"},
+        )
+
+    def test_deleted_notifications_leave_index(self):
+        self.water.delete()
+        self.assertEqual(self._search("nuoc"), set())
+
+    def test_like_fallback_for_other_databases(self):
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            self.assertEqual(self._search("dien 101"), {self.power})
+
+    def test_migration_recreates_fts_triggers_after_table_rebuild(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 triggers are SQLite only")
+        migration = import_module(
+            "appartment.migrations.0015_recreate_notification_fts_triggers"
+        )
+        # Giả lập SQLite dựng lại bảng notifications: trigger bị xóa theo bảng
+        with connection.cursor() as cursor:
+            for name in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER notifications_fts_{name}")
+        meeting = Notification.objects.create(
+            sender=self.manager, title="Họp cư dân", message="Tối thứ bảy"
+        )
+        self.assertEqual(self._search("hop"), set())
+
+        with connection.cursor() as cursor:
+            # Trong transaction của test không mở được schema_editor của SQLite
+            schema_editor = SimpleNamespace(
+                connection=connection, execute=cursor.execute
+            )
+            migration.recreate_fts_triggers(None, schema_editor)
+
+        self.assertEqual(self._search("hop"), {meeting})
+        self.water.delete()
+        self.assertEqual(self._search("nuoc"), set())
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ...models import AdditionalService
+from ...utils.service_utils import service_catalog
+
+
+class ServiceCatalogTest(TestCase):
+    def setUp(self):
+        self.internet = AdditionalService.objects.create(
+            name="Internet", unit_price=250000, type="per_room"
+        )
+        self.parking = AdditionalService.objects.create(
+            name="Gửi xe", unit_price=100000, type="per_person"
+        )
+        service_catalog.invalidate()
+
+    def test_catalog_is_loaded_once(self):
+        # Một query đọc phiên bản, một query tải danh mục
+        with self.assertNumQueries(2):
+            service_catalog.all()
+            service_catalog.get(self.internet.pk)
+            service_catalog.as_dict()
+        self.assertEqual(
+            [s.pk for s in service_catalog.all()], [self.internet.pk, self.parking.pk]
+        )
+
+    def test_save_invalidates_catalog(self):
+        service_catalog.all()
+        self.internet.unit_price = 300000
+        self.internet.save()
+        self.assertEqual(service_catalog.get(self.internet.pk).unit_price, 300000)
+
+    def test_delete_invalidates_catalog(self):
+        service_catalog.all()
+        parking_pk = self.parking.pk
+        self.parking.delete()
+        self.assertIsNone(service_catalog.get(parking_pk))
+        self.assertEqual(len(service_catalog.all()), 1)
+
+    def test_other_process_change_is_seen_after_ttl(self):
+        service_catalog.all()
+        # Tiến trình khác đổi giá: chỉ phiên bản trong DB thay đổi
+        with mock.patch.object(service_catalog, "_version", service_catalog._version):
+            service_catalog.invalidate()
+        AdditionalService.objects.filter(pk=self.internet.pk).update(unit_price=1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(service_catalog.get(self.internet.pk).unit_price, 250000)
+        with override_settings(SERVICE_CATALOG_TTL=0):
+            self.assertEqual(service_catalog.get(self.internet.pk).unit_price, 1)
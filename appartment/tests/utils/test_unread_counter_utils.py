@@ -0,0 +1,108 @@
+from django.test import TestCase
+
+from ...constants import NotificationStatus, UserRole
+from ...models import (
+    Notification,
+    NotificationRecipient,
+    Role,
+    UnreadNotificationCounter,
+    User,
+)
+from ...utils.notification_utils import broadcast_notification, fan_out_notification
+from ...utils.unread_counter_utils import (
+    count_total_unread,
+    get_unread_count,
+    mark_all_read,
+    reconcile_unread_counters,
+)
+
+
+class UnreadCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(
+            role_id=3, role_name=UserRole.RESIDENT.value
+        )
+        cls.manager = User.objects.create_user(
+            email="manager@example.com",
+            password="pw",
+            user_id="MAN001",
+            role=manager_role,
+        )
+        cls.resident = User.objects.create_user(
+            email="res@example.com",
+            password="pw",
+            user_id="RES001",
+            role=resident_role,
+        )
+
+    def test_counter_follows_create_fan_out_and_broadcast(self):
+        Notification.objects.create(
+            sender=self.manager, receiver=self.resident, title="A", message="a"
+        )
+        fan_out_notification(self.manager, ["RES001"], "B", "b")
+        broadcast_notification(self.manager, ["RES001"], "C", "c")
+
+        self.assertEqual(get_unread_count(self.resident), 3)
+        with self.assertNumQueries(1):
+            get_unread_count(self.resident)
+
+    def test_total_unread_skips_broadcast_body_rows(self):
+        Notification.objects.create(
+            sender=self.manager, receiver=self.resident, title="A", message="a"
+        )
+        broadcast_notification(self.manager, ["RES001", "MAN001"], "C", "c")
+        NotificationRecipient.objects.filter(user=self.manager).update(
+            status=NotificationStatus.READ.value
+        )
+
+        self.assertEqual(count_total_unread(), 2)
+
+    def test_missing_counter_is_recounted(self):
+        Notification.objects.create(
+            sender=self.manager, receiver=self.resident, title="A", message="a"
+        )
+        UnreadNotificationCounter.objects.all().delete()
+
+        self.assertEqual(get_unread_count(self.resident), 1)
+        self.assertTrue(
+            UnreadNotificationCounter.objects.filter(user=self.resident).exists()
+        )
+
+    def test_mark_all_read_updates_both_layouts(self):
+        Notification.objects.create(
+            sender=self.manager, receiver=self.resident, title="A", message="a"
+        )
+        broadcast_notification(self.manager, ["RES001"], "C", "c")
+
+        # savepoint + 2 UPDATE thông báo + UPDATE bộ đếm + release
+        with self.assertNumQueries(5):
+            updated = mark_all_read(self.resident)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(get_unread_count(self.resident), 0)
+        self.assertFalse(
+            NotificationRecipient.objects.filter(
+                user=self.resident, status=NotificationStatus.UNREAD.value
+            ).exists()
+        )
+
+    def test_reconcile_repairs_drift(self):
+        Notification.objects.create(
+            sender=self.manager, receiver=self.resident, title="A", message="a"
+        )
+        UnreadNotificationCounter.objects.filter(user=self.resident).update(
+            unread_count=7
+        )
+
+        drift = reconcile_unread_counters(dry_run=True)
+        self.assertIn(("RES001", 7, 1), drift)
+        self.assertEqual(get_unread_count(self.resident), 7)
+
+        reconcile_unread_counters()
+        self.assertEqual(get_unread_count(self.resident), 1)
+        self.assertEqual(get_unread_count(self.manager), 0)
+        self.assertEqual(reconcile_unread_counters(), [])
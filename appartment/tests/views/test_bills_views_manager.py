@@ -20,6 +20,7 @@ from ...models import (
     RentalPrice,
     SystemSettings,
     Notification,
+    Outbox,
 )
 from ...constants import UserRole
 
@@ -108,6 +109,46 @@ class ManagerBillingViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "manager/bills/billing_workspace.html")
 
+    def test_billing_workspace_filters_and_paginates_in_sql(self):
+        current_month = timezone.now().date().replace(day=1)
+        DraftBill.objects.create(
+            room=self.room101,
+            bill_month=current_month,
+            draft_type=DraftBill.DraftType.ELECTRIC_WATER,
+            status=DraftBill.DraftStatus.DRAFT,
+            total_amount=1000,
+        )
+        url = reverse("billing_workspace")
+        response = self.client.get(url, {"billing_status": "IN_PROGRESS"})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.paginator.count, 1)
+        self.assertEqual(
+            [row["room"].pk for row in response.context["workspace_data"]], ["P101"]
+        )
+        self.assertIn("billing_status=IN_PROGRESS", response.context["query_params"])
+
+        response = self.client.get(url, {"billing_status": "FINALIZED"})
+        self.assertEqual(response.context["workspace_data"], [])
+
+    def test_billing_room_modal_data_returns_json(self):
+        url = reverse("billing_room_modal_data", kwargs={"room_id": self.room101.pk})
+        response = self.client.get(url, {"month": self.test_month.strftime("%Y-%m-%d")})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "success")
+        self.assertEqual(data["modal_data"]["room_pk"], "P101")
+        self.assertEqual(data["modal_data"]["billing_status"], "NOT_STARTED")
+
+    def test_billing_room_modal_data_invalid_month_or_room(self):
+        url = reverse("billing_room_modal_data", kwargs={"room_id": self.room101.pk})
+        response = self.client.get(url, {"month": "invalid"})
+        self.assertEqual(response.status_code, 400)
+
+        url = reverse("billing_room_modal_data", kwargs={"room_id": "NOPE"})
+        response = self.client.get(url, {"month": "2025-08-01"})
+        self.assertEqual(response.status_code, 404)
+
     # --- TESTS FOR SAVEMETERREADINGVIEW ---
 
     def test_save_meter_reading_success(self):
@@ -283,6 +324,12 @@ class ManagerBillingViewsTest(TestCase):
                 room=self.room101, bill_month__month=self.test_month.month
             ).exists()
         )
+        # Như generate_final_bills: mỗi cư dân một email, gửi lại không trùng
+        self.client.post(url, post_data)
+        self.assertEqual(
+            sorted(item.payload["to"][0] for item in Outbox.objects.all()),
+            ["resident1@example.com", "resident2@example.com"],
+        )
 
     def test_generate_final_bill_fails_if_not_confirmed(self):
         """Kiểm tra tạo HĐ cuối cùng thất bại nếu HĐ nháp chưa được xác nhận."""
@@ -427,6 +474,30 @@ class ManagerBillingViewsTest(TestCase):
         # Kiểm tra xem notification đã được tạo cho cư dân trong phòng chưa
         self.assertTrue(Notification.objects.filter(receiver=self.resident1).exists())
 
+    def test_send_payment_reminders_only_selected_bills(self):
+        """Chỉ nhắc nhở các hóa đơn được chọn."""
+        selected = Bill.objects.create(
+            room=self.room101,
+            bill_month=self.prev_month,
+            status="unpaid",
+            due_date=date(2025, 7, 15),
+            total_amount=1000,
+        )
+        Bill.objects.create(
+            room=self.room102,
+            bill_month=self.prev_month,
+            status="unpaid",
+            due_date=date(2025, 7, 15),
+            total_amount=2000,
+        )
+
+        url = reverse("send_payment_reminders")
+        self.client.post(url, {"bill_ids": [selected.pk, "abc"]})
+
+        reminders = Notification.objects.filter(title__startswith="Nhắc nhở")
+        self.assertTrue(reminders.exists())
+        self.assertTrue(all(f"#{selected.pk} " in n.message for n in reminders))
+
     def test_send_payment_reminders_no_bills_selected(self):
         """Kiểm tra gửi nhắc nhở khi không chọn hóa đơn nào."""
         url = reverse("send_payment_reminders")
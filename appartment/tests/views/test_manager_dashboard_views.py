@@ -52,6 +52,11 @@ class ManagerDashboardViewTest(TestCase):
             room_id="101",
             status=RoomStatus.OCCUPIED.value,
         )
+        # Mỗi phòng chỉ có một hóa đơn mỗi tháng
+        self.room2 = Room.objects.create(
+            room_id="102",
+            status=RoomStatus.AVAILABLE.value,
+        )
 
         # Resident còn đang ở
         self.resident_user = User.objects.create_user(
@@ -86,7 +91,7 @@ class ManagerDashboardViewTest(TestCase):
             total_amount=200000,
             status=PaymentStatus.UNPAID.value,
             due_date=now - timedelta(days=5),
-            room=self.room1,
+            room=self.room2,
         )
 
     def login_manager(self):
@@ -99,7 +104,7 @@ class ManagerDashboardViewTest(TestCase):
         self.assertTemplateUsed(response, "manager/dashboard.html")
 
         ctx = response.context
-        self.assertEqual(ctx["total_rooms"], 1)
+        self.assertEqual(ctx["total_rooms"], 2)
         self.assertEqual(ctx["total_residents"], 1)
         self.assertEqual(ctx["total_occupied_rooms"], 1)
         self.assertEqual(ctx["total_bills"], 2)
@@ -4,7 +4,13 @@ from django.utils import timezone
 from django.contrib.messages import get_messages
 from django.utils.translation import gettext_lazy as _
 
-from ...models import Notification, Role, User
+from ...models import (
+    Notification,
+    NotificationRecipient,
+    Role,
+    UnreadNotificationCounter,
+    User,
+)
 from ...constants import UserRole, NotificationStatus, DEFAULT_PAGE_SIZE
 from ...views.notification_history import (
     notification_history,
@@ -194,6 +200,141 @@ class NotificationHistoryTest(TestCase):
         messages = self._get_messages(response)
         self.assertEqual(str(messages[0]), _("Bạn không có quyền xem thông báo này."))
 
+    def _create_broadcast(self):
+        broadcast = Notification.objects.create(
+            sender=self.manager,
+            title="Cắt nước",
+            message="Tòa nhà cắt nước sáng mai.",
+            is_broadcast=True,
+        )
+        NotificationRecipient.objects.create(notification=broadcast, user=self.resident)
+        return broadcast
+
+    def test_resident_notification_history_includes_broadcast(self):
+        """Thông báo hàng loạt hiện trong 'to_me' với trạng thái của người nhận"""
+        broadcast = self._create_broadcast()
+        NotificationRecipient.objects.filter(notification=broadcast).update(
+            status=NotificationStatus.READ.value
+        )
+        self.client.force_login(self.resident)
+        url = reverse("resident_notification_history") + "?filter_type=to_me"
+        response = self.client.get(url)
+        notifications = list(response.context["notifications"])
+        self.assertIn(broadcast, notifications)
+        shown = notifications[notifications.index(broadcast)]
+        self.assertEqual(shown.status, NotificationStatus.READ.value)
+
+    def test_broadcast_hidden_from_non_recipients(self):
+        """Người không nằm trong danh sách nhận không thấy thông báo hàng loạt"""
+        broadcast = self._create_broadcast()
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin_notification_history"))
+        self.assertNotIn(broadcast, list(response.context["notifications"]))
+
+    def test_mark_broadcast_read_only_for_current_recipient(self):
+        """Đánh dấu đã đọc thông báo hàng loạt chỉ cập nhật dòng người nhận"""
+        broadcast = self._create_broadcast()
+        other = User.objects.create(
+            user_id="RES002", email="other@example.com", role_id=1
+        )
+        NotificationRecipient.objects.create(notification=broadcast, user=other)
+        self.client.force_login(self.resident)
+        url = reverse(
+            "mark_notification_read",
+            kwargs={"notification_id": broadcast.notification_id},
+        )
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse("resident_notification_history"))
+        statuses = dict(
+            NotificationRecipient.objects.filter(notification=broadcast).values_list(
+                "user_id", "status"
+            )
+        )
+        self.assertEqual(
+            statuses,
+            {
+                "RES001": NotificationStatus.READ.value,
+                "RES002": NotificationStatus.UNREAD.value,
+            },
+        )
+
+    def test_mark_broadcast_read_no_permission(self):
+        """Không thuộc danh sách nhận thì không được đánh dấu thông báo hàng loạt"""
+        broadcast = self._create_broadcast()
+        self.client.force_login(self.admin)
+        url = reverse(
+            "mark_notification_read",
+            kwargs={"notification_id": broadcast.notification_id},
+        )
+        response = self.client.post(url)
+        messages = self._get_messages(response)
+        self.assertEqual(str(messages[0]), _("Bạn không có quyền xem thông báo này."))
+
+    def test_mark_notification_read_decrements_counter_once(self):
+        """Đánh dấu đã đọc hai lần chỉ giảm bộ đếm một lần"""
+        self.client.force_login(self.resident)
+        url = reverse(
+            "mark_notification_read",
+            kwargs={"notification_id": self.notification_to_resident.notification_id},
+        )
+        self.client.post(url)
+        self.client.post(url)
+        counter = UnreadNotificationCounter.objects.get(user=self.resident)
+        self.assertEqual(counter.unread_count, 0)
+
+    def test_mark_all_notifications_read(self):
+        """Đánh dấu tất cả thông báo của user là đã đọc"""
+        broadcast = self._create_broadcast()
+        self.client.force_login(self.resident)
+        response = self.client.post(reverse("mark_all_notifications_read"))
+        self.assertRedirects(response, reverse("resident_notification_history"))
+        self.notification_to_resident.refresh_from_db()
+        self.assertEqual(
+            self.notification_to_resident.status, NotificationStatus.READ.value
+        )
+        self.assertEqual(
+            NotificationRecipient.objects.get(notification=broadcast).status,
+            NotificationStatus.READ.value,
+        )
+        # Thông báo resident tự gửi lên hệ thống không bị ảnh hưởng
+        self.notification_by_resident.refresh_from_db()
+        self.assertEqual(
+            self.notification_by_resident.status, NotificationStatus.UNREAD.value
+        )
+
+    def test_manager_notification_history_uses_cursor_pages(self):
+        """Lịch sử của manager phân trang theo con trỏ"""
+        Notification.objects.bulk_create(
+            [
+                Notification(sender=self.admin, receiver=self.manager, title=f"T{i}")
+                for i in range(DEFAULT_PAGE_SIZE + 2)
+            ]
+        )
+        self.client.force_login(self.manager)
+        url = reverse("manager_notification_history")
+        first = self.client.get(url).context["notifications"]
+        self.assertEqual(len(first), DEFAULT_PAGE_SIZE)
+        # 3 thông báo mẫu liên quan tới manager + 12 thông báo mới
+        self.assertEqual(first.approx_total, DEFAULT_PAGE_SIZE + 5)
+        self.assertTrue(first.has_next())
+
+        response = self.client.get(url, {"cursor": first.next_cursor})
+        second = response.context["notifications"]
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        self.assertFalse({n.pk for n in first} & {n.pk for n in second})
+
+    def test_manager_notification_history_invalid_cursor(self):
+        """Con trỏ không hợp lệ quay về trang đầu kèm thông báo lỗi"""
+        self.client.force_login(self.manager)
+        url = reverse("manager_notification_history")
+        response = self.client.get(url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["notifications"].has_previous())
+        messages = self._get_messages(response)
+        self.assertEqual(str(messages[0]), _("Liên kết phân trang không hợp lệ."))
+
     def test_filter_notifications_by_month(self):
         """Kiểm tra lọc thông báo theo tháng"""
         self.client.force_login(self.resident)
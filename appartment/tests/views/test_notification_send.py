@@ -4,7 +4,7 @@ from django.utils import timezone
 from django.contrib.messages import get_messages
 from django.utils.translation import gettext_lazy as _
 
-from ...models import Notification, Role, User
+from ...models import Notification, NotificationRecipient, Outbox, Role, User
 from ...constants import UserRole, NotificationStatus
 
 
@@ -137,13 +137,18 @@ class NotificationSendTest(TestCase):
         self.assertRedirects(response, reverse("manager_notification_history"))
         messages = self._get_messages(response)
         self.assertEqual(str(messages[0]), _("Thông báo đã được gửi thành công."))
-        notifications = Notification.objects.filter(title="Thông báo bảo trì")
-        self.assertEqual(notifications.count(), 2)  # Gửi tới cả 2 resident
-        for notification in notifications:
-            self.assertEqual(notification.sender, self.manager)
-            self.assertIn(notification.receiver.user_id, ["RES001", "RES002"])
-            self.assertEqual(notification.message, "Bảo trì tòa nhà ngày mai.")
-            self.assertEqual(notification.status, NotificationStatus.UNREAD.value)
+        # Nội dung lưu một lần, mỗi resident là một dòng người nhận
+        notification = Notification.objects.get(title="Thông báo bảo trì")
+        self.assertTrue(notification.is_broadcast)
+        self.assertIsNone(notification.receiver)
+        self.assertEqual(notification.sender, self.manager)
+        self.assertEqual(notification.message, "Bảo trì tòa nhà ngày mai.")
+        recipients = NotificationRecipient.objects.filter(notification=notification)
+        self.assertEqual(
+            sorted(r.user_id for r in recipients), ["RES001", "RES002"]
+        )
+        for recipient in recipients:
+            self.assertEqual(recipient.status, NotificationStatus.UNREAD.value)
 
     def test_manager_send_notification_post_valid_selected_receivers(self):
         """Kiểm tra gửi thông báo hợp lệ cho manager với danh sách người nhận cụ thể"""
@@ -164,6 +169,11 @@ class NotificationSendTest(TestCase):
         self.assertEqual(notification.receiver, self.resident)
         self.assertEqual(notification.message, "Bạn được gán vào phòng 101.")
         self.assertEqual(notification.status, NotificationStatus.UNREAD.value)
+        # Email thông báo được xếp hàng trong outbox
+        outbox_item = Outbox.objects.get()
+        self.assertEqual(outbox_item.kind, Outbox.Kind.NOTIFICATION_EMAIL)
+        self.assertEqual(outbox_item.payload["to"], [self.resident.email])
+        self.assertEqual(outbox_item.payload["subject"], "Thông báo gán phòng")
 
     def test_manager_send_notification_post_no_receivers(self):
         """Kiểm tra lỗi khi manager không chọn người nhận và không tích send_all"""
@@ -226,6 +236,27 @@ class NotificationSendTest(TestCase):
         )
         self.assertFalse(Notification.objects.filter(title="Thông báo lỗi").exists())
 
+    def test_manager_send_notification_reports_unknown_receivers_together(self):
+        """Kiểm tra các ID không tồn tại được báo trong một thông báo lỗi"""
+        self.client.force_login(self.manager)
+        url = reverse("manager_send_notification")
+        data = {
+            "receiver_type": "resident",
+            "receiver": ["RES001", "INVALID_B", "INVALID_A"],
+            "title": "Thông báo nhiều người",
+            "message": "Nội dung.",
+        }
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse("manager_notification_history"))
+        messages = self._get_messages(response)
+        self.assertEqual(
+            str(messages[0]),
+            _("Người nhận với ID INVALID_A, INVALID_B không tồn tại."),
+        )
+        self.assertEqual(
+            Notification.objects.filter(title="Thông báo nhiều người").count(), 1
+        )
+
     def test_admin_send_notification_get(self):
         """Kiểm tra hiển thị form gửi thông báo cho admin"""
         self.client.force_login(self.admin)
@@ -249,13 +280,13 @@ class NotificationSendTest(TestCase):
         self.assertRedirects(response, reverse("admin_notification_history"))
         messages = self._get_messages(response)
         self.assertEqual(str(messages[0]), _("Thông báo đã được gửi thành công."))
-        notifications = Notification.objects.filter(title="Thông báo hệ thống")
-        self.assertEqual(notifications.count(), 1)  # Gửi tới 1 manager
-        notification = notifications.first()
+        notification = Notification.objects.get(title="Thông báo hệ thống")
+        self.assertTrue(notification.is_broadcast)
         self.assertEqual(notification.sender, self.admin)
-        self.assertEqual(notification.receiver, self.manager)
         self.assertEqual(notification.message, "Hệ thống bảo trì ngày mai.")
-        self.assertEqual(notification.status, NotificationStatus.UNREAD.value)
+        recipient = NotificationRecipient.objects.get(notification=notification)
+        self.assertEqual(recipient.user, self.manager)  # Gửi tới 1 manager
+        self.assertEqual(recipient.status, NotificationStatus.UNREAD.value)
 
     def test_admin_send_notification_post_valid_selected_receivers(self):
         """Kiểm tra gửi thông báo hợp lệ cho admin với danh sách người nhận cụ thể"""
@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ...constants import UserRole
+from ...models import DraftBill, Notification, Outbox, Role, Room, User
+from ...utils.role_utils import get_role_member_ids
+
+
+class RejectDraftBillTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        manager_role = Role.objects.create(
+            role_id=2, role_name=UserRole.APARTMENT_MANAGER.value
+        )
+        resident_role = Role.objects.create(role_id=3, role_name=UserRole.RESIDENT.value)
+        self.managers = [
+            User.objects.create_user(
+                email=f"man{index}@example.com",
+                password="pw",
+                user_id=f"MAN00{index}",
+                role=manager_role,
+            )
+            for index in range(3)
+        ]
+        self.resident = User.objects.create_user(
+            email="res@example.com",
+            password="pw",
+            user_id="RES001",
+            full_name="Nguyễn Văn A",
+            role=resident_role,
+        )
+        room = Room.objects.create(room_id="P101")
+        self.draft = DraftBill.objects.create(
+            room=room,
+            bill_month=date(2025, 7, 1),
+            draft_type=DraftBill.DraftType.ELECTRIC_WATER,
+            status=DraftBill.DraftStatus.SENT,
+            total_amount=1000,
+        )
+        self.client.force_login(self.resident)
+        self.url = reverse("resident_reject_draft_bill", kwargs={"pk": self.draft.pk})
+
+    def test_notifies_every_manager(self):
+        response = self.client.post(self.url, {"rejection_reason": "Sai chỉ số"})
+        self.assertRedirects(response, reverse("bill_history"))
+
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.status, DraftBill.DraftStatus.REJECTED)
+        notifications = Notification.objects.filter(sender=self.resident)
+        self.assertEqual(
+            sorted(n.receiver_id for n in notifications),
+            ["MAN000", "MAN001", "MAN002"],
+        )
+        self.assertIn("Lý do: Sai chỉ số", notifications[0].message)
+        # Email thông báo được xếp hàng như các đường gửi thông báo khác
+        self.assertEqual(
+            sorted(item.payload["to"][0] for item in Outbox.objects.all()),
+            ["man0@example.com", "man1@example.com", "man2@example.com"],
+        )
+
+    def test_single_insert_for_all_managers(self):
+        get_role_member_ids(UserRole.APARTMENT_MANAGER.value)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url)
+        inserts = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "notifications"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        # Danh sách manager lấy từ cache, không truy vấn bảng users theo role
+        self.assertFalse(
+            any(
+                UserRole.APARTMENT_MANAGER.value in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
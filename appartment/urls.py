@@ -24,6 +24,7 @@ from appartment.views.notification_history import (
     manager_notification_history,
     resident_notification_history,
     mark_notification_read,
+    mark_all_notifications_read,
 )
 from appartment.views.notification_send import (
     admin_send_notification,
@@ -64,6 +65,11 @@ urlpatterns = [
         bills_view.BillingWorkspaceView.as_view(),
         name="billing_workspace",
     ),
+    path(
+        "manager/billing/workspace/<str:room_id>/modal-data/",
+        bills_view.BillingRoomModalDataView.as_view(),
+        name="billing_room_modal_data",
+    ),
     path(
         "manager/billing/send-reminders/",
         bills_view.send_payment_reminders_view,
@@ -273,4 +279,9 @@ urlpatterns = [
         mark_notification_read,
         name="mark_notification_read",
     ),
+    path(
+        "notification/mark-all-read/",
+        mark_all_notifications_read,
+        name="mark_all_notifications_read",
+    ),
 ]
@@ -0,0 +1,592 @@
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime, time
+from decimal import Decimal
+
+import django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Case, CharField, Exists, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+
+from ..constants import BillingStatus, PaymentStatus, StringLength
+from ..models import (
+    Bill,
+    BillAdditionalService,
+    BillingRun,
+    BillingRunItem,
+    DraftBill,
+    MonthlyMeterReading,
+    RentalPrice,
+)
+from ..models.month_range import month_period
+from .dashboard_utils import invalidate_manager_dashboard
+from .occupancy_utils import OccupancyIndex
+from .outbox_utils import enqueue_bill_emails
+from .rollup_utils import refresh_monthly_rollups
+from .service_utils import service_catalog
+
+
+def get_historical_residents(room, bill_month):
+    """
+    Lấy danh sách các đối tượng RoomResident duy nhất theo user
+    đã ở trong phòng tại tháng hóa đơn.
+
+    Khi cần tra nhiều phòng/tháng, dựng OccupancyIndex một lần thay vì gọi
+    hàm này cho từng phòng.
+    """
+    return OccupancyIndex.from_rooms([room]).residents_in_month(room.pk, bill_month)
+
+
+def summarize_services(services_in_draft, services_info_map):
+    """
+    Gom các dịch vụ trong chi tiết HĐ nháp theo service_id và tính tổng tiền.
+    Args:
+        services_in_draft: danh sách dict dịch vụ lưu trong DraftBill.details.
+        services_info_map: dict {service_id: AdditionalService}.
+    Returns:
+        list các dict tóm tắt (service_id, name, type, quantity, total_cost).
+    """
+    service_counts = Counter(s["service_id"] for s in services_in_draft)
+    summary = []
+    for service_id, quantity in service_counts.items():
+        service_obj = services_info_map.get(service_id)
+        if service_obj:
+            summary.append(
+                {
+                    "service_id": service_id,
+                    "name": service_obj.name,
+                    "type": service_obj.type,
+                    "quantity": quantity,
+                    "total_cost": float(service_obj.unit_price * quantity),
+                }
+            )
+    return summary
+
+
+def annotate_billing_status(rooms_qs, month_date):
+    """
+    Gắn trạng thái tổng hợp của chu kỳ hóa đơn (billing_status) cho từng phòng
+    ngay trong SQL bằng Exists/Subquery trên DraftBill và Bill, để việc lọc
+    và phân trang theo trạng thái được thực hiện ở database.
+    """
+    # Tra theo khóa duy nhất (room, period) của từng phòng
+    period = month_period(month_date)
+    drafts = DraftBill.objects.filter(room=OuterRef("pk"), period=period)
+    final_bills = Bill.objects.filter(room=OuterRef("pk"), period=period)
+    confirmed = DraftBill.DraftStatus.CONFIRMED
+
+    return rooms_qs.annotate(
+        ew_draft_status=Subquery(
+            drafts.filter(draft_type=DraftBill.DraftType.ELECTRIC_WATER).values(
+                "status"
+            )[:1]
+        ),
+        services_draft_status=Subquery(
+            drafts.filter(draft_type=DraftBill.DraftType.SERVICES).values("status")[:1]
+        ),
+        has_final_bill=Exists(final_bills),
+    ).annotate(
+        billing_status=Case(
+            When(has_final_bill=True, then=Value(BillingStatus.FINALIZED.value)),
+            When(
+                ew_draft_status=confirmed,
+                services_draft_status=confirmed,
+                then=Value(BillingStatus.READY_TO_FINALIZE.value),
+            ),
+            When(
+                ew_draft_status__isnull=False,
+                services_draft_status__isnull=False,
+                then=Value(BillingStatus.PENDING_CONFIRMATION.value),
+            ),
+            When(
+                Q(ew_draft_status__isnull=False)
+                | Q(services_draft_status__isnull=False),
+                then=Value(BillingStatus.IN_PROGRESS.value),
+            ),
+            default=Value(BillingStatus.NOT_STARTED.value),
+            output_field=CharField(),
+        )
+    )
+
+
+class MonthBillingSnapshot:
+    """
+    Ảnh chụp toàn bộ dữ liệu hóa đơn của một tháng.
+
+    Mỗi tập dữ liệu (HĐ nháp, HĐ cuối cùng, chỉ số tháng này và tháng trước)
+    chỉ được truy vấn một lần rồi đánh chỉ mục theo (room_id, draft_type)
+    hoặc room_id, nên việc tra cứu cho từng phòng là O(1).
+    """
+
+    def __init__(self, month_date, room_ids=None):
+        """
+        Args:
+            month_date: ngày đầu tháng (date) cần lấy dữ liệu.
+            room_ids: giới hạn snapshot trong các phòng này (None = tất cả).
+        """
+        self.month_date = month_date
+        self.previous_month_date = month_date - relativedelta(months=1)
+        self.room_ids = list(room_ids) if room_ids is not None else None
+
+        self.drafts = {}
+        self.final_bills = {}
+        self.current_readings = {}
+        self.prev_readings = {}
+        self.services_info_map = {}
+        self._load()
+
+    def _scoped(self, queryset):
+        if self.room_ids is not None:
+            queryset = queryset.filter(room_id__in=self.room_ids)
+        return queryset
+
+    @staticmethod
+    def _index_by_room(records):
+        # Giữ bản ghi đầu tiên của mỗi phòng (giống hành vi next(...) trước đây)
+        index = {}
+        for record in records:
+            index.setdefault(record.room_id, record)
+        return index
+
+    def _load(self):
+        for draft in self._scoped(DraftBill.objects.filter(bill_month=self.month_date)):
+            self.drafts.setdefault((draft.room_id, draft.draft_type), draft)
+
+        self.final_bills = self._index_by_room(
+            self._scoped(Bill.objects.for_month(self.month_date))
+        )
+        self.current_readings = self._index_by_room(
+            self._scoped(MonthlyMeterReading.objects.for_month(self.month_date))
+        )
+        self.prev_readings = self._index_by_room(
+            self._scoped(
+                MonthlyMeterReading.objects.for_month(self.previous_month_date)
+            )
+        )
+
+        # Thông tin dịch vụ được tra từ danh mục cache trong bộ nhớ
+        self.services_info_map = service_catalog.as_dict()
+
+    @staticmethod
+    def _services_in(draft):
+        if draft and draft.details and "services" in draft.details:
+            return draft.details.get("services", [])
+        return []
+
+    def get_draft(self, room_id, draft_type):
+        return self.drafts.get((room_id, draft_type))
+
+    def get_final_bill(self, room_id):
+        return self.final_bills.get(room_id)
+
+    def is_ready_to_finalize(self, room_id):
+        ew_draft = self.get_draft(room_id, DraftBill.DraftType.ELECTRIC_WATER)
+        services_draft = self.get_draft(room_id, DraftBill.DraftType.SERVICES)
+        return bool(
+            ew_draft
+            and services_draft
+            and ew_draft.status == DraftBill.DraftStatus.CONFIRMED
+            and services_draft.status == DraftBill.DraftStatus.CONFIRMED
+        )
+
+    def get_billing_status(self, room_id):
+        """
+        Trạng thái tổng hợp của chu kỳ hóa đơn của phòng trong tháng.
+        """
+        ew_draft = self.get_draft(room_id, DraftBill.DraftType.ELECTRIC_WATER)
+        services_draft = self.get_draft(room_id, DraftBill.DraftType.SERVICES)
+
+        if self.get_final_bill(room_id):
+            return BillingStatus.FINALIZED.value
+        if ew_draft and services_draft:
+            if self.is_ready_to_finalize(room_id):
+                return BillingStatus.READY_TO_FINALIZE.value
+            return BillingStatus.PENDING_CONFIRMATION.value
+        if ew_draft or services_draft:
+            return BillingStatus.IN_PROGRESS.value
+        return BillingStatus.NOT_STARTED.value
+
+    def confirmed_room_ids(self):
+        """
+        Danh sách các phòng có đủ 2 HĐ nháp (Điện/Nước và Dịch vụ) đã CONFIRMED.
+        """
+        room_ids = {room_id for (room_id, _) in self.drafts}
+        return sorted(r for r in room_ids if self.is_ready_to_finalize(r))
+
+    def get_services_summary(self, room_id):
+        services_draft = self.get_draft(room_id, DraftBill.DraftType.SERVICES)
+        return summarize_services(
+            self._services_in(services_draft), self.services_info_map
+        )
+
+    def build_modal_data(self, room, billing_status=None):
+        """
+        Tạo dictionary "an toàn" cho JavaScript của modal xử lý hóa đơn.
+        """
+        ew_draft = self.get_draft(room.pk, DraftBill.DraftType.ELECTRIC_WATER)
+        services_draft = self.get_draft(room.pk, DraftBill.DraftType.SERVICES)
+        final_bill = self.get_final_bill(room.pk)
+        current_reading = self.current_readings.get(room.pk)
+        prev_reading = self.prev_readings.get(room.pk)
+        billing_status = billing_status or self.get_billing_status(room.pk)
+
+        return {
+            "room_pk": room.pk,
+            "room_description": room.description,
+            "is_ready_to_finalize": self.is_ready_to_finalize(room.pk),
+            "ew_draft_pk": ew_draft.pk if ew_draft else None,
+            "ew_draft_status": ew_draft.status if ew_draft else None,
+            "services_draft_pk": services_draft.pk if services_draft else None,
+            "services_draft_status": services_draft.status if services_draft else None,
+            "final_bill_pk": final_bill.pk if final_bill else None,
+            "final_bill_status": final_bill.status if final_bill else None,
+            "billing_status": billing_status.upper() if billing_status else "UNKNOWN",
+            "prev_reading_index": (
+                float(prev_reading.electricity_index) if prev_reading else 0
+            ),
+            "prev_reading_water_index": (
+                float(prev_reading.water_index) if prev_reading else 0
+            ),
+            "current_reading_electricity": (
+                float(current_reading.electricity_index) if current_reading else ""
+            ),
+            "current_reading_water": (
+                float(current_reading.water_index) if current_reading else ""
+            ),
+            "subscribed_services": self.get_services_summary(room.pk),
+        }
+
+    def build_room_info(self, room, occupancy=None):
+        """
+        Dữ liệu đầy đủ của một phòng cho template của workspace.
+        Dữ liệu cho modal được tải riêng khi mở (xem build_modal_data).
+        Args:
+            occupancy: OccupancyIndex dùng chung cho cả trang (tùy chọn).
+        """
+        billing_status = self.get_billing_status(room.pk)
+        if occupancy is None:
+            residents = get_historical_residents(room, self.month_date)
+        else:
+            residents = occupancy.residents_in_month(room.pk, self.month_date)
+        return {
+            "room": room,
+            "residents": residents,
+            "ew_draft": self.get_draft(room.pk, DraftBill.DraftType.ELECTRIC_WATER),
+            "services_draft": self.get_draft(room.pk, DraftBill.DraftType.SERVICES),
+            "final_bill": self.get_final_bill(room.pk),
+            "billing_status": billing_status,
+        }
+
+    def build_workspace_data(self, rooms):
+        """
+        Tính billing_status cho tất cả các phòng trong một lượt.
+        Lọc theo trạng thái được làm trong SQL (annotate_billing_status).
+        """
+        # Cư dân đã prefetch của mọi phòng được đánh chỉ mục một lần cho cả trang
+        rooms = list(rooms)
+        occupancy = OccupancyIndex.from_rooms(rooms)
+        return [self.build_room_info(room, occupancy) for room in rooms]
+
+
+BILL_FIELDS_TO_UPDATE = [
+    "bill_month",
+    "period",
+    "electricity_amount",
+    "water_amount",
+    "additional_service_amount",
+    "total_amount",
+    "status",
+    "due_date",
+]
+
+
+def _draft_details(draft):
+    if isinstance(draft.details, str):
+        return json.loads(draft.details)
+    return draft.details or {}
+
+
+def get_latest_rental_prices(room_ids, as_of):
+    """
+    Giá thuê đang áp dụng tại thời điểm as_of của từng phòng, lấy bằng
+    một lần quét đã sắp xếp (bản ghi đầu tiên của mỗi phòng là mới nhất).
+    Returns:
+        dict {room_id: RentalPrice}.
+    """
+    prices = {}
+    rental_prices = RentalPrice.objects.filter(
+        room_id__in=room_ids, effective_date__lte=as_of
+    ).order_by("room_id", "-effective_date")
+    for rental_price in rental_prices:
+        prices.setdefault(rental_price.room_id, rental_price)
+    return prices
+
+
+def compute_billing_checksum(ew_draft, services_draft, rental_price, shared_cost):
+    """
+    Checksum (sha256) của toàn bộ dữ liệu đầu vào tạo nên hóa đơn cuối cùng
+    của một phòng: 2 HĐ nháp, giá thuê và chi phí chung được chia.
+    """
+    payload = [
+        [
+            draft.pk,
+            draft.status,
+            str(draft.total_amount),
+            _draft_details(draft),
+        ]
+        for draft in (ew_draft, services_draft)
+    ]
+    payload.append([rental_price.pk, str(rental_price.price), str(shared_cost)])
+    encoded = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_successful_checksums(run):
+    """
+    Checksum đầu vào của các phòng đã được tạo hóa đơn thành công trong lần chạy.
+    Returns:
+        dict {room_id: input_checksum}.
+    """
+    return dict(
+        run.items.filter(status=BillingRunItem.ItemStatus.SUCCESS).values_list(
+            "room_id", "input_checksum"
+        )
+    )
+
+
+def record_failed_rooms(run, room_ids, message):
+    """
+    Ghi nhận các phòng thất bại vào sổ của lần chạy. Phòng đã có kết quả
+    SUCCESS được giữ nguyên: nếu dữ liệu đầu vào đã đổi, checksum sẽ khác và
+    phòng đó vẫn được xử lý lại khi resume.
+    """
+    succeeded = set(get_successful_checksums(run))
+    room_ids = [room_id for room_id in room_ids if room_id not in succeeded]
+    with transaction.atomic():
+        run.items.filter(room_id__in=room_ids).delete()
+        BillingRunItem.objects.bulk_create(
+            [
+                BillingRunItem(
+                    run=run,
+                    room_id=room_id,
+                    status=BillingRunItem.ItemStatus.FAILED,
+                    message=str(message)[: StringLength.DESCRIPTION.value],
+                )
+                for room_id in room_ids
+            ]
+        )
+
+
+def generate_final_bills(
+    month_date,
+    room_ids,
+    shared_cost_per_room=0,
+    snapshot=None,
+    run=None,
+    previous_checksums=None,
+):
+    """
+    Tạo (hoặc cập nhật) hóa đơn cuối cùng cho các phòng theo lô.
+
+    Toàn bộ dữ liệu cần thiết (HĐ nháp, giá thuê, hóa đơn đã có) được tải trước,
+    hóa đơn được thêm hoặc cập nhật bằng một câu upsert theo (room, period) và
+    các dòng dịch vụ được thay thế bằng một lần xóa + một lần thêm, tất cả
+    trong một transaction. Số query không phụ thuộc vào số phòng.
+
+    Nếu có run, kết quả của từng phòng được ghi vào sổ BillingRunItem trong
+    cùng transaction. Phòng có checksum đầu vào trùng với previous_checksums
+    (đã tạo thành công trước đó) sẽ được bỏ qua.
+    Args:
+        month_date: ngày đầu tháng (date) của hóa đơn.
+        room_ids: các phòng cần tạo hóa đơn (đã có đủ 2 HĐ nháp CONFIRMED).
+        shared_cost_per_room: chi phí chung chia cho mỗi phòng.
+        snapshot: MonthBillingSnapshot đã tải sẵn (tùy chọn).
+        run: BillingRun dùng để ghi sổ (tùy chọn).
+        previous_checksums: dict {room_id: checksum} của các phòng đã thành công.
+    Returns:
+        dict gồm danh sách phòng "created", "updated", "unchanged" và
+        "skipped" (không có giá thuê).
+    """
+    room_ids = list(room_ids)
+    previous_checksums = previous_checksums or {}
+    if snapshot is None:
+        snapshot = MonthBillingSnapshot(month_date, room_ids=room_ids)
+    bill_month = timezone.make_aware(datetime.combine(month_date, time.min))
+    due_date = bill_month + relativedelta(months=1, days=14)
+    shared_cost = Decimal(str(shared_cost_per_room)).quantize(Decimal("0.01"))
+
+    rental_prices = get_latest_rental_prices(room_ids, bill_month)
+    result = {"created": [], "updated": [], "unchanged": [], "skipped": []}
+
+    bills = []
+    services_by_room = {}
+    checksums = {}
+    for room_id in room_ids:
+        rental_price = rental_prices.get(room_id)
+        if rental_price is None:
+            result["skipped"].append(room_id)
+            continue
+
+        ew_draft = snapshot.get_draft(room_id, DraftBill.DraftType.ELECTRIC_WATER)
+        services_draft = snapshot.get_draft(room_id, DraftBill.DraftType.SERVICES)
+        checksum = compute_billing_checksum(
+            ew_draft, services_draft, rental_price, shared_cost
+        )
+        if previous_checksums.get(room_id) == checksum:
+            result["unchanged"].append(room_id)
+            continue
+        checksums[room_id] = checksum
+
+        ew_details = _draft_details(ew_draft)
+        services_by_room[room_id] = _draft_details(services_draft).get("services", [])
+
+        # Tổng tiền = Tiền phòng + Tiền điện nước + Tiền dịch vụ + Chi phí chung
+        bill = Bill(
+            room_id=room_id,
+            bill_month=bill_month,
+            # bulk_create/bulk_update không phát pre_save, tự điền period
+            period=month_period(month_date),
+            electricity_amount=ew_details.get("electric_cost", 0),
+            water_amount=ew_details.get("water_cost", 0),
+            additional_service_amount=services_draft.total_amount,
+            total_amount=(
+                rental_price.price
+                + ew_draft.total_amount
+                + services_draft.total_amount
+                + shared_cost
+            ),
+            status=PaymentStatus.UNPAID.value,
+            due_date=due_date,
+        )
+        bills.append(bill)
+        if snapshot.get_final_bill(room_id):
+            result["updated"].append(room_id)
+        else:
+            result["created"].append(room_id)
+
+    # Không có gì để ghi (kể cả sổ của lần chạy) thì không mở transaction
+    if not services_by_room and (run is None or not result["skipped"]):
+        return result
+
+    with transaction.atomic():
+        # Upsert một câu theo khóa duy nhất (room, period): hai lần tạo hóa đơn
+        # chạy cùng lúc cho cùng phòng/tháng được gộp thay vì lỗi IntegrityError.
+        # MySQL không nhận unique_fields (ON DUPLICATE KEY UPDATE)
+        features = connections[Bill.objects.db].features
+        Bill.objects.bulk_create(
+            bills,
+            update_conflicts=True,
+            unique_fields=(
+                ["room", "period"]
+                if features.supports_update_conflicts_with_target
+                else None
+            ),
+            update_fields=BILL_FIELDS_TO_UPDATE,
+        )
+
+        bill_ids = {bill.room_id: bill.pk for bill in bills}
+        if None in bill_ids.values():
+            # MySQL không trả về khóa chính sau upsert, lấy lại các id
+            bill_ids.update(
+                Bill.objects.filter(
+                    room_id__in=list(bill_ids), period=month_period(month_date)
+                ).values_list("room_id", "bill_id")
+            )
+            for bill in bills:
+                bill.pk = bill_ids[bill.room_id]
+
+        # Thay thế toàn bộ dòng dịch vụ của các hóa đơn này
+        if bill_ids:
+            BillAdditionalService.objects.filter(bill_id__in=bill_ids.values()).delete()
+            BillAdditionalService.objects.bulk_create(
+                [
+                    BillAdditionalService(
+                        bill_id=bill_ids[room_id],
+                        additional_service_id=service_detail.get("service_id"),
+                        room_id=room_id,
+                        service_month=bill_month,
+                        status="active",
+                    )
+                    for room_id, services in services_by_room.items()
+                    for service_detail in services
+                ]
+            )
+
+        # bulk_create/bulk_update không phát signal, tự tính lại số liệu tháng
+        refresh_monthly_rollups([bill_month])
+        invalidate_manager_dashboard()
+        transaction.on_commit(invalidate_manager_dashboard)
+
+        # Email hóa đơn được xếp hàng trong cùng transaction với hóa đơn
+        enqueue_bill_emails(bills, month_date)
+
+        if run is not None:
+            _record_run_items(run, bill_ids, checksums, result["skipped"])
+
+    return result
+
+
+def _record_run_items(run, bill_ids, checksums, skipped_room_ids):
+    items = [
+        BillingRunItem(
+            run=run,
+            room_id=room_id,
+            status=BillingRunItem.ItemStatus.SUCCESS,
+            input_checksum=checksums[room_id],
+            bill_id=bill_id,
+        )
+        for room_id, bill_id in bill_ids.items()
+    ]
+    items.extend(
+        BillingRunItem(
+            run=run,
+            room_id=room_id,
+            status=BillingRunItem.ItemStatus.SKIPPED,
+            message="No rental price found.",
+        )
+        for room_id in skipped_room_ids
+    )
+    run.items.filter(room_id__in=[item.room_id for item in items]).delete()
+    BillingRunItem.objects.bulk_create(items)
+
+
+def init_generation_worker():
+    """
+    Khởi tạo tiến trình con của process pool: mỗi tiến trình dùng kết nối DB
+    riêng (kết nối kế thừa từ tiến trình cha không được dùng chung).
+    """
+    django.setup()
+    connections.close_all()
+
+
+def generate_final_bills_chunk(
+    month_date, room_ids, shared_cost_per_room=0, run_id=None, previous_checksums=None
+):
+    """
+    Tạo hóa đơn cuối cùng cho một nhóm phòng trong transaction riêng.
+    Hàm ở cấp module để có thể gửi sang process pool.
+    """
+    run = BillingRun.objects.get(pk=run_id) if run_id is not None else None
+    return generate_final_bills(
+        month_date,
+        room_ids,
+        shared_cost_per_room,
+        run=run,
+        previous_checksums=previous_checksums,
+    )
+
+
+def merge_generation_results(results):
+    """
+    Gộp kết quả của nhiều nhóm phòng thành một bản tổng hợp.
+    """
+    summary = {"created": [], "updated": [], "unchanged": [], "skipped": []}
+    for result in results:
+        for key in summary:
+            summary[key].extend(result.get(key, []))
+    for key in summary:
+        summary[key].sort()
+    return summary
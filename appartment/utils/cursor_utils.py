@@ -0,0 +1,153 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class CursorPage:
+    """
+    Một trang kết quả phân trang theo con trỏ (keyset).
+    Dùng được như Page của Paginator trong template: lặp, len, has_next,
+    has_previous, has_other_pages; thay số trang bằng next_cursor/prev_cursor.
+    """
+
+    def __init__(
+        self, object_list, next_cursor=None, prev_cursor=None, approx_total=None
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.approx_total = approx_total
+        self.total_is_capped = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(direction, values):
+    """
+    Mã hóa (hướng, giá trị khóa) thành token base64 dùng trên URL.
+    """
+    raw = json.dumps([direction, values], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Giải mã token con trỏ. Raise ValueError nếu token không hợp lệ.
+    Returns:
+        (direction, [giá trị cột sắp xếp, pk]).
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # Payload là JSON hợp lệ nhưng sai dạng (vd. số) cũng là token hỏng
+        if direction not in ("next", "prev") or len(values) != 2:
+            raise ValueError("Invalid cursor")
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return direction, values
+
+
+def paginate_by_cursor(
+    queryset, cursor, page_size, field="created_at", descending=True, count_cap=None
+):
+    """
+    Phân trang theo khóa (field, pk) thay cho OFFSET: mỗi trang chỉ là một
+    truy vấn WHERE (field, pk) < (giá trị cuối) ... LIMIT page_size + 1, nên
+    trang sâu tốn như trang đầu và không cần COUNT(*).
+    Args:
+        queryset: QuerySet đã lọc.
+        cursor: token từ next_cursor/prev_cursor, None cho trang đầu.
+        page_size: số dòng mỗi trang.
+        field: cột sắp xếp chính, pk dùng để phân định khi trùng giá trị.
+        descending: True để sắp xếp mới nhất trước.
+        count_cap: nếu có, đếm tổng xấp xỉ tối đa count_cap dòng.
+    Returns:
+        CursorPage. Raise ValueError nếu cursor không hợp lệ.
+    """
+    direction, values = decode_cursor(cursor) if cursor else ("next", None)
+    forward = direction == "next"
+
+    # Đi lùi thì duyệt theo chiều ngược lại rồi đảo kết quả
+    scan_descending = descending if forward else not descending
+    queryset = queryset.order_by(*keyset_ordering(field, scan_descending))
+
+    approx_total = None
+    if count_cap:
+        approx_total = queryset.order_by()[: count_cap + 1].count()
+
+    queryset = keyset_filter(queryset, field, values, scan_descending)
+    rows = list(queryset[: page_size + 1])
+    return build_cursor_page(
+        rows, page_size, field, forward, values is not None, approx_total, count_cap
+    )
+
+
+def keyset_ordering(field, descending):
+    prefix = "-" if descending else ""
+    return [f"{prefix}{field}", f"{prefix}pk"]
+
+
+def keyset_filter(queryset, field, values, descending):
+    """
+    Giữ lại các dòng đứng sau khóa (field, pk) = values theo chiều duyệt.
+    Raise ValueError nếu giá trị trong con trỏ không hợp lệ.
+    """
+    if values is None:
+        return queryset
+    try:
+        key = queryset.model._meta.get_field(field).to_python(values[0])
+        pk = queryset.model._meta.pk.to_python(values[1])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    op = "lt" if descending else "gt"
+    return queryset.filter(
+        Q(**{f"{field}__{op}": key}) | Q(**{field: key, f"pk__{op}": pk})
+    )
+
+
+def build_cursor_page(
+    rows, page_size, field, forward, has_cursor, approx_total=None, count_cap=None
+):
+    """
+    Dựng CursorPage từ tối đa page_size + 1 dòng theo thứ tự duyệt.
+    Args:
+        forward: True nếu đang đi tới (con trỏ "next" hoặc trang đầu).
+        has_cursor: trang này được mở từ một con trỏ.
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    def cursor_for(direction, row):
+        return encode_cursor(direction, [getattr(row, field), row.pk])
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more if forward else True:
+            next_cursor = cursor_for("next", rows[-1])
+        if has_cursor if forward else has_more:
+            prev_cursor = cursor_for("prev", rows[0])
+
+    page = CursorPage(rows, next_cursor, prev_cursor, approx_total)
+    if count_cap and approx_total > count_cap:
+        page.approx_total = count_cap
+        page.total_is_capped = True
+    return page
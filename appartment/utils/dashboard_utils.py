@@ -0,0 +1,147 @@
+import json
+import uuid
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..constants import PaymentStatus, RoomStatus
+from ..models import Bill, MonthlyBillingRollup, Room, RoomResident
+from ..models.month_range import month_bounds
+
+DASHBOARD_CHART_MONTHS = 6
+# Trước ngày này, số liệu "tháng" trên dashboard là của tháng trước
+DASHBOARD_BILL_DAY = 25
+DASHBOARD_CACHE_VERSION_KEY = "appartment:manager_dashboard:version"
+
+
+def month_start(value):
+    """
+    Thời điểm 00:00 ngày đầu tháng (theo múi giờ hiện tại) chứa value.
+    """
+    return month_bounds(value)[0]
+
+
+def dashboard_months(now):
+    """
+    Tháng hiện tại và tháng dùng cho các KPI hóa đơn (tháng trước nếu chưa
+    tới ngày DASHBOARD_BILL_DAY), cả hai là thời điểm đầu tháng.
+    """
+    current_month = month_start(now)
+    if timezone.localtime(now).day < DASHBOARD_BILL_DAY:
+        return current_month, current_month - relativedelta(months=1)
+    return current_month, current_month
+
+
+def get_manager_dashboard_metrics(now=None):
+    """
+    Số liệu dashboard của quản lý, tính bằng ba truy vấn:
+    phòng (Count có điều kiện), cư dân đang ở, và tối đa sáu dòng
+    MonthlyBillingRollup đã gộp sẵn thay vì gộp lại bảng bills.
+    Returns:
+        dict các giá trị cho context của template.
+    """
+    now = now or timezone.now()
+    current_month, total_bill_month = dashboard_months(now)
+    chart_start = current_month - relativedelta(months=DASHBOARD_CHART_MONTHS - 1)
+
+    rooms = Room.objects.aggregate(
+        total=Count("pk"),
+        occupied=Count("pk", filter=Q(status=RoomStatus.OCCUPIED.value)),
+    )
+    total_residents = RoomResident.objects.filter(
+        Q(move_out_date__isnull=True) | Q(move_out_date__gt=now)
+    ).count()
+
+    monthly = {
+        rollup.month.strftime("%Y-%m"): rollup
+        for rollup in MonthlyBillingRollup.objects.filter(
+            month__gte=chart_start.date(), month__lte=current_month.date()
+        )
+    }
+
+    months_labels = [
+        (chart_start + relativedelta(months=i)).strftime("%Y-%m")
+        for i in range(DASHBOARD_CHART_MONTHS)
+    ]
+    months_amounts = [
+        float(monthly[label].billed_total) if label in monthly else 0.0
+        for label in months_labels
+    ]
+    selected = monthly.get(total_bill_month.strftime("%Y-%m")) or (
+        MonthlyBillingRollup(month=total_bill_month.date())
+    )
+
+    overdue_bills = (
+        Bill.objects.filter(due_date__lt=now, status=PaymentStatus.UNPAID.value)
+        .select_related("room")
+        .order_by("-due_date")
+    )
+
+    return {
+        "total_rooms": rooms["total"],
+        "total_residents": total_residents,
+        "total_bill_month": total_bill_month,
+        "total_bills": selected.bill_count,
+        "total_bill_money": selected.billed_total,
+        "total_occupied_rooms": rooms["occupied"],
+        "total_paid_count": selected.paid_count,
+        "total_paid_money": selected.paid_total,
+        "overdue_bills": overdue_bills,
+        "months_labels": json.dumps(months_labels),
+        "months_amounts": json.dumps(months_amounts),
+    }
+
+
+def _dashboard_cache_version():
+    version = cache.get(DASHBOARD_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(DASHBOARD_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(DASHBOARD_CACHE_VERSION_KEY)
+    return version
+
+
+def manager_dashboard_cache_key(now=None):
+    """
+    Khóa cache của dashboard: phiên bản hiện tại + tháng hiện tại + tháng KPI.
+    Khóa đổi khi dữ liệu thay đổi (invalidate) hoặc khi sang tháng/qua ngày 25.
+    """
+    current_month, total_bill_month = dashboard_months(now or timezone.now())
+    return (
+        f"appartment:manager_dashboard:{_dashboard_cache_version()}:"
+        f"{current_month:%Y-%m}:{total_bill_month:%Y-%m}"
+    )
+
+
+def get_cached_manager_dashboard_metrics(now=None):
+    """
+    get_manager_dashboard_metrics qua cache framework.
+
+    Các lần tải lại trong cùng phiên bản chỉ đọc cache, không truy vấn DB.
+    Những thay đổi theo thời gian không đi kèm lần lưu nào (hóa đơn vừa quá
+    hạn, cư dân tới ngày chuyển đi) có độ trễ tối đa DASHBOARD_CACHE_TIMEOUT.
+    Returns:
+        dict như get_manager_dashboard_metrics, thêm dashboard_cache_key và
+        dashboard_cache_timeout cho fragment cache trong template.
+    """
+    now = now or timezone.now()
+    key = manager_dashboard_cache_key(now)
+    metrics = cache.get(key)
+    if metrics is None:
+        metrics = get_manager_dashboard_metrics(now)
+        metrics["overdue_bills"] = list(metrics["overdue_bills"])
+        cache.set(key, metrics, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dict(
+        metrics,
+        dashboard_cache_key=key,
+        dashboard_cache_timeout=settings.DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_manager_dashboard():
+    """
+    Đổi phiên bản để mọi tiến trình bỏ số liệu và fragment đã cache.
+    """
+    cache.set(DASHBOARD_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,363 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+
+BILL_EMAIL_TEMPLATE = "emails/auto_bill.html"
+
+
+def get_bill_email_template():
+    """
+    Template email hóa đơn đã biên dịch; nạp một lần cho mỗi lượt gửi.
+    """
+    return get_template(BILL_EMAIL_TEMPLATE)
+
+
+def render_bill_email(bill, user, template, month):
+    """
+    Nội dung email hóa đơn cho một người nhận.
+    Args:
+        month: ngày bất kỳ trong tháng của hóa đơn (dùng cho tiêu đề).
+    Returns:
+        dict gồm subject, body, html và to.
+    """
+    subject = f"Hóa đơn tiền phòng {month.month}/{month.year} - Phòng {bill.room_id}"
+    due_date = bill.due_date.strftime("%d/%m/%Y") if bill.due_date else "N/A"
+
+    body = f"""
+            Hóa đơn phòng {bill.room_id} tháng {month.month}/{month.year}:
+            Điện: {bill.electricity_amount} VND
+            Nước: {bill.water_amount} VND
+            Dịch vụ khác: {bill.additional_service_amount} VND
+            Tổng: {bill.total_amount} VND
+            Hạn thanh toán: {due_date}
+            """
+
+    html = template.render(
+        {
+            "user_name": user.full_name,
+            "room": bill.room_id,
+            "month": month.month,
+            "year": month.year,
+            "electricity": bill.electricity_amount or 0,
+            "water": bill.water_amount or 0,
+            "services": bill.additional_service_amount or 0,
+            "total": bill.total_amount or 0,
+            "due_date": due_date,
+        }
+    )
+    return {"subject": subject, "body": body, "html": html, "to": [user.email]}
+
+
+def build_email_message(payload, connection=None):
+    """
+    Tạo EmailMultiAlternatives từ payload (subject, body, to, html tùy chọn).
+    """
+    message = EmailMultiAlternatives(
+        payload["subject"],
+        payload["body"],
+        None,
+        payload["to"],
+        connection=connection,
+    )
+    if payload.get("html"):
+        message.attach_alternative(payload["html"], "text/html")
+    return message
+
+
+def iter_batches(iterable, batch_size):
+    """
+    Chia một iterable thành các list có tối đa batch_size phần tử.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def send_messages_in_batches(messages, batch_size, connection=None):
+    """
+    Gửi các email qua MỘT kết nối duy nhất, mỗi lượt send_messages() một lô.
+    Lô bị lỗi được ghi log và tính là thất bại, các lô sau vẫn được gửi tiếp.
+    Args:
+        messages: iterable các EmailMessage (có thể là generator).
+        batch_size: số email trong một lô.
+        connection: kết nối email backend (mặc định get_connection()).
+    Returns:
+        dict gồm "sent", "failed" và "elapsed" (giây).
+    """
+    _, summary = send_tagged_in_batches(
+        ((None, message) for message in messages), batch_size, connection
+    )
+    return summary
+
+
+def send_tagged_in_batches(tagged_messages, batch_size, connection=None):
+    """
+    Như send_messages_in_batches nhưng trả về kết quả của từng email (cùng dạng
+    với ConcurrentEmailSender.send) để nơi gọi lưu lại.
+
+    send_messages() chỉ trả về số email đã gửi của cả lô: các email đầu lô
+    (theo thứ tự gửi) được tính là đã gửi, phần còn lại là thất bại; lô ném
+    exception được ghi là thất bại toàn bộ.
+    Args:
+        tagged_messages: iterable các cặp (tag, EmailMessage).
+    Returns:
+        (outcomes, summary): outcomes là list dict gồm tag, sent, attempts,
+        error; summary gồm "sent", "failed" và "elapsed" (giây).
+    """
+    connection = connection or get_connection()
+    outcomes = []
+    summary = {"sent": 0, "failed": 0, "elapsed": 0.0}
+    started = time.monotonic()
+
+    with connection:
+        for batch in iter_batches(tagged_messages, batch_size):
+            error = ""
+            try:
+                sent = connection.send_messages([message for _, message in batch])
+                sent = sent or 0
+            except Exception as exc:
+                logger.exception("Failed to send a batch of %d emails.", len(batch))
+                sent = 0
+                error = str(exc)
+            for index, (tag, _) in enumerate(batch):
+                outcomes.append(
+                    {
+                        "tag": tag,
+                        "sent": index < sent,
+                        "attempts": 1,
+                        "error": "" if index < sent else error,
+                    }
+                )
+            summary["sent"] += sent
+            summary["failed"] += len(batch) - sent
+
+    summary["elapsed"] = time.monotonic() - started
+    return outcomes, summary
+
+
+def log_dispatch_summary(label, summary):
+    """
+    Ghi log tổng kết một lượt gửi email: số đã gửi, lỗi và tốc độ (email/giây).
+    """
+    elapsed = summary["elapsed"]
+    rate = summary["sent"] / elapsed if elapsed > 0 else float(summary["sent"])
+    logger.info(
+        "%s: sent %d emails, %d failed in %.2fs (%.1f emails/sec).",
+        label,
+        summary["sent"],
+        summary["failed"],
+        elapsed,
+        rate,
+    )
+
+
+# Lỗi tạm thời: kết nối bị ngắt, lỗi mạng hoặc mã phản hồi SMTP 4xx
+TRANSIENT_EMAIL_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def is_transient_email_error(exc):
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, TRANSIENT_EMAIL_ERRORS)
+
+
+class TokenBucket:
+    """
+    Giới hạn tốc độ dạng token bucket, dùng chung giữa các thread.
+    Mỗi lần acquire() lấy một token; nếu hết token thì chờ đến khi đủ.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            rate: số token được nạp mỗi giây.
+            capacity: số token tối đa (mặc định bằng rate, tối thiểu 1).
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class ConcurrentEmailSender:
+    """
+    Gửi email bằng nhiều thread, mỗi thread giữ một kết nối SMTP riêng và mở
+    liên tục trong suốt lượt gửi. Tốc độ chung được giới hạn bằng TokenBucket,
+    lỗi tạm thời được gửi lại với thời gian chờ tăng dần.
+
+    Kết quả của từng email được trả về (không ghi DB trong thread) để nơi gọi
+    lưu lại bằng một lần bulk_create.
+    """
+
+    # Số giây chờ mỗi lần put() trước khi kiểm tra các thread còn sống
+    PUT_TIMEOUT = 1.0
+
+    def __init__(
+        self,
+        workers,
+        rate_limit=None,
+        max_retries=3,
+        backoff=1.0,
+        connection_factory=get_connection,
+        sleep=time.sleep,
+    ):
+        self.workers = workers
+        self.rate_limiter = TokenBucket(rate_limit, sleep=sleep) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.connection_factory = connection_factory
+        self._sleep = sleep
+
+    def send(self, tagged_messages):
+        """
+        Args:
+            tagged_messages: iterable các cặp (tag, EmailMessage); tag được trả về
+                nguyên vẹn trong kết quả để nơi gọi biết email thuộc về ai.
+        Returns:
+            (outcomes, summary): outcomes là list dict gồm tag, sent, attempts,
+            error; summary gồm "sent", "failed" và "elapsed" (giây).
+        """
+        started = time.monotonic()
+        jobs = queue.Queue(maxsize=self.workers * 4)
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def worker(connection):
+            try:
+                while True:
+                    job = jobs.get()
+                    if job is None:
+                        return
+                    tag, message = job
+                    try:
+                        outcome = self._deliver(connection, message)
+                    except Exception as exc:
+                        # Lỗi ngoài dự kiến chỉ làm hỏng email này, thread vẫn
+                        # tiếp tục lấy việc để nơi gọi không bị treo ở put()
+                        logger.exception("Failed to send email to %s.", message.to)
+                        outcome = {"sent": False, "attempts": 1, "error": str(exc)}
+                    outcome["tag"] = tag
+                    with outcomes_lock:
+                        outcomes.append(outcome)
+            finally:
+                connection.close()
+
+        # Tạo kết nối ở thread chính để lỗi cấu hình được báo ngay
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(self.connection_factory(),),
+                name=f"email-sender-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for tagged_message in tagged_messages:
+                self._put(jobs, tagged_message, threads)
+        finally:
+            for _ in threads:
+                if not self._put(jobs, None, threads):
+                    break
+            for thread in threads:
+                thread.join()
+
+        sent = sum(1 for outcome in outcomes if outcome["sent"])
+        summary = {
+            "sent": sent,
+            "failed": len(outcomes) - sent,
+            "elapsed": time.monotonic() - started,
+        }
+        return outcomes, summary
+
+    def _put(self, jobs, item, threads):
+        """
+        Đưa việc vào hàng đợi; chờ theo từng khoảng PUT_TIMEOUT giây và dừng
+        lại nếu không còn thread nào sống để lấy việc.
+        Returns:
+            False nếu mọi thread đã dừng (item bị bỏ), ngược lại True.
+        """
+        while True:
+            try:
+                jobs.put(item, timeout=self.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                if not any(thread.is_alive() for thread in threads):
+                    if item is not None:
+                        raise RuntimeError("All email sender threads have stopped.")
+                    return False
+
+    def _deliver(self, connection, message):
+        attempts = 0
+        while True:
+            attempts += 1
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                connection.open()
+                connection.send_messages([message])
+                return {"sent": True, "attempts": attempts, "error": ""}
+            except Exception as exc:
+                if not is_transient_email_error(exc) or attempts > self.max_retries:
+                    logger.warning("Failed to send email to %s: %s", message.to, exc)
+                    return {"sent": False, "attempts": attempts, "error": str(exc)}
+                # Kết nối có thể đã hỏng: đóng để lần thử sau mở lại
+                connection.close()
+                self._sleep(self.backoff * 2 ** (attempts - 1))
+
+
+def send_tagged_emails(tagged_messages, workers=None, batch_size=None, connection=None):
+    """
+    Gửi email theo cấu hình BILL_EMAIL_*: nhiều thread có giới hạn tốc độ và
+    gửi lại khi lỗi tạm thời nếu workers > 1, ngược lại gửi theo lô qua một
+    kết nối. Dùng chung cho drain_outbox và send_monthly_bills.
+    Args:
+        tagged_messages: iterable các cặp (tag, EmailMessage).
+        connection: kết nối cho chế độ gửi theo lô (chế độ song song tự tạo
+            mỗi thread một kết nối).
+    Returns:
+        (outcomes, summary) như ConcurrentEmailSender.send.
+    """
+    workers = workers or settings.BILL_EMAIL_WORKERS
+    if workers > 1:
+        sender = ConcurrentEmailSender(
+            workers,
+            rate_limit=settings.BILL_EMAIL_RATE_LIMIT,
+            max_retries=settings.BILL_EMAIL_MAX_RETRIES,
+        )
+        return sender.send(tagged_messages)
+    return send_tagged_in_batches(
+        tagged_messages, batch_size or settings.BILL_EMAIL_BATCH_SIZE, connection
+    )
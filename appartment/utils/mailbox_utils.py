@@ -0,0 +1,156 @@
+from itertools import chain
+
+from django.db import connections
+from django.db.models import Q
+
+from ..constants import UserRole
+from ..models import Notification, User
+from .cursor_utils import (
+    CursorPage,
+    build_cursor_page,
+    decode_cursor,
+    keyset_filter,
+    keyset_ordering,
+)
+
+MAILBOX_ORDER_FIELD = "created_at"
+
+
+class NotificationMailbox:
+    """
+    Hộp thư thông báo gồm nhiều nhánh, mỗi nhánh là một điều kiện đơn giản
+    dùng được chỉ mục (receiver, created_at), (sender, created_at), ...
+    thay cho một WHERE ... OR ... OR ... phải quét cả bảng.
+
+    Dùng như một QuerySet rút gọn: filter()/none() áp dụng cho mọi nhánh,
+    select_related()/annotate() áp dụng cho truy vấn lấy dòng của trang.
+    Trang được lấy theo con trỏ: mỗi nhánh chỉ đọc tối đa page_size + 1 dòng
+    theo chỉ mục, các nhánh được gộp bằng UNION rồi sắp xếp lại.
+    """
+
+    model = Notification
+
+    def __init__(self, branches, rows=None):
+        self._branches = list(branches)
+        self._rows = rows if rows is not None else Notification.objects.all()
+
+    def _clone(self, branches=None, rows=None):
+        return NotificationMailbox(
+            self._branches if branches is None else branches,
+            self._rows if rows is None else rows,
+        )
+
+    @property
+    def branches(self):
+        return list(self._branches)
+
+    @property
+    def db(self):
+        return self._rows.db
+
+    def filter(self, *args, **kwargs):
+        return self._clone(
+            branches=[branch.filter(*args, **kwargs) for branch in self._branches]
+        )
+
+    def none(self):
+        return self._clone(branches=[])
+
+    def select_related(self, *fields):
+        return self._clone(rows=self._rows.select_related(*fields))
+
+    def annotate(self, *args, **kwargs):
+        return self._clone(rows=self._rows.annotate(*args, **kwargs))
+
+    def queryset(self):
+        """
+        Toàn bộ hộp thư dưới dạng một QuerySet (pk IN (... UNION ...)).
+        """
+        if not self._branches:
+            return self._rows.none()
+        ids = [branch.values("pk") for branch in self._branches]
+        return self._rows.filter(pk__in=ids[0].union(*ids[1:]))
+
+    def page(self, cursor, page_size, descending=True, count_cap=None):
+        """
+        Lấy một trang theo con trỏ (created_at, notification_id).
+        Raise ValueError nếu cursor không hợp lệ.
+        """
+        field = MAILBOX_ORDER_FIELD
+        direction, values = decode_cursor(cursor) if cursor else ("next", None)
+        forward = direction == "next"
+        scan_descending = descending if forward else not descending
+        ordering = keyset_ordering(field, scan_descending)
+
+        if not self._branches:
+            return CursorPage([], approx_total=0 if count_cap else None)
+
+        approx_total = None
+        if count_cap:
+            # Tổng các nhánh, mỗi nhánh đếm tối đa count_cap dòng
+            approx_total = sum(
+                branch.order_by()[: count_cap + 1].count()
+                for branch in self._branches
+            )
+
+        pk_name = Notification._meta.pk.attname
+        heads = [
+            keyset_filter(branch, field, values, scan_descending)
+            .order_by(*ordering)
+            .values_list(pk_name, field)[: page_size + 1]
+            for branch in self._branches
+        ]
+        keys = self._merge_heads(heads, field, scan_descending, page_size + 1)
+
+        rows_by_pk = self._rows.in_bulk([pk for pk, _ in keys])
+        rows = [rows_by_pk[pk] for pk, _ in keys if pk in rows_by_pk]
+        return build_cursor_page(
+            rows, page_size, field, forward, values is not None, approx_total, count_cap
+        )
+
+    def _merge_heads(self, heads, field, descending, limit):
+        """
+        Gộp đầu mỗi nhánh thành tối đa limit khóa (pk, field) đã sắp xếp.
+        CSDL hỗ trợ ORDER BY/LIMIT trong từng nhánh UNION (MySQL) thì gộp bằng
+        một truy vấn; còn lại (SQLite) chạy từng nhánh rồi gộp trong Python.
+        """
+        features = connections[self.db].features
+        if len(heads) > 1 and features.supports_slicing_ordering_in_compound:
+            prefix = "-" if descending else ""
+            pk_name = Notification._meta.pk.attname
+            union = heads[0].union(*heads[1:])
+            return list(union.order_by(f"{prefix}{field}", f"{prefix}{pk_name}")[:limit])
+
+        keys = set(chain.from_iterable(heads))
+        return sorted(keys, key=lambda key: (key[1], key[0]), reverse=descending)[
+            :limit
+        ]
+
+
+def resident_requests():
+    """
+    Điều kiện cho thông báo cư dân gửi lên hệ thống (receiver = null).
+    Lọc người gửi bằng subquery trên users thay vì JOIN sender__role.
+    """
+    return Q(
+        receiver__isnull=True,
+        is_broadcast=False,
+        sender__in=User.objects.filter(
+            role__role_name=UserRole.RESIDENT.value
+        ).values("pk"),
+    )
+
+
+def staff_mailbox(user):
+    """
+    Hộp thư của manager/admin: thông báo cư dân gửi lên hệ thống, thông báo
+    gửi riêng tới user, thông báo user đã gửi và thông báo hàng loạt tới user.
+    """
+    return NotificationMailbox(
+        [
+            Notification.objects.filter(resident_requests()),
+            Notification.objects.filter(receiver=user),
+            Notification.objects.filter(sender=user),
+            Notification.objects.filter(recipients__user=user),
+        ]
+    )
@@ -1,20 +1,37 @@
 from datetime import datetime
+from functools import partial
 
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q, Subquery
 from django.core.paginator import Paginator
 from django.utils.translation import gettext as _
 from django.contrib import messages
 from django.shortcuts import redirect
+from django.db import transaction
 
-from ..constants import DEFAULT_PAGE_SIZE, NotificationStatus, UserRole
+from ..constants import (
+    DEFAULT_PAGE_SIZE,
+    NOTIFICATION_COUNT_CAP,
+    NOTIFICATION_FANOUT_BATCH_SIZE,
+    NotificationStatus,
+    UserRole,
+)
+from ..models import Notification, NotificationRecipient, Outbox, User
+from .cursor_utils import paginate_by_cursor
+from .email_utils import iter_batches
+from .mailbox_utils import NotificationMailbox
+from .outbox_utils import build_notification_email, build_outbox_email, enqueue
+from .search_utils import build_search_document, search_notifications
+from .unread_counter_utils import increment_unread
 
 
-def filter_notifications(request, base_query):
+def filter_notifications(request, base_query, cursor_mode=False):
     """
     Helper function để lọc, tìm kiếm và phân trang thông báo.
     Args:
         request: Request object chứa các tham số GET.
         base_query: QuerySet cơ bản của thông báo theo role.
+        cursor_mode: phân trang theo con trỏ (created_at, notification_id)
+            qua tham số GET "cursor" thay cho số trang.
     Returns:
         context: chứa danh sách thông báo phân trang và context.
     """
@@ -49,26 +66,30 @@ def filter_notifications(request, base_query):
 
     # Tìm kiếm
     if search_query:
-        notifications = notifications.filter(
-            Q(title__icontains=search_query)
-            | Q(message__icontains=search_query)
-            | Q(sender__full_name__icontains=search_query)
-        )
+        notifications = search_notifications(notifications, search_query)
 
-    # Sắp xếp
-    if sort_by == "newest":
-        notifications = notifications.order_by("-created_at")
-    elif sort_by == "oldest":
-        notifications = notifications.order_by("created_at")
+    # Sắp xếp (chế độ con trỏ sắp xếp theo khóa khi lấy trang)
+    if not cursor_mode:
+        if sort_by == "newest":
+            notifications = notifications.order_by("-created_at")
+        elif sort_by == "oldest":
+            notifications = notifications.order_by("created_at")
 
     # Phân trang
-    paginator = Paginator(notifications, DEFAULT_PAGE_SIZE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    if cursor_mode:
+        page_obj = paginate_notifications_by_cursor(request, notifications, sort_by)
+    else:
+        paginator = Paginator(notifications, DEFAULT_PAGE_SIZE)
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
 
     # Thêm status_display và status_color cho từng thông báo thay vì xử lý logic ở template
     notifications_with_status = []
     for notification in page_obj:
+        # Thông báo hàng loạt: trạng thái đọc lấy theo người đang xem
+        recipient_status = getattr(notification, "recipient_status", None)
+        if recipient_status:
+            notification.status = recipient_status
         status_display = (
             _("Chưa đọc")
             if notification.status == NotificationStatus.UNREAD.value
@@ -115,6 +136,27 @@ def filter_notifications(request, base_query):
     return context
 
 
+def paginate_notifications_by_cursor(request, notifications, sort_by):
+    """
+    Trang thông báo theo con trỏ; token không hợp lệ thì quay về trang đầu.
+    notifications là QuerySet hoặc NotificationMailbox.
+    """
+    options = {
+        "page_size": DEFAULT_PAGE_SIZE,
+        "descending": sort_by != "oldest",
+        "count_cap": NOTIFICATION_COUNT_CAP,
+    }
+    if isinstance(notifications, NotificationMailbox):
+        paginate = notifications.page
+    else:
+        paginate = partial(paginate_by_cursor, notifications)
+    try:
+        return paginate(request.GET.get("cursor"), **options)
+    except ValueError:
+        messages.error(request, _("Liên kết phân trang không hợp lệ."))
+        return paginate(None, **options)
+
+
 def get_notification_redirect(user):
     """
     Trả về redirect URL dựa trên vai trò của user.
@@ -131,3 +173,245 @@ def get_notification_redirect(user):
     elif role == UserRole.ADMIN.value:
         return redirect("admin_notification_history")
     return redirect("dashboard")
+
+
+def bulk_notify(sender, receiver_ids, title, message):
+    """
+    Tạo cùng một thông báo cho các user_id đã biết bằng một bulk_create,
+    không cần tải lại người nhận; email của họ được đọc bằng một query để
+    xếp hàng email thông báo như fan_out_notification.
+    Returns:
+        số thông báo đã tạo.
+    """
+    receiver_ids = list(receiver_ids)
+    search_document = build_search_document(title, message, sender.full_name)
+    with transaction.atomic():
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    sender=sender,
+                    receiver_id=receiver_id,
+                    title=title,
+                    message=message,
+                    status=NotificationStatus.UNREAD.value,
+                    search_document=search_document,
+                )
+                for receiver_id in receiver_ids
+            ]
+        )
+        emails = User.objects.filter(user_id__in=receiver_ids).values_list(
+            "email", flat=True
+        )
+        enqueue(
+            [
+                build_outbox_email(
+                    Outbox.Kind.NOTIFICATION_EMAIL, title, message, [email]
+                )
+                for email in emails
+            ]
+        )
+        increment_unread(receiver_ids)
+    return len(receiver_ids)
+
+
+def fan_out_notification(
+    sender, receiver_ids, title, message, batch_size=NOTIFICATION_FANOUT_BATCH_SIZE
+):
+    """
+    Gửi một thông báo tới nhiều người nhận theo lô.
+    Mỗi lô chỉ cần một query để lấy người nhận (user_id__in), một bulk_create
+    thông báo và một bulk_create email trong outbox, tất cả trong một transaction.
+    Args:
+        sender: User gửi thông báo.
+        receiver_ids: iterable các user_id người nhận.
+    Returns:
+        (số thông báo đã tạo, list user_id không tồn tại).
+    """
+    receiver_ids = sorted(set(receiver_ids))
+    created = 0
+    unknown_ids = []
+
+    # bulk_create bỏ qua pre_save nên tự điền văn bản tìm kiếm
+    search_document = build_search_document(title, message, sender.full_name)
+
+    with transaction.atomic():
+        for batch_ids in iter_batches(receiver_ids, batch_size):
+            receivers = User.objects.filter(user_id__in=batch_ids).only(
+                "user_id", "email"
+            )
+            notifications = Notification.objects.bulk_create(
+                [
+                    Notification(
+                        sender=sender,
+                        receiver=receiver,
+                        title=title,
+                        message=message,
+                        status=NotificationStatus.UNREAD.value,
+                        search_document=search_document,
+                    )
+                    for receiver in receivers
+                ]
+            )
+            enqueue([build_notification_email(n) for n in notifications])
+
+            created += len(notifications)
+            found_ids = {n.receiver.user_id for n in notifications}
+            increment_unread(found_ids)
+            unknown_ids.extend(i for i in batch_ids if i not in found_ids)
+
+    return created, unknown_ids
+
+
+def addressed_to(user):
+    """
+    Điều kiện Q cho các thông báo gửi tới user: gửi riêng (receiver)
+    hoặc gửi hàng loạt có user trong danh sách người nhận.
+    """
+    return Q(receiver=user) | Q(
+        Exists(
+            NotificationRecipient.objects.filter(notification=OuterRef("pk"), user=user)
+        )
+    )
+
+
+def annotate_recipient_status(queryset, user):
+    """
+    Gắn recipient_status: trạng thái đọc của user với thông báo hàng loạt
+    (None với thông báo gửi riêng).
+    """
+    return queryset.annotate(
+        recipient_status=Subquery(
+            NotificationRecipient.objects.filter(
+                notification=OuterRef("pk"), user=user
+            ).values("status")[:1]
+        )
+    )
+
+
+def broadcast_notification(
+    sender, receiver_ids, title, message, batch_size=NOTIFICATION_FANOUT_BATCH_SIZE
+):
+    """
+    Gửi hàng loạt: nội dung thông báo chỉ lưu một dòng, mỗi người nhận là một
+    dòng NotificationRecipient nhỏ gọn. Người nhận và email được ghi theo lô
+    bằng bulk_create trong cùng một transaction.
+    Args:
+        sender: User gửi thông báo.
+        receiver_ids: iterable các user_id người nhận.
+    Returns:
+        (số người nhận đã tạo, list user_id không tồn tại).
+    """
+    receiver_ids = sorted(set(receiver_ids))
+    created = 0
+    unknown_ids = []
+
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            sender=sender,
+            receiver=None,
+            title=title,
+            message=message,
+            status=NotificationStatus.UNREAD.value,
+            is_broadcast=True,
+        )
+        for batch_ids in iter_batches(receiver_ids, batch_size):
+            receivers = list(
+                User.objects.filter(user_id__in=batch_ids).only("user_id", "email")
+            )
+            NotificationRecipient.objects.bulk_create(
+                [
+                    NotificationRecipient(notification=notification, user=receiver)
+                    for receiver in receivers
+                ]
+            )
+            enqueue(
+                [
+                    build_notification_email(notification, receiver)
+                    for receiver in receivers
+                ]
+            )
+
+            created += len(receivers)
+            found_ids = {receiver.user_id for receiver in receivers}
+            increment_unread(found_ids)
+            unknown_ids.extend(i for i in batch_ids if i not in found_ids)
+
+        if not created:
+            notification.delete()
+
+    return created, unknown_ids
+
+
+def find_broadcast_groups(window):
+    """
+    Nhóm các thông báo gửi riêng có cùng người gửi, tiêu đề, nội dung và tạo
+    cách nhau không quá window; chỉ giữ các nhóm có từ hai người nhận trở lên.
+    Returns:
+        list các nhóm, mỗi nhóm là list (notification_id, receiver_id, status)
+        theo thứ tự thời gian tạo.
+    """
+    rows = (
+        Notification.objects.filter(receiver__isnull=False)
+        .order_by("sender_id", "title", "message", "created_at", "notification_id")
+        .values_list(
+            "notification_id",
+            "sender_id",
+            "title",
+            "message",
+            "created_at",
+            "receiver_id",
+            "status",
+        )
+        .iterator()
+    )
+
+    groups = []
+    current = []
+    for row in rows:
+        if current and (
+            row[1:4] != current[0][1:4] or row[4] - current[-1][4] > window
+        ):
+            groups.append(current)
+            current = []
+        current.append(row)
+    if current:
+        groups.append(current)
+
+    return [
+        [(row[0], row[5], row[6]) for row in group]
+        for group in groups
+        if len({row[5] for row in group}) > 1
+    ]
+
+
+def merge_broadcast_groups(groups):
+    """
+    Gộp mỗi nhóm thành một thông báo hàng loạt: dòng đầu tiên giữ nội dung,
+    mỗi người nhận một dòng NotificationRecipient với trạng thái đọc của dòng
+    đầu tiên của họ; các dòng còn lại bị xóa.
+    Returns:
+        số dòng Notification đã xóa.
+    """
+    removed = 0
+    with transaction.atomic():
+        for group in groups:
+            body_id = group[0][0]
+            recipients = {}
+            for _, receiver_id, status in group:
+                recipients.setdefault(receiver_id, status)
+            NotificationRecipient.objects.bulk_create(
+                [
+                    NotificationRecipient(
+                        notification_id=body_id, user_id=user_id, status=status
+                    )
+                    for user_id, status in recipients.items()
+                ]
+            )
+            Notification.objects.filter(pk=body_id).update(
+                receiver=None, is_broadcast=True
+            )
+            Notification.objects.filter(
+                notification_id__in=[row[0] for row in group[1:]]
+            ).delete()
+            removed += len(group) - 1
+    return removed
@@ -0,0 +1,301 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from ..models import RoomMonthOccupancy, RoomResident
+from ..models.month_range import month_bounds, month_period
+
+
+def _local_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def _month_bounds(month):
+    start = _local_date(month).replace(day=1)
+    return start, start + relativedelta(months=1)
+
+
+class OccupancyIndex:
+    """
+    Chỉ mục các khoảng cư trú (RoomResident) theo phòng.
+
+    Mỗi phòng giữ danh sách lượt ở sắp xếp theo ngày vào, cùng danh sách ngày
+    vào và danh sách ngày ra (đã sắp xếp) để trả lời "ai ở phòng R trong tháng
+    M" và "bao nhiêu lượt ở trong tháng M" bằng tìm kiếm nhị phân, thay vì
+    quét lại toàn bộ cư dân của phòng cho mỗi tháng.
+
+    Một lượt ở [vào, ra] thuộc tháng M nếu ngày vào trước đầu tháng sau và
+    (chưa ra hoặc ngày ra từ đầu tháng M trở đi), so sánh theo ngày địa phương.
+    """
+
+    def __init__(self, residents):
+        stays = defaultdict(list)
+        for resident in residents:
+            stays[resident.room_id].append(
+                (
+                    _local_date(resident.move_in_date),
+                    resident.pk,
+                    _local_date(resident.move_out_date),
+                    resident,
+                )
+            )
+
+        self._stays = {}
+        self._starts = {}
+        self._ends = {}
+        for room_id, room_stays in stays.items():
+            room_stays.sort(key=lambda stay: stay[:2])
+            self._stays[room_id] = room_stays
+            self._starts[room_id] = [stay[0] for stay in room_stays]
+            self._ends[room_id] = sorted(
+                stay[2] for stay in room_stays if stay[2] is not None
+            )
+
+    @classmethod
+    def load(cls, room_ids=None, since=None, until=None):
+        """
+        Tải các lượt ở (kèm user) bằng một truy vấn.
+        Args:
+            room_ids: giới hạn trong các phòng này (None = tất cả).
+            since, until: chỉ tải các lượt ở giao với khoảng từ tháng chứa
+                since tới tháng chứa until (None = không giới hạn).
+        """
+        residents = RoomResident.objects.select_related("user")
+        if room_ids is not None:
+            residents = residents.filter(room_id__in=list(room_ids))
+        if since is not None:
+            residents = residents.filter(
+                Q(move_out_date__isnull=True)
+                | Q(move_out_date__gte=month_bounds(since)[0])
+            )
+        if until is not None:
+            residents = residents.filter(move_in_date__lt=month_bounds(until)[1])
+        return cls(residents)
+
+    @classmethod
+    def from_rooms(cls, rooms):
+        """
+        Dựng chỉ mục từ các phòng đã prefetch "residents" (không truy vấn thêm).
+        """
+        return cls(resident for room in rooms for resident in room.residents.all())
+
+    def room_ids(self):
+        """
+        Các phòng có ít nhất một lượt ở.
+        """
+        return list(self._stays)
+
+    def first_month(self, room_id):
+        """
+        Ngày đầu tháng của lượt vào sớm nhất (None nếu phòng chưa có ai ở).
+        """
+        starts = self._starts.get(room_id)
+        return starts[0].replace(day=1) if starts else None
+
+    def stays_in_month(self, room_id, month):
+        """
+        Các lượt ở của phòng giao với tháng chứa month, theo thứ tự ngày vào.
+        """
+        month_start, next_month = _month_bounds(month)
+        room_stays = self._stays.get(room_id, [])
+        # Chỉ các lượt vào trước đầu tháng sau mới có thể giao với tháng này
+        candidates = room_stays[
+            : bisect_left(self._starts.get(room_id, []), next_month)
+        ]
+        return [
+            stay[3] for stay in candidates if stay[2] is None or stay[2] >= month_start
+        ]
+
+    def residents_in_month(self, room_id, month):
+        """
+        Như stays_in_month nhưng giữ một lượt ở cho mỗi user (lượt vào sớm nhất).
+        """
+        residents = []
+        seen_user_ids = set()
+        for resident in self.stays_in_month(room_id, month):
+            if resident.user_id not in seen_user_ids:
+                residents.append(resident)
+                seen_user_ids.add(resident.user_id)
+        return residents
+
+    def count_in_month(self, room_id, month):
+        """
+        Số lượt ở giao với tháng, tính bằng hai lần tìm kiếm nhị phân:
+        (số lượt vào trước đầu tháng sau) - (số lượt đã ra trước đầu tháng).
+        """
+        month_start, next_month = _month_bounds(month)
+        started = bisect_left(self._starts.get(room_id, []), next_month)
+        ended = bisect_left(self._ends.get(room_id, []), month_start)
+        return started - ended
+
+    def stays_by_month(self, room_id, months):
+        """
+        Các lượt ở của phòng cho từng tháng, tính bằng một lượt quét: duyệt các
+        tháng tăng dần, thêm các lượt vừa vào và bỏ các lượt đã ra trước đầu
+        tháng, thay vì tra lại từ đầu cho mỗi tháng.
+        Returns:
+            dict {month: [RoomResident]} (cùng thứ tự với stays_in_month).
+        """
+        room_stays = self._stays.get(room_id, [])
+        result = {}
+        active = []
+        next_stay = 0
+        for month in sorted(set(months)):
+            month_start, next_month = _month_bounds(month)
+            while next_stay < len(room_stays) and room_stays[next_stay][0] < next_month:
+                active.append(room_stays[next_stay])
+                next_stay += 1
+            active = [
+                stay for stay in active if stay[2] is None or stay[2] >= month_start
+            ]
+            result[month] = [stay[3] for stay in active]
+        return result
+
+    def residents_by_month(self, room_ids, months, unique_users=True):
+        """
+        Tra hàng loạt cho mọi cặp phòng × tháng.
+        Returns:
+            dict {(room_id, month): [RoomResident]}.
+        """
+        lookup = self.residents_in_month if unique_users else self.stays_in_month
+        return {
+            (room_id, month): lookup(room_id, month)
+            for room_id in room_ids
+            for month in months
+        }
+
+
+def refresh_room_occupancy(room_ids=None, since=None, until=None):
+    """
+    Tính lại bảng RoomMonthOccupancy từ RoomResident.
+
+    Mỗi phòng có một dòng cho mọi tháng từ lượt vào đầu tiên (hoặc since) tới
+    until, kể cả tháng không có ai ở, để "chưa có dòng" nghĩa là "chưa tính".
+    Gọi khi cư dân vào/rời phòng và từ lệnh rebuild_room_occupancy.
+    Args:
+        room_ids: chỉ tính lại các phòng này (None = tất cả).
+        since: chỉ tính lại từ tháng chứa since (None = từ lượt vào đầu tiên).
+        until: tính tới tháng chứa until (mặc định: tháng hiện tại, hoặc tháng
+            xa nhất đã có trong bảng nếu lớn hơn).
+    Returns:
+        list RoomMonthOccupancy đã ghi.
+    """
+    if room_ids is not None:
+        room_ids = list(room_ids)
+    existing = RoomMonthOccupancy.objects.all()
+    if room_ids is not None:
+        existing = existing.filter(room_id__in=room_ids)
+    if since is not None:
+        since = _local_date(since).replace(day=1)
+        existing = existing.filter(period__gte=month_period(since))
+
+    if until is None:
+        until = _local_date(timezone.now()).replace(day=1)
+        latest = existing.aggregate(latest=Max("period"))["latest"]
+        if latest and latest > month_period(until):
+            until = until.replace(year=latest // 100, month=latest % 100)
+    else:
+        until = _local_date(until).replace(day=1)
+
+    index = OccupancyIndex.load(room_ids)
+    rows = []
+    for room_id in index.room_ids():
+        month = index.first_month(room_id)
+        if since is not None and since > month:
+            month = since
+        while month <= until:
+            residents = index.residents_in_month(room_id, month)
+            rows.append(
+                RoomMonthOccupancy(
+                    room_id=room_id,
+                    period=month_period(month),
+                    resident_count=len(residents),
+                    resident_ids=[resident.user_id for resident in residents],
+                )
+            )
+            month += relativedelta(months=1)
+
+    with transaction.atomic():
+        existing.filter(period__lte=month_period(until)).delete()
+        RoomMonthOccupancy.objects.bulk_create(rows, batch_size=1000)
+    return rows
+
+
+def refresh_stay_occupancy(instance, previous=None):
+    """
+    Tính lại bảng sau khi một lượt ở được lưu/xóa (gọi từ signal).
+
+    Dùng giá trị đã lưu của lượt ở (move_in_date là auto_now_add nên có thể
+    khác giá trị trong request) cùng giá trị lúc nạp: các phòng cũ/mới được
+    tính lại từ tháng sớm nhất trong các ngày vào/ra cũ và mới.
+    Args:
+        instance: RoomResident vừa lưu/xóa.
+        previous: (room_id, move_in_date, move_out_date) lúc nạp, nếu có.
+    """
+    room_ids = {instance.room_id}
+    dates = [instance.move_in_date, instance.move_out_date]
+    if previous:
+        room_ids.add(previous[0])
+        dates.extend(previous[1:])
+    dates = [_local_date(value) for value in dates if value is not None]
+    room_ids.discard(None)
+    if room_ids and dates:
+        refresh_room_occupancy(room_ids, since=min(dates))
+
+
+def occupied_rooms_filter(month):
+    """
+    Điều kiện Q chọn các phòng có người ở trong tháng, chỉ đọc (dùng được
+    trong request GET): tra bảng RoomMonthOccupancy nếu tháng đã được tính,
+    ngược lại đếm trong bộ nhớ từ RoomResident. Bảng chỉ được ghi bởi signal
+    và lệnh rebuild_room_occupancy.
+    """
+    period = month_period(month)
+    if RoomMonthOccupancy.objects.filter(period=period).exists():
+        return Q(
+            Exists(
+                RoomMonthOccupancy.objects.filter(
+                    room=OuterRef("pk"), period=period, resident_count__gt=0
+                )
+            )
+        )
+    index = OccupancyIndex.load(since=month, until=month)
+    return Q(
+        pk__in=[
+            room_id
+            for room_id in index.room_ids()
+            if index.count_in_month(room_id, month)
+        ]
+    )
+
+
+def get_month_occupancy(room_id, month):
+    """
+    Dòng RoomMonthOccupancy của phòng trong tháng. Nếu chưa có, tính trong bộ
+    nhớ và trả về một dòng chưa lưu (không ghi bảng).
+    """
+    period = month_period(month)
+    occupancy = RoomMonthOccupancy.objects.filter(
+        room_id=room_id, period=period
+    ).first()
+    if occupancy is None:
+        index = OccupancyIndex.load([room_id], since=month, until=month)
+        residents = index.residents_in_month(room_id, month)
+        occupancy = RoomMonthOccupancy(
+            room_id=room_id,
+            period=period,
+            resident_count=len(residents),
+            resident_ids=[resident.user_id for resident in residents],
+        )
+    return occupancy
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..constants import (
+    OUTBOX_CLAIM_TIMEOUT_MINUTES,
+    OUTBOX_MAX_ATTEMPTS,
+    StringLength,
+)
+from ..models import Outbox, RoomResident
+from .email_utils import (
+    build_email_message,
+    get_bill_email_template,
+    render_bill_email,
+    send_tagged_emails,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_outbox_email(kind, subject, body, to, html=None):
+    """
+    Tạo (chưa lưu) một mục Outbox chứa email cần gửi.
+    """
+    return Outbox(
+        kind=kind,
+        # str(): tiêu đề có thể là chuỗi dịch lazy, không tuần tự hóa JSON được
+        payload={
+            "subject": str(subject),
+            "body": str(body),
+            "html": html,
+            "to": list(to),
+        },
+    )
+
+
+def enqueue(items, ignore_conflicts=False):
+    """
+    Lưu các mục Outbox bằng một câu bulk_create. Gọi trong cùng transaction
+    với dữ liệu nghiệp vụ để email chỉ được xếp hàng khi dữ liệu đã commit.
+    Args:
+        ignore_conflicts: bỏ qua các mục có dedupe_key đã tồn tại (khi đó
+            các mục trả về không có khóa chính).
+    """
+    return Outbox.objects.bulk_create(items, ignore_conflicts=ignore_conflicts)
+
+
+def bill_email_version(bill):
+    """
+    Dấu vân tay các số tiền và hạn thanh toán của hóa đơn: hóa đơn được tạo
+    lại với cùng số liệu giữ nguyên phiên bản, hóa đơn được sửa có phiên bản mới.
+    """
+    amounts = [
+        Decimal(str(amount or 0)).quantize(Decimal("0.01"))
+        for amount in (
+            bill.electricity_amount,
+            bill.water_amount,
+            bill.additional_service_amount,
+            bill.total_amount,
+        )
+    ]
+    due_date = bill.due_date
+    if isinstance(due_date, datetime):
+        due_date = timezone.localdate(due_date)
+    fingerprint = "|".join([*map(str, amounts), str(due_date or "")])
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:12]
+
+
+def bill_email_prefix(bill_id):
+    return f"{Outbox.Kind.BILL_EMAIL}:{bill_id}:"
+
+
+def bill_email_dedupe_key(bill, user_id):
+    return f"{bill_email_prefix(bill.pk)}{user_id}:{bill_email_version(bill)}"
+
+
+def build_notification_email(notification, receiver=None):
+    """
+    Mục Outbox gửi email cho người nhận của một thông báo.
+    Với thông báo gửi hàng loạt, truyền receiver là người nhận cụ thể.
+    """
+    receiver = receiver or notification.receiver
+    return build_outbox_email(
+        Outbox.Kind.NOTIFICATION_EMAIL,
+        notification.title,
+        notification.message,
+        [receiver.email],
+    )
+
+
+def enqueue_bill_emails(bills, month):
+    """
+    Xếp hàng email hóa đơn cho các cư dân đang ở của từng hóa đơn.
+    Cư dân và user được tải bằng một query cho tất cả các hóa đơn. Mỗi cặp
+    (hóa đơn, cư dân) chỉ được xếp hàng một lần cho mỗi phiên bản số liệu của
+    hóa đơn (dedupe_key); email chưa gửi của phiên bản cũ bị thay thế.
+    Args:
+        bills: các Bill vừa tạo/cập nhật (đã có khóa chính).
+        month: ngày đầu tháng của hóa đơn.
+    """
+    bills_by_room = {bill.room_id: bill for bill in bills}
+    if not bills_by_room:
+        return []
+    residents = (
+        RoomResident.objects.filter(
+            room_id__in=list(bills_by_room), move_out_date__isnull=True
+        )
+        .select_related("user")
+        .order_by("room_resident_id")
+    )
+    template = get_bill_email_template()
+    items = [
+        Outbox(
+            kind=Outbox.Kind.BILL_EMAIL,
+            payload=render_bill_email(
+                bills_by_room[resident.room_id], resident.user, template, month
+            ),
+            dedupe_key=bill_email_dedupe_key(
+                bills_by_room[resident.room_id], resident.user_id
+            ),
+        )
+        for resident in residents
+    ]
+    # Hóa đơn được sửa: email chờ gửi với số liệu cũ không còn đúng
+    Outbox.objects.filter(
+        reduce(
+            or_,
+            (
+                Q(dedupe_key__startswith=bill_email_prefix(bill.pk))
+                for bill in bills_by_room.values()
+            ),
+        ),
+        kind=Outbox.Kind.BILL_EMAIL,
+        status=Outbox.OutboxStatus.PENDING,
+    ).exclude(dedupe_key__in=[item.dedupe_key for item in items]).delete()
+    # Tạo lại hóa đơn với cùng số liệu không xếp hàng thêm email cho cùng người
+    return enqueue(items, ignore_conflicts=True)
+
+
+def _retry_delay(attempts):
+    # Chờ 1, 2, 4, 8... phút giữa các lần gửi lại
+    return timedelta(minutes=2 ** (attempts - 1))
+
+
+def _claim_batch(batch_size):
+    """
+    Nhận một lô email bằng SELECT ... FOR UPDATE SKIP LOCKED rồi đánh dấu
+    SENDING và commit ngay, nên khóa dòng chỉ giữ trong thời gian nhận.
+    Dòng SENDING quá OUTBOX_CLAIM_TIMEOUT_MINUTES (tiến trình drain bị dừng
+    trước khi ghi kết quả) được nhận lại.
+    """
+    now = timezone.now()
+    stale = now - timedelta(minutes=OUTBOX_CLAIM_TIMEOUT_MINUTES)
+    with transaction.atomic():
+        items = list(
+            Outbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Outbox.OutboxStatus.PENDING, available_at__lte=now)
+                | Q(status=Outbox.OutboxStatus.SENDING, claimed_at__lt=stale)
+            )
+            .order_by("outbox_id")[:batch_size]
+        )
+        for item in items:
+            item.status = Outbox.OutboxStatus.SENDING
+            item.claimed_at = now
+            item.attempts += 1
+        Outbox.objects.bulk_update(items, ["status", "claimed_at", "attempts"])
+    return items
+
+
+def drain_outbox_batch(batch_size, connection=None):
+    """
+    Nhận và gửi một lô email đang chờ.
+
+    Ba bước tách biệt: nhận lô (transaction ngắn), gửi SMTP ngoài transaction,
+    rồi ghi kết quả trong một transaction ngắn khác. Nhiều tiến trình drain có
+    thể chạy song song mà không nhận trùng, và SMTP chậm không giữ khóa dòng.
+    Email được gửi qua send_tagged_emails (một kết nối, hoặc nhiều thread có
+    giới hạn tốc độ theo BILL_EMAIL_*).
+    Returns:
+        dict gồm "claimed", "sent" và "failed".
+    """
+    summary = {"claimed": 0, "sent": 0, "failed": 0}
+    items = _claim_batch(batch_size)
+    summary["claimed"] = len(items)
+    if not items:
+        return summary
+
+    # Mỗi lượt send_messages() một email (vẫn trên cùng một kết nối) để biết
+    # chính xác email nào lỗi, không xếp lại cả lô đã gửi được một phần
+    outcomes, _ = send_tagged_emails(
+        ((item, build_email_message(item.payload)) for item in items),
+        batch_size=1,
+        connection=connection,
+    )
+    for outcome in outcomes:
+        item = outcome["tag"]
+        if outcome["sent"]:
+            item.status = Outbox.OutboxStatus.SENT
+            item.sent_at = timezone.now()
+            item.last_error = ""
+            summary["sent"] += 1
+            continue
+        logger.warning("Outbox #%s failed: %s", item.pk, outcome["error"])
+        item.last_error = outcome["error"][: StringLength.DESCRIPTION.value]
+        if item.attempts >= OUTBOX_MAX_ATTEMPTS:
+            item.status = Outbox.OutboxStatus.FAILED
+        else:
+            item.status = Outbox.OutboxStatus.PENDING
+            item.available_at = timezone.now() + _retry_delay(item.attempts)
+        summary["failed"] += 1
+
+    with transaction.atomic():
+        Outbox.objects.bulk_update(
+            items, ["status", "available_at", "last_error", "sent_at"]
+        )
+    return summary
+
+
+def drain_outbox(batch_size, max_batches=None, connection=None):
+    """
+    Gửi các lô email đang chờ cho đến khi hết (hoặc đạt max_batches).
+    """
+    totals = {"claimed": 0, "sent": 0, "failed": 0, "batches": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        summary = drain_outbox_batch(batch_size, connection=connection)
+        if not summary["claimed"]:
+            break
+        totals["batches"] += 1
+        for key in ("claimed", "sent", "failed"):
+            totals[key] += summary[key]
+    return totals
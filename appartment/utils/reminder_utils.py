@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from ..constants import (
+    MONTH_YEAR_FORMAT,
+    NOTIFICATION_FANOUT_BATCH_SIZE,
+    NotificationStatus,
+    PaymentStatus,
+)
+from ..models import Bill, Notification, RoomResident
+from .email_utils import iter_batches
+from .search_utils import build_search_document
+from .unread_counter_utils import increment_unread
+
+
+def get_overdue_bills(today, bill_ids=None):
+    """
+    Hóa đơn chưa thanh toán đã quá hạn, kèm phòng, cư dân đang ở và user
+    của họ (tải trong số query cố định).
+    Args:
+        today: ngày dùng để xác định quá hạn (due_date < today).
+        bill_ids: chỉ lấy các hóa đơn được chọn (None = mọi hóa đơn quá hạn).
+    """
+    active_residents = Prefetch(
+        "room__residents",
+        queryset=RoomResident.objects.filter(move_out_date__isnull=True)
+        .select_related("user")
+        .order_by("room_resident_id"),
+        to_attr="active_residents",
+    )
+    bills = Bill.objects.filter(
+        status=PaymentStatus.UNPAID.value, due_date__lt=today
+    )
+    if bill_ids is not None:
+        bills = bills.filter(pk__in=bill_ids)
+    return (
+        bills.select_related("room")
+        .prefetch_related(active_residents)
+        .order_by("bill_id")
+    )
+
+
+def build_reminder_notifications(bills, sender):
+    """
+    Dựng (chưa lưu) thông báo nhắc thanh toán cho từng cư dân đang ở
+    của mỗi hóa đơn.
+    """
+    notifications = []
+    for bill in bills:
+        title = (
+            f"Nhắc nhở thanh toán hóa đơn tháng "
+            f"{timezone.localtime(bill.bill_month).strftime(MONTH_YEAR_FORMAT)}"
+        )
+        for resident in bill.room.active_residents:
+            message = (
+                f"Chào {resident.user.full_name},\n\n"
+                f"Hệ thống ghi nhận hóa đơn #{bill.bill_id} cho phòng "
+                f"{bill.room.description} với tổng số tiền "
+                f"{bill.total_amount:,.0f} VNĐ đã quá hạn thanh toán.\n\n"
+                f"Vui lòng thanh toán sớm. Cảm ơn bạn."
+            )
+            notifications.append(
+                Notification(
+                    sender=sender,
+                    receiver=resident.user,
+                    title=title,
+                    message=message,
+                    status=NotificationStatus.UNREAD.value,
+                    search_document=build_search_document(
+                        title, message, sender.full_name
+                    ),
+                )
+            )
+    return notifications
+
+
+def send_payment_reminders(
+    sender, bill_ids=None, today=None, batch_size=NOTIFICATION_FANOUT_BATCH_SIZE
+):
+    """
+    Gửi thông báo nhắc thanh toán cho cư dân của các hóa đơn quá hạn.
+    Thông báo được ghi bằng bulk_create theo lô trong một transaction.
+    Args:
+        sender: User (quản lý) gửi thông báo.
+        bill_ids: các hóa đơn được chọn (None = mọi hóa đơn quá hạn).
+        today: ngày xét quá hạn, mặc định là hôm nay.
+    Returns:
+        (số hóa đơn quá hạn được nhắc, số thông báo đã tạo).
+    """
+    today = today or timezone.localdate()
+    bills = list(get_overdue_bills(today, bill_ids))
+    notifications = build_reminder_notifications(bills, sender)
+
+    with transaction.atomic():
+        for batch in iter_batches(notifications, batch_size):
+            Notification.objects.bulk_create(batch)
+            increment_unread([n.receiver_id for n in batch])
+
+    return len(bills), len(notifications)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from ..constants import UserRole
+from ..models import User
+
+ROLE_MEMBERS_CACHE_KEY = "appartment:role_members:{role_name}"
+
+
+def _cache_key(role_name):
+    return ROLE_MEMBERS_CACHE_KEY.format(role_name=role_name)
+
+
+def get_role_member_ids(role_name):
+    """
+    Danh sách user_id đang hoạt động thuộc một role, lưu trong cache framework.
+    Cache được xóa khi user hoặc role thay đổi (xem signals); với cache riêng
+    của từng tiến trình (LocMemCache) tiến trình khác chỉ thấy thay đổi sau
+    tối đa ROLE_MEMBERS_CACHE_TIMEOUT giây.
+    """
+    key = _cache_key(role_name)
+    member_ids = cache.get(key)
+    if member_ids is None:
+        member_ids = list(
+            User.objects.filter(role__role_name=role_name, is_active=True)
+            .order_by("user_id")
+            .values_list("user_id", flat=True)
+        )
+        cache.set(key, member_ids, settings.ROLE_MEMBERS_CACHE_TIMEOUT)
+    return member_ids
+
+
+def invalidate_role_members():
+    """
+    Xóa cache thành viên của mọi role.
+    """
+    cache.delete_many([_cache_key(role.value) for role in UserRole])
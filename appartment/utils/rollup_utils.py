@@ -0,0 +1,130 @@
+from datetime import datetime
+
+from django.db import connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from ..constants import PaymentStatus
+from ..models import Bill, MonthlyBillingRollup
+from ..models.month_range import month_bounds
+from .dashboard_utils import invalidate_manager_dashboard
+
+ROLLUP_FIELDS = [
+    "bill_count",
+    "billed_total",
+    "paid_count",
+    "paid_total",
+    "overdue_count",
+    "unpaid_amount",
+]
+
+
+def rollup_month(value):
+    """
+    Ngày đầu tháng (date, theo múi giờ hiện tại) chứa value.
+    value có thể là datetime (aware hoặc naive) hoặc date.
+    """
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def aggregate_monthly_bills(bills, now=None):
+    """
+    Gộp các hóa đơn theo tháng bằng một truy vấn GROUP BY.
+    Returns:
+        dict {ngày đầu tháng: MonthlyBillingRollup (chưa lưu)}.
+    """
+    now = now or timezone.now()
+    paid = Q(status=PaymentStatus.PAID.value)
+    overdue = Q(status=PaymentStatus.OVERDUE.value) | Q(
+        status=PaymentStatus.UNPAID.value, due_date__lt=now
+    )
+    rows = (
+        bills.annotate(month=TruncMonth("bill_month"))
+        .values("month")
+        .annotate(
+            bill_count=Count("pk"),
+            billed_total=Sum("total_amount"),
+            paid_count=Count("pk", filter=paid),
+            paid_total=Sum("total_amount", filter=paid),
+            overdue_count=Count("pk", filter=overdue),
+            unpaid_amount=Sum("total_amount", filter=~paid),
+        )
+        .order_by()
+    )
+    rollups = {}
+    for row in rows:
+        month = rollup_month(row.pop("month"))
+        rollups[month] = MonthlyBillingRollup(
+            month=month, **{field: row[field] or 0 for field in ROLLUP_FIELDS}
+        )
+    return rollups
+
+
+def _save_rollups(rollups):
+    # Upsert một câu; MySQL không nhận unique_fields (ON DUPLICATE KEY UPDATE)
+    features = connections[MonthlyBillingRollup.objects.db].features
+    MonthlyBillingRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=(
+            ["month"] if features.supports_update_conflicts_with_target else None
+        ),
+        update_fields=ROLLUP_FIELDS + ["updated_at"],
+    )
+
+
+def refresh_monthly_rollups(months, now=None):
+    """
+    Tính lại dòng tổng hợp của các tháng được chỉ định từ bảng bills.
+
+    Chỉ đọc hóa đơn của các tháng đó (theo khoảng bill_month) nên chi phí
+    không phụ thuộc vào tổng số hóa đơn. Gọi từ signal của Bill
+    và sau các thao tác hàng loạt (bulk_create/bulk_update) bỏ qua signal.
+    Args:
+        months: các giá trị date/datetime; mỗi giá trị đại diện cho tháng chứa nó.
+        now: mốc tính quá hạn (mặc định timezone.now()).
+    Returns:
+        list MonthlyBillingRollup đã lưu, theo thứ tự tháng.
+    """
+    months = sorted({rollup_month(month) for month in months if month})
+    if not months:
+        return []
+
+    aggregated = aggregate_monthly_bills(Bill.objects.for_months(months), now)
+
+    # Tháng không còn hóa đơn nào được ghi về 0 thay vì giữ số cũ
+    rollups = [
+        aggregated.get(month) or MonthlyBillingRollup(month=month) for month in months
+    ]
+    _save_rollups(rollups)
+    return rollups
+
+
+def rebuild_rollups(since=None, now=None):
+    """
+    Dựng lại toàn bộ bảng tổng hợp (hoặc từ tháng since trở đi).
+
+    Dùng cho lần chạy hằng đêm: ngoài việc sửa sai lệch, nó cập nhật
+    overdue_count của các hóa đơn vừa quá hạn mà không có lần lưu nào.
+    Returns:
+        list MonthlyBillingRollup đã lưu, theo thứ tự tháng.
+    """
+    bills = Bill.objects.all()
+    rollups = MonthlyBillingRollup.objects.all()
+    if since:
+        since = rollup_month(since)
+        bills = bills.filter(bill_month__gte=month_bounds(since)[0])
+        rollups = rollups.filter(month__gte=since)
+
+    aggregated = aggregate_monthly_bills(bills, now)
+    with transaction.atomic():
+        rollups.exclude(month__in=list(aggregated)).delete()
+        _save_rollups(list(aggregated.values()))
+    # overdue_count vừa đổi mà không có lần lưu Bill nào phát signal
+    invalidate_manager_dashboard()
+    return [aggregated[month] for month in sorted(aggregated)]
@@ -0,0 +1,89 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.paginator import Paginator
+
+from ..constants import HISTORY_PER_PAGE_MAX
+from ..models.month_range import month_bounds
+from .occupancy_utils import OccupancyIndex
+
+
+def history_months(start, end=None):
+    """
+    Danh sách ngày đầu tháng từ tháng chứa end (mặc định hôm nay) lùi về
+    tháng chứa start, mới nhất trước.
+    """
+    month = start.replace(day=1)
+    end = (end or date.today()).replace(day=1)
+    months = []
+    while month <= end:
+        months.append(month)
+        month += relativedelta(months=1)
+    months.reverse()
+    return months
+
+
+def prices_by_month(prices, months):
+    """
+    Giá thuê áp dụng cho từng tháng: giá có hiệu lực muộn nhất tính tới hết
+    tháng (theo ngày địa phương).
+
+    Gộp hai dãy đã sắp xếp (các tháng và các lần đổi giá) trong một lượt
+    thay vì truy vấn giá cho từng tháng.
+    Args:
+        prices: các RentalPrice theo effective_date tăng dần.
+        months: các ngày đầu tháng (thứ tự bất kỳ).
+    Returns:
+        dict {month: Decimal hoặc None nếu chưa có giá}.
+    """
+    result = {}
+    current = None
+    position = 0
+    for month in sorted(set(months)):
+        next_month = month_bounds(month)[1]
+        while position < len(prices) and prices[position].effective_date < next_month:
+            current = prices[position].price
+            position += 1
+        result[month] = current
+    return result
+
+
+def build_room_history(room_id, months, prices):
+    """
+    Dòng lịch sử (tháng | giá | số cư dân | danh sách cư dân) cho các tháng
+    được chỉ định, giữ nguyên thứ tự của months.
+
+    Chỉ tải các lượt ở giao với khoảng tháng này nên gọi cho một trang lịch
+    sử không phụ thuộc vào tuổi của phòng.
+    """
+    if not months:
+        return []
+
+    occupancy = OccupancyIndex.load([room_id], since=min(months), until=max(months))
+    stays = occupancy.stays_by_month(room_id, months)
+    price_of = prices_by_month(prices, months)
+
+    history = []
+    for month in months:
+        residents = [
+            {"full_name": res.user.full_name, "user_id": res.user.user_id}
+            for res in stays[month]
+        ]
+        history.append(
+            {
+                "month": month,
+                "number_of_residents": len(residents),
+                "residents": residents,
+                "price": price_of[month],
+            }
+        )
+    return history
+
+
+def room_history_page(room_id, months, prices, page_number):
+    """
+    Phân trang danh sách tháng trước, rồi chỉ dựng lịch sử cho trang được yêu cầu.
+    """
+    page = Paginator(months, HISTORY_PER_PAGE_MAX).get_page(page_number)
+    page.object_list = build_room_history(room_id, list(page.object_list), prices)
+    return page
@@ -0,0 +1,92 @@
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+# Độ dài token của parser ngram trong MySQL (ngram_token_size mặc định)
+MYSQL_NGRAM_TOKEN_SIZE = 2
+
+WORD_RE = re.compile(r"\w+")
+
+
+def fold_text(text):
+    """
+    Chuẩn hóa chuỗi tiếng Việt để tìm kiếm: bỏ dấu, đổi đ -> d, chữ thường
+    và chỉ giữ lại các từ (ngăn cách bởi một khoảng trắng).
+    """
+    text = (text or "").replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def build_search_document(title, message, sender_name):
+    """
+    Văn bản được đánh chỉ mục của một thông báo; tên người gửi luôn ở cuối.
+    """
+    parts = [title, message, sender_name]
+    return fold_text(" ".join(str(part) for part in parts if part))
+
+
+def notification_search_document(notification):
+    return build_search_document(
+        notification.title, notification.message, notification.sender.full_name
+    )
+
+
+def search_notifications(queryset, query):
+    """
+    Lọc thông báo theo từ khóa qua chỉ mục toàn văn trên search_document:
+    FULLTEXT (ngram) trên MySQL, FTS5 trên SQLite, các CSDL khác dùng LIKE.
+    Mọi từ khóa đều phải xuất hiện (AND), so khớp không phân biệt dấu.
+    """
+    terms = fold_text(query).split()
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "mysql":
+        # Từ ngắn hơn token ngram không có trong chỉ mục, lọc bằng LIKE
+        indexed = [t for t in terms if len(t) >= MYSQL_NGRAM_TOKEN_SIZE]
+        terms = [t for t in terms if len(t) < MYSQL_NGRAM_TOKEN_SIZE]
+        if indexed:
+            queryset = queryset.filter(
+                pk__in=RawSQL(
+                    "SELECT notification_id FROM notifications "
+                    "WHERE MATCH(search_document) AGAINST (%s IN BOOLEAN MODE)",
+                    [" ".join(f'+"{term}"' for term in indexed)],
+                )
+            )
+    elif vendor == "sqlite":
+        queryset = queryset.filter(
+            pk__in=RawSQL(
+                "SELECT rowid FROM notifications_fts WHERE notifications_fts MATCH %s",
+                [" AND ".join(f'"{term}"*' for term in terms)],
+            )
+        )
+        terms = []
+
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+    return queryset
+
+
+def refresh_search_documents(notifications, batch_size=1000):
+    """
+    Tính lại search_document cho các thông báo (vd. khi người gửi đổi tên).
+    Returns:
+        số thông báo đã cập nhật.
+    """
+    changed = []
+    for notification in notifications.select_related("sender").iterator(
+        chunk_size=batch_size
+    ):
+        document = notification_search_document(notification)
+        if notification.search_document != document:
+            notification.search_document = document
+            changed.append(notification)
+    notifications.model.objects.bulk_update(
+        changed, ["search_document"], batch_size=batch_size
+    )
+    return len(changed)
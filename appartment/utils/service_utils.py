@@ -0,0 +1,85 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from ..models import AdditionalService, SystemSettings
+
+SERVICE_CATALOG_VERSION_KEY = "SERVICE_CATALOG_VERSION"
+
+
+class ServiceCatalog:
+    """
+    Cache trong tiến trình của bảng AdditionalService.
+
+    Danh mục được giữ trong bộ nhớ cùng với một "phiên bản" lưu trong bảng
+    system_settings (dùng chung cho mọi tiến trình, không phụ thuộc backend
+    cache). Mỗi khi dịch vụ được lưu/xóa (signal), phiên bản được đổi mới.
+    Mỗi tiến trình tin bản trong bộ nhớ tối đa SERVICE_CATALOG_TTL giây, sau đó
+    đọc lại phiên bản (một query) và tải lại danh mục nếu phiên bản đã đổi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self._services = {}
+
+    def _is_fresh(self):
+        return (
+            self._version is not None
+            and time.monotonic() - self._checked_at < settings.SERVICE_CATALOG_TTL
+        )
+
+    def _current_version(self):
+        version = (
+            SystemSettings.objects.filter(setting_key=SERVICE_CATALOG_VERSION_KEY)
+            .values_list("setting_value", flat=True)
+            .first()
+        )
+        return version or ""
+
+    def _get_services(self):
+        if self._is_fresh():
+            return self._services
+        with self._lock:
+            if not self._is_fresh():
+                version = self._current_version()
+                if version != self._version:
+                    self._services = {
+                        service.pk: service
+                        for service in AdditionalService.objects.order_by("pk")
+                    }
+                    self._version = version
+                self._checked_at = time.monotonic()
+        return self._services
+
+    def as_dict(self):
+        """
+        Trả về dict {service_id: AdditionalService}.
+        """
+        return self._get_services()
+
+    def all(self):
+        """
+        Danh sách dịch vụ theo thứ tự service_id.
+        """
+        return list(self._get_services().values())
+
+    def get(self, service_id):
+        return self._get_services().get(service_id)
+
+    def invalidate(self):
+        """
+        Đánh dấu danh mục đã cũ cho tiến trình hiện tại (ngay lập tức) và cho
+        mọi tiến trình khác (trong vòng SERVICE_CATALOG_TTL giây).
+        """
+        self._version = None
+        SystemSettings.objects.update_or_create(
+            setting_key=SERVICE_CATALOG_VERSION_KEY,
+            defaults={"setting_value": uuid.uuid4().hex},
+        )
+
+
+service_catalog = ServiceCatalog()
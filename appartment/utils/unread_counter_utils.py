@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from ..constants import NotificationStatus
+from ..models import (
+    Notification,
+    NotificationRecipient,
+    UnreadNotificationCounter,
+    User,
+)
+
+
+def count_unread(user_ids=None):
+    """
+    Đếm lại số thông báo chưa đọc từ dữ liệu gốc: thông báo gửi riêng
+    (receiver) và dòng người nhận của thông báo hàng loạt.
+    Args:
+        user_ids: giới hạn theo danh sách user_id (None = mọi user).
+    Returns:
+        dict {user_id: số chưa đọc}, chỉ gồm user có thông báo chưa đọc.
+    """
+    direct = Notification.objects.filter(
+        receiver__isnull=False, status=NotificationStatus.UNREAD.value
+    )
+    broadcast = NotificationRecipient.objects.filter(
+        status=NotificationStatus.UNREAD.value
+    )
+    if user_ids is not None:
+        direct = direct.filter(receiver_id__in=user_ids)
+        broadcast = broadcast.filter(user_id__in=user_ids)
+
+    counts = {}
+    for user_id, total in direct.values_list("receiver_id").annotate(
+        total=Count("pk")
+    ):
+        counts[user_id] = counts.get(user_id, 0) + total
+    for user_id, total in broadcast.values_list("user_id").annotate(
+        total=Count("pk")
+    ):
+        counts[user_id] = counts.get(user_id, 0) + total
+    return counts
+
+
+def count_total_unread():
+    """
+    Tổng số thông báo chưa đọc của mọi người nhận. Dòng nội dung của thông
+    báo hàng loạt không được đếm: trạng thái đọc nằm ở NotificationRecipient.
+    """
+    direct = Notification.objects.filter(
+        receiver__isnull=False, status=NotificationStatus.UNREAD.value
+    ).count()
+    broadcast = NotificationRecipient.objects.filter(
+        status=NotificationStatus.UNREAD.value
+    ).count()
+    return direct + broadcast
+
+
+def get_unread_count(user):
+    """
+    Số thông báo chưa đọc của user, đọc từ bảng bộ đếm (một query theo khóa
+    chính). Nếu user chưa có bộ đếm thì đếm lại một lần và lưu lại.
+    """
+    counter = UnreadNotificationCounter.objects.filter(user_id=user.pk).first()
+    if counter is not None:
+        return counter.unread_count
+
+    unread_count = count_unread([user.pk]).get(user.pk, 0)
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=user.pk, unread_count=unread_count)],
+        ignore_conflicts=True,
+    )
+    return unread_count
+
+
+def increment_unread(user_ids):
+    """
+    Tăng bộ đếm của các user vừa nhận thêm thông báo; mỗi lần user_id xuất
+    hiện là một thông báo mới (user nhận hai thông báo thì truyền hai lần).
+    Gồm một INSERT ... bỏ qua trùng cho user chưa có bộ đếm và một UPDATE cho
+    mỗi mức tăng khác nhau (thường chỉ một).
+    """
+    counts = Counter(user_ids)
+    if not counts:
+        return
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=user_id) for user_id in counts],
+        ignore_conflicts=True,
+    )
+    ids_by_amount = defaultdict(list)
+    for user_id, amount in counts.items():
+        ids_by_amount[amount].append(user_id)
+    for amount, ids in ids_by_amount.items():
+        UnreadNotificationCounter.objects.filter(user_id__in=ids).update(
+            unread_count=F("unread_count") + amount
+        )
+
+
+def decrement_unread(user_id):
+    """
+    Giảm bộ đếm của user khi một thông báo chuyển sang đã đọc.
+    """
+    UnreadNotificationCounter.objects.filter(
+        user_id=user_id, unread_count__gt=0
+    ).update(unread_count=F("unread_count") - 1)
+
+
+def mark_all_read(user):
+    """
+    Đánh dấu mọi thông báo của user là đã đọc: một UPDATE cho thông báo gửi
+    riêng, một UPDATE cho thông báo hàng loạt và đưa bộ đếm về 0.
+    Returns:
+        số thông báo đã chuyển sang đã đọc.
+    """
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            receiver=user, status=NotificationStatus.UNREAD.value
+        ).update(status=NotificationStatus.READ.value)
+        updated += NotificationRecipient.objects.filter(
+            user=user, status=NotificationStatus.UNREAD.value
+        ).update(status=NotificationStatus.READ.value)
+        if not UnreadNotificationCounter.objects.filter(user_id=user.pk).update(
+            unread_count=0
+        ):
+            UnreadNotificationCounter.objects.bulk_create(
+                [UnreadNotificationCounter(user_id=user.pk)], ignore_conflicts=True
+            )
+    return updated
+
+
+def reconcile_unread_counters(dry_run=False):
+    """
+    So sánh bộ đếm với số đếm lại từ dữ liệu gốc và sửa các giá trị lệch.
+    Returns:
+        list (user_id, giá trị đang lưu hoặc None, giá trị đúng) của các bộ đếm lệch.
+    """
+    actual = count_unread()
+    stored = dict(
+        UnreadNotificationCounter.objects.values_list("user_id", "unread_count")
+    )
+
+    drift = []
+    for user_id in User.objects.order_by("user_id").values_list("user_id", flat=True):
+        expected = actual.get(user_id, 0)
+        if stored.get(user_id) != expected:
+            drift.append((user_id, stored.get(user_id), expected))
+
+    if drift and not dry_run:
+        with transaction.atomic():
+            UnreadNotificationCounter.objects.bulk_create(
+                [
+                    UnreadNotificationCounter(user_id=user_id)
+                    for user_id, current, _ in drift
+                    if current is None
+                ],
+                ignore_conflicts=True,
+            )
+            UnreadNotificationCounter.objects.bulk_update(
+                [
+                    UnreadNotificationCounter(user_id=user_id, unread_count=expected)
+                    for user_id, _, expected in drift
+                ],
+                ["unread_count"],
+            )
+    return drift
@@ -2,8 +2,9 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import user_passes_test
 from ...models import User, Room, Bill, Notification
-from ...constants import UserRole, RoomStatus, PaymentStatus, NotificationStatus
+from ...constants import UserRole, RoomStatus, PaymentStatus
 from ...utils.permissions import role_required
+from ...utils.unread_counter_utils import count_total_unread
 
 
 @login_required
@@ -25,9 +26,7 @@ def admin_dashboard(request, context=None):
                 status=PaymentStatus.UNPAID.value
             ).count(),
             "total_notifications": Notification.objects.count(),
-            "unread_notifications": Notification.objects.filter(
-                status=NotificationStatus.UNREAD.value
-            ).count(),
+            "unread_notifications": count_total_unread(),
         }
     )
     return render(request, "admin/dashboard.html", context)
@@ -10,9 +10,10 @@ from django.utils.translation import gettext_lazy as _
 from django.views import generic
 from django.utils import timezone
 from django.urls import reverse_lazy, reverse
+from django.db import transaction
 from django.db.models import Q, Sum
 from django.forms.models import model_to_dict
-from django.core.serializers.json import DjangoJSONEncoder
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from ...models import (
     Bill,
@@ -25,14 +26,27 @@ from ...models import (
     ElectricWaterTotal,
     BillAdditionalService,
     RentalPrice,
-    RoomResident,
-    Notification,
 )
+from ...models.month_range import month_period
 from ...utils.permissions import RoleRequiredMixin, role_required
-from ...constants import PaymentStatus, UserRole, YEAR_MONTH_DAY_FORMAT
+from ...utils.billing_utils import (
+    MonthBillingSnapshot,
+    annotate_billing_status,
+    summarize_services,
+)
+from ...utils.occupancy_utils import get_month_occupancy, occupied_rooms_filter
+from ...utils.outbox_utils import enqueue_bill_emails
+from ...utils.reminder_utils import send_payment_reminders
+from ...utils.service_utils import service_catalog
+from ...constants import (
+    PaginateNumber,
+    PaymentStatus,
+    UserRole,
+    YEAR_MONTH_DAY_FORMAT,
+)
 from ...forms.manager import bills_form
 from dateutil.relativedelta import relativedelta
-import json, decimal
+import decimal
 from datetime import datetime, date
 from collections import Counter
 
@@ -67,21 +81,13 @@ class BillingWorkspaceView(RoleRequiredMixin, generic.TemplateView):
         context["selected_month"] = month_date
         context["search_query"] = search_query
         context["billing_status_filter"] = billing_status_filter
-        previous_month_date = month_date - relativedelta(months=1)
-        start_of_bill_month = month_date
-        start_of_next_month = month_date + relativedelta(months=1)
 
         # --- LẤY VÀ LỌC DANH SÁCH PHÒNG ---
+        # Phòng có người ở trong tháng: tra bảng RoomMonthOccupancy theo
+        # (period, resident_count) thay vì quét khoảng cư trú của RoomResident
         rooms_qs = (
             Room.objects.prefetch_related("residents__user")
-            .filter(
-                # Điều kiện 1: Có người ở chuyển vào TRƯỚC KHI tháng này kết thúc
-                # Điều kiện 2: VÀ người đó chưa chuyển đi HOẶC chuyển đi SAU KHI tháng này bắt đầu
-                Q(residents__move_out_date__isnull=True)
-                | Q(residents__move_out_date__date__gte=start_of_bill_month),
-                residents__move_in_date__date__lt=start_of_next_month,
-            )
-            .distinct()
+            .filter(occupied_rooms_filter(month_date))
             .order_by("room_id")
         )
         if search_query:
@@ -91,173 +97,39 @@ class BillingWorkspaceView(RoleRequiredMixin, generic.TemplateView):
             )
 
         # --- TỔNG HỢP DỮ LIỆU HÓA ĐƠN CHO TỪNG PHÒNG ---
-        workspace_data = []
-
-        # Lấy trước tất cả dữ liệu liên quan trong tháng để tối ưu hóa
-        drafts_for_month = list(DraftBill.objects.filter(bill_month=month_date))
-        final_bills_for_month = list(
-            Bill.objects.filter(
-                bill_month__year=month_date.year, bill_month__month=month_date.month
-            )
-        )
-        today = timezone.now().date()
-        start_of_current_month = today.replace(day=1)
-        # Lấy cả chỉ số của tháng hiện tại và tháng trước
-        current_readings_list = list(
-            MonthlyMeterReading.objects.filter(service_month__date=month_date)
-        )
-        prev_readings_list = list(
-            MonthlyMeterReading.objects.filter(service_month__date=previous_month_date)
-        )
-        drafts_for_month = list(DraftBill.objects.filter(bill_month=month_date))
-
-        for room in rooms_qs:
-            # tìm trong dữ liệu đã lấy
-            ew_draft = next(
-                (
-                    d
-                    for d in drafts_for_month
-                    if d.room_id == room.pk and d.draft_type == "ELECTRIC_WATER"
-                ),
-                None,
-            )
-            services_draft = next(
-                (
-                    d
-                    for d in drafts_for_month
-                    if d.room_id == room.pk and d.draft_type == "SERVICES"
-                ),
-                None,
-            )
-            final_bill = next(
-                (b for b in final_bills_for_month if b.room_id == room.pk), None
-            )
-            current_reading = next(
-                (r for r in current_readings_list if r.room_id == room.pk), None
-            )
-            prev_reading = next(
-                (r for r in prev_readings_list if r.room_id == room.pk), None
-            )
-            historical_residents = get_historical_residents(room, month_date)
-
-            is_ready_to_finalize = False
-            if ew_draft and services_draft:
-                if (
-                    ew_draft.status == "CONFIRMED"
-                    and services_draft.status == "CONFIRMED"
-                ):
-                    is_ready_to_finalize = True
-
-            subscribed_services_summary = []
-            if (
-                services_draft
-                and services_draft.details
-                and "services" in services_draft.details
-            ):
-                services_in_draft_list = services_draft.details.get("services", [])
-
-                # Đếm số lần xuất hiện của mỗi service_id
-                service_counts = Counter(
-                    s["service_id"] for s in services_in_draft_list
-                )
-
-                # Lấy thông tin chi tiết của các dịch vụ đã có chỉ bằng một query
-                services_info_map = {
-                    s.pk: s
-                    for s in AdditionalService.objects.filter(
-                        pk__in=service_counts.keys()
-                    )
-                }
-
-                # Tạo danh sách tóm tắt cuối cùng
-                for service_id, quantity in service_counts.items():
-                    service_obj = services_info_map.get(service_id)
-                    if service_obj:
-                        subscribed_services_summary.append(
-                            {
-                                "service_id": service_id,
-                                "name": service_obj.name,
-                                "type": service_obj.type,
-                                "quantity": quantity,
-                                "total_cost": float(service_obj.unit_price * quantity),
-                            }
-                        )
-
-            billing_status = "NOT_STARTED"
-            if final_bill:
-                billing_status = "FINALIZED"
-            elif ew_draft and services_draft:
-                if (
-                    ew_draft.status == "CONFIRMED"
-                    and services_draft.status == "CONFIRMED"
-                ):
-                    billing_status = "READY_TO_FINALIZE"
-                else:
-                    billing_status = "PENDING_CONFIRMATION"
-            elif ew_draft or services_draft:
-                billing_status = "IN_PROGRESS"
-            # Tạo dictionary "an toàn" cho JavaScript
-            modal_data_for_js = {
-                "room_pk": room.pk,
-                "room_description": room.description,
-                "is_ready_to_finalize": is_ready_to_finalize,  # <-- Thêm trạng thái sẵn sàng
-                "ew_draft_pk": ew_draft.pk if ew_draft else None,
-                "ew_draft_status": ew_draft.status if ew_draft else None,
-                "services_draft_pk": services_draft.pk if services_draft else None,
-                "services_draft_status": (
-                    services_draft.status if services_draft else None
-                ),
-                "final_bill_pk": final_bill.pk if final_bill else None,
-                "final_bill_status": final_bill.status if final_bill else None,
-                "billing_status": (
-                    billing_status.upper() if billing_status else "UNKNOWN"
-                ),
-                "prev_reading_index": (
-                    float(prev_reading.electricity_index) if prev_reading else 0
-                ),
-                "prev_reading_water_index": (
-                    float(prev_reading.water_index) if prev_reading else 0
-                ),
-                "current_reading_electricity": (
-                    float(current_reading.electricity_index) if current_reading else ""
-                ),
-                "current_reading_water": (
-                    float(current_reading.water_index) if current_reading else ""
-                ),
-                "subscribed_services": subscribed_services_summary,
-            }
+        # Trạng thái tổng hợp được tính trong SQL nên việc lọc và phân trang
+        # diễn ra ở database; chỉ các phòng của trang hiện tại được nạp chi tiết
+        rooms_qs = annotate_billing_status(rooms_qs, month_date)
+        if billing_status_filter:
+            rooms_qs = rooms_qs.filter(billing_status=billing_status_filter)
 
-            # Dữ liệu đầy đủ cho template Django
-            room_info = {
-                "room": room,
-                "residents": historical_residents,
-                "ew_draft": ew_draft,
-                "services_draft": services_draft,
-                "final_bill": final_bill,
-                "billing_status": billing_status,
-                "modal_data_json": json.dumps(modal_data_for_js, cls=DjangoJSONEncoder),
-            }
+        paginator = Paginator(rooms_qs, PaginateNumber.P_LONG.value)
+        page_obj = paginator.get_page(self.request.GET.get("page"))
+        page_rooms = list(page_obj.object_list)
 
-            # Xác định trạng thái tổng hợp của phòng trong tháng
+        snapshot = MonthBillingSnapshot(
+            month_date, room_ids=[room.pk for room in page_rooms]
+        )
+        workspace_data = snapshot.build_workspace_data(page_rooms)
 
-            # room_info["billing_status"] = billing_status
-            workspace_data.append(room_info)
+        # Tạo query_params cho phân trang
+        query_params = [f"month={month_date.strftime(YEAR_MONTH_DAY_FORMAT)}"]
+        if search_query:
+            query_params.append(f"q={search_query}")
+        if billing_status_filter:
+            query_params.append(f"billing_status={billing_status_filter}")
+        context["query_params"] = "&".join(query_params)
+        context["page_obj"] = page_obj
 
+        today = timezone.now().date()
         overdue_bills = Bill.objects.filter(
             status=PaymentStatus.UNPAID.value, due_date__lt=today
         ).select_related("room")
 
         context["overdue_bills"] = overdue_bills
 
-        # Lọc lần cuối dựa trên trạng thái tổng hợp (nếu có)
-        if billing_status_filter:
-            workspace_data = [
-                data
-                for data in workspace_data
-                if data["billing_status"] == billing_status_filter
-            ]
         context["workspace_data"] = workspace_data
-        context["addable_services"] = AdditionalService.objects.all()
+        context["addable_services"] = service_catalog.all()
         form_initial_data = {}
         if month_date:
             # Định dạng lại thành chuỗi YYYY-MM cho giá trị ban đầu của form
@@ -270,6 +142,42 @@ class BillingWorkspaceView(RoleRequiredMixin, generic.TemplateView):
         return context
 
 
+class BillingRoomModalDataView(RoleRequiredMixin, generic.View):
+    """
+    Trả về (JSON) dữ liệu của modal xử lý hóa đơn cho một phòng trong tháng.
+    Modal được tải theo yêu cầu thay vì nhúng sẵn cho mọi dòng của workspace.
+    """
+
+    allowed_roles = UserRole.APARTMENT_MANAGER.value
+
+    def get(self, request, room_id, *args, **kwargs):
+        room = Room.objects.filter(pk=room_id).first()
+        if room is None:
+            return JsonResponse(
+                {"status": "error", "message": _("Không tìm thấy phòng.")},
+                status=404,
+            )
+
+        try:
+            month_date = (
+                timezone.datetime.strptime(
+                    request.GET.get("month", ""), YEAR_MONTH_DAY_FORMAT
+                )
+                .date()
+                .replace(day=1)
+            )
+        except (ValueError, TypeError):
+            return JsonResponse(
+                {"status": "error", "message": _("Tháng không hợp lệ.")},
+                status=400,
+            )
+
+        snapshot = MonthBillingSnapshot(month_date, room_ids=[room.pk])
+        return JsonResponse(
+            {"status": "success", "modal_data": snapshot.build_modal_data(room)}
+        )
+
+
 class RoomBillListView(RoleRequiredMixin, generic.DetailView):
     model = Room
     template_name = "manager/bills/room_bill_list.html"
@@ -564,9 +472,7 @@ class SaveMeterReadingView(RoleRequiredMixin, generic.View):
         previous_month_date = month_date - relativedelta(months=1)
 
         # LẤY DỮ LIỆU NỀN TẢNG ĐỂ XÁC THỰC ---
-        building_total = ElectricWaterTotal.objects.filter(
-            summary_for_month__date=month_date
-        ).first()
+        building_total = ElectricWaterTotal.objects.for_month(month_date).first()
         if not building_total:
             messages.error(
                 request,
@@ -577,12 +483,8 @@ class SaveMeterReadingView(RoleRequiredMixin, generic.View):
             return redirect(redirect_url_with_month)
 
         # Lấy TẤT CẢ chỉ số của tháng trước và tháng này
-        previous_readings = MonthlyMeterReading.objects.filter(
-            service_month__date=previous_month_date
-        )
-        current_readings = MonthlyMeterReading.objects.filter(
-            service_month__date=month_date
-        )
+        previous_readings = MonthlyMeterReading.objects.for_month(previous_month_date)
+        current_readings = MonthlyMeterReading.objects.for_month(month_date)
 
         # Chuyển thành dạng dictionary để tra cứu nhanh, tránh N+1 query
         previous_readings_map = {r.room_id: r for r in previous_readings}
@@ -645,8 +547,9 @@ class SaveMeterReadingView(RoleRequiredMixin, generic.View):
         # Lưu chỉ số mới vào monthly_meter_readings
         MonthlyMeterReading.objects.update_or_create(
             room=room_to_update,
-            service_month=month_date,
+            period=month_period(month_date),
             defaults={
+                "service_month": month_date,
                 "electricity_index": new_electricity_index,
                 "water_index": new_water_index,
                 "status": "recorded",
@@ -693,9 +596,10 @@ class SaveMeterReadingView(RoleRequiredMixin, generic.View):
 
         DraftBill.objects.update_or_create(
             room=room_to_update,
-            bill_month=month_date,
+            period=month_period(month_date),
             draft_type=DraftBill.DraftType.ELECTRIC_WATER,
             defaults={
+                "bill_month": month_date,
                 "total_amount": total_ew_cost,
                 "details": details_data,
                 "status": DraftBill.DraftStatus.SENT,
@@ -837,41 +741,6 @@ def get_month_from_request(request):
         return None
 
 
-# tạo một hàm helper để tái sử dụng logic này
-def get_historical_residents(room, bill_month):
-    """
-    Lấy danh sách các đối tượng RoomResident duy nhất theo user
-    đã ở trong phòng tại tháng hóa đơn.
-    """
-    # Đảm bảo bill_month luôn là đối tượng date
-    bill_month_date = (
-        bill_month.date() if isinstance(bill_month, timezone.datetime) else bill_month
-    )
-    start_of_next_month = bill_month_date + relativedelta(months=1)
-
-    # lấy tất cả các bản ghi RoomResident hợp lệ trong tháng (có thể bị trùng user)
-    valid_resident_records = [
-        res
-        for res in room.residents.all()
-        if res.move_in_date.date() < start_of_next_month
-        and (res.move_out_date is None or res.move_out_date.date() >= bill_month_date)
-    ]
-
-    # Lọc để giữ lại duy nhất một bản ghi cho mỗi user_id
-    unique_residents = []
-    seen_user_ids = set()  # Dùng set để theo dõi các user_id đã gặp
-
-    for resident_record in valid_resident_records:
-        # Nếu user_id của bản ghi này chưa từng được thấy...
-        if resident_record.user_id not in seen_user_ids:
-            # ... thêm bản ghi này vào kết quả cuối cùng...
-            unique_residents.append(resident_record)
-            # ... đánh dấu là đã thấy user_id này.
-            seen_user_ids.add(resident_record.user_id)
-
-    return unique_residents
-
-
 class AddAdhocServiceView(RoleRequiredMixin, generic.View):
     """
     Xử lý việc thêm thủ công một dịch vụ lẻ vào hóa đơn nháp của một phòng.
@@ -907,9 +776,10 @@ class AddAdhocServiceView(RoleRequiredMixin, generic.View):
             # Tìm hoặc tạo hóa đơn nháp dịch vụ duy nhất cho phòng và tháng đó
             draft_bill, created = DraftBill.objects.get_or_create(
                 room=room,
-                bill_month=bill_month,
+                period=month_period(bill_month),
                 draft_type=DraftBill.DraftType.SERVICES,
                 defaults={
+                    "bill_month": bill_month,
                     "total_amount": 0,
                     "details": {"services": []},
                     "status": DraftBill.DraftStatus.DRAFT,
@@ -922,7 +792,7 @@ class AddAdhocServiceView(RoleRequiredMixin, generic.View):
             service_counts = Counter(s["service_id"] for s in services_in_draft)
 
             # Lấy số người ở trong tháng để kiểm tra
-            num_residents = len(get_historical_residents(room, bill_month))
+            num_residents = get_month_occupancy(room.pk, bill_month).resident_count
 
             if service_type == "PER_ROOM":
                 if service_to_add.pk in service_counts:
@@ -985,26 +855,9 @@ class AddAdhocServiceView(RoleRequiredMixin, generic.View):
 
             # Chuẩn bị dữ liệu trả về cho frontend
             # Đây là logic tổng hợp lại danh sách dịch vụ để gửi về
-            services_in_draft_list = draft_bill.details.get("services", [])
-            service_counts = Counter(s["service_id"] for s in services_in_draft_list)
-            services_info_map = {
-                s.pk: s
-                for s in AdditionalService.objects.filter(pk__in=service_counts.keys())
-            }
-
-            updated_summary = []
-            for service_id, quantity in service_counts.items():
-                service_obj = services_info_map.get(service_id)
-                if service_obj:
-                    updated_summary.append(
-                        {
-                            "service_id": service_id,
-                            "name": service_obj.name,
-                            "type": service_obj.type,
-                            "quantity": quantity,
-                            "total_cost": float(service_obj.unit_price * quantity),
-                        }
-                    )
+            updated_summary = summarize_services(
+                draft_bill.details.get("services", []), service_catalog.as_dict()
+            )
 
             return JsonResponse(
                 {
@@ -1035,35 +888,11 @@ def send_payment_reminders_view(request):
         messages.warning(request, _("Vui lòng chọn ít nhất một hóa đơn để nhắc nhở."))
         return redirect("billing_workspace")
 
-    today = timezone.now().date()
-
-    overdue_bills = Bill.objects.filter(
-        status=PaymentStatus.UNPAID.value, due_date__lt=today
-    ).select_related("room")
-
-    notifications_created_count = 0
-    for bill in overdue_bills:
-        # Tìm tất cả cư dân trong phòng của hóa đơn đó
-        residents = RoomResident.objects.filter(room=bill.room)
-        for resident in residents:
-            title = (
-                f"Nhắc nhở thanh toán hóa đơn tháng {bill.bill_month.strftime('%m/%Y')}"
-            )
-            message = (
-                f"Chào {resident.user.full_name},\n\n"
-                f"Hệ thống ghi nhận hóa đơn #{bill.bill_id} cho phòng {bill.room.description} "
-                f"với tổng số tiền {bill.total_amount:,.0f} VNĐ đã quá hạn thanh toán.\n\n"
-                f"Vui lòng thanh toán sớm. Cảm ơn bạn."
-            )
-
-            # Tạo thông báo từ Manager gửi đến Cư dân
-            Notification.objects.create(
-                sender=request.user,
-                receiver=resident.user,
-                title=title,
-                message=message,
-            )
-            notifications_created_count += 1
+    # Chỉ nhắc các hóa đơn quá hạn nằm trong danh sách được chọn
+    bill_ids = [bill_id for bill_id in bill_ids if bill_id.isdigit()]
+    notifications_created_count = send_payment_reminders(
+        request.user, bill_ids=bill_ids
+    )[1]
 
     if notifications_created_count > 0:
         messages.success(
@@ -1109,7 +938,9 @@ class GenerateFinalBillView(RoleRequiredMixin, generic.View):
 
         # Kiểm tra lại lần cuối trước khi tạo
         confirmed_drafts = DraftBill.objects.filter(
-            room=room, bill_month=month_date, status=DraftBill.DraftStatus.CONFIRMED
+            room=room,
+            period=month_period(month_date),
+            status=DraftBill.DraftStatus.CONFIRMED,
         )
 
         if confirmed_drafts.count() != 2:
@@ -1143,33 +974,39 @@ class GenerateFinalBillView(RoleRequiredMixin, generic.View):
         )
         # (Bạn có thể thêm logic tính chi phí chung ở đây)
 
-        # Tạo hóa đơn cuối cùng
-        final_bill, created = Bill.objects.update_or_create(
-            room=room,
-            bill_month=month_date,
-            defaults={
-                "electricity_amount": ew_draft.details.get("electric_cost", 0),
-                "water_amount": ew_draft.details.get("water_cost", 0),
-                "additional_service_amount": services_draft.total_amount,
-                "total_amount": total_amount,
-                "status": "unpaid",
-                "due_date": (month_date + relativedelta(months=1, days=14)),
-            },
-        )
-
-        # Tạo chi tiết dịch vụ
-        BillAdditionalService.objects.filter(bill=final_bill).delete()
-        service_records_to_create = [
-            BillAdditionalService(
-                bill=final_bill,
-                additional_service_id=s["service_id"],
+        # Hóa đơn, dịch vụ và email hóa đơn được ghi trong cùng một transaction,
+        # giống generate_final_bills
+        with transaction.atomic():
+            # Tạo hóa đơn cuối cùng
+            final_bill, created = Bill.objects.update_or_create(
                 room=room,
-                service_month=month_date,
-                status="active",
+                period=month_period(month_date),
+                defaults={
+                    "bill_month": month_date,
+                    "electricity_amount": ew_draft.details.get("electric_cost", 0),
+                    "water_amount": ew_draft.details.get("water_cost", 0),
+                    "additional_service_amount": services_draft.total_amount,
+                    "total_amount": total_amount,
+                    "status": "unpaid",
+                    "due_date": (month_date + relativedelta(months=1, days=14)),
+                },
             )
-            for s in services_draft.details.get("services", [])
-        ]
-        BillAdditionalService.objects.bulk_create(service_records_to_create)
+
+            # Tạo chi tiết dịch vụ
+            BillAdditionalService.objects.filter(bill=final_bill).delete()
+            service_records_to_create = [
+                BillAdditionalService(
+                    bill=final_bill,
+                    additional_service_id=s["service_id"],
+                    room=room,
+                    service_month=month_date,
+                    status="active",
+                )
+                for s in services_draft.details.get("services", [])
+            ]
+            BillAdditionalService.objects.bulk_create(service_records_to_create)
+
+            enqueue_bill_emails([final_bill], month_date)
 
         messages.success(
             request, _(f"Đã tạo HĐ cuối cùng thành công cho phòng {room.description}.")
@@ -9,10 +9,21 @@ from django.views.decorators.csrf import csrf_protect
 from django.db.models import Q
 from django.core.paginator import Paginator
 
-from ..models import Notification
+from ..models import Notification, NotificationRecipient
 from ..constants import NotificationStatus, UserRole
 from ..utils.permissions import role_required
-from ..utils.notification_utils import filter_notifications, get_notification_redirect
+from ..utils.notification_utils import (
+    addressed_to,
+    annotate_recipient_status,
+    filter_notifications,
+    get_notification_redirect,
+)
+from ..utils.mailbox_utils import resident_requests, staff_mailbox
+from ..utils.unread_counter_utils import (
+    decrement_unread,
+    get_unread_count,
+    mark_all_read,
+)
 
 """
 sender: ROLE_RESIDENT -> receiver: null (ROLE_ADMIN + ROLE_APARTMENT_MANAGER)
@@ -21,11 +32,16 @@ sender: ROLE_ADMIN -> receiver: ROLE_RESIDENT | ROLE_ADMIN | ROLE_MANAGER
 """
 
 
-def notification_history(request, role, base_query, template_name, filter_types=None):
+def notification_history(
+    request, role, base_query, template_name, filter_types=None, cursor_mode=False
+):
     """
     Hàm chung để hiển thị lịch sử thông báo cho các role.
+    cursor_mode: phân trang theo con trỏ cho hộp thư lớn (manager, admin).
     """
-    notifications = base_query.select_related("sender", "receiver")
+    notifications = annotate_recipient_status(
+        base_query.select_related("sender", "receiver"), request.user
+    )
 
     # Lọc theo loại thông báo
     filter_type = request.GET.get("filter_type", "all")
@@ -34,34 +50,31 @@ def notification_history(request, role, base_query, template_name, filter_types=
 
     if role == UserRole.APARTMENT_MANAGER.value and filter_type != "all":
         if filter_type == "from_resident":
-            notifications = notifications.filter(
-                receiver__isnull=True, sender__role__role_name=UserRole.RESIDENT.value
-            )
+            notifications = notifications.filter(resident_requests())
         elif filter_type == "from_admin":
             notifications = notifications.filter(
                 sender__role__role_name=UserRole.ADMIN.value
             )
         elif filter_type == "to_manager":
-            notifications = notifications.filter(receiver=request.user)
+            notifications = notifications.filter(addressed_to(request.user))
         elif filter_type == "by_manager":
             notifications = notifications.filter(sender=request.user)
     elif role == UserRole.ADMIN.value and filter_type != "all":
         if filter_type == "to_admin":
-            notifications = notifications.filter(receiver=request.user)
+            notifications = notifications.filter(addressed_to(request.user))
         elif filter_type == "by_admin":
             notifications = notifications.filter(sender=request.user)
         elif filter_type == "from_resident":
-            notifications = notifications.filter(
-                receiver__isnull=True, sender__role__role_name=UserRole.RESIDENT.value
-            )
+            notifications = notifications.filter(resident_requests())
     elif role == UserRole.RESIDENT.value and filter_type != "all":
         if filter_type == "to_me":
-            notifications = notifications.filter(receiver=request.user)
+            notifications = notifications.filter(addressed_to(request.user))
         elif filter_type == "by_me":
             notifications = notifications.filter(sender=request.user)
 
-    context = filter_notifications(request, notifications)
+    context = filter_notifications(request, notifications, cursor_mode=cursor_mode)
     context["filter_type"] = filter_type
+    context["unread_count"] = get_unread_count(request.user)
     return render(request, template_name, context)
 
 
@@ -72,7 +85,7 @@ def resident_notification_history(request):
     Hiển thị lịch sử thông báo cho người thuê.
     """
     notifications = Notification.objects.filter(
-        Q(receiver=request.user) | Q(sender=request.user)
+        addressed_to(request.user) | Q(sender=request.user)
     )
     return notification_history(
         request,
@@ -89,15 +102,9 @@ def manager_notification_history(request):
     """
     Hiển thị lịch sử thông báo cho người quản lý chung cư.
     """
-    notifications = Notification.objects.filter(
-        Q(
-            receiver__isnull=True, sender__role__role_name=UserRole.RESIDENT.value
-        )  # Từ người thuê gửi lên hệ thống
-        | Q(receiver=request.user)  # Dành riêng cho chính người quản lý
-        | Q(
-            sender=request.user
-        )  # Do chính người quản lý gửi (gán phòng, rời phòng, ...)
-    )
+    # Mỗi nhánh (từ người thuê gửi lên hệ thống, gửi riêng/hàng loạt tới
+    # người quản lý, do người quản lý gửi) là một truy vấn dùng chỉ mục riêng
+    notifications = staff_mailbox(request.user)
 
     return notification_history(
         request,
@@ -105,6 +112,7 @@ def manager_notification_history(request):
         notifications,
         "manager/notifications/history_notifications.html",
         filter_types=["from_resident", "from_admin", "to_manager", "by_manager"],
+        cursor_mode=True,
     )
 
 
@@ -114,13 +122,8 @@ def admin_notification_history(request):
     """
     Hiển thị lịch sử thông báo cho admin.
     """
-    notifications = Notification.objects.filter(
-        Q(
-            receiver__isnull=True, sender__role__role_name=UserRole.RESIDENT.value
-        )  # Từ người thuê gửi lên hệ thống
-        | Q(receiver=request.user)  # Dành riêng cho admin
-        | Q(sender=request.user)  # Do admin gửi
-    )
+    # Từ người thuê gửi lên hệ thống, gửi tới admin và do admin gửi
+    notifications = staff_mailbox(request.user)
 
     return notification_history(
         request,
@@ -128,6 +131,7 @@ def admin_notification_history(request):
         notifications,
         "admin/notifications/history_notifications.html",
         filter_types=["from_resident", "to_admin", "by_admin"],
+        cursor_mode=True,
     )
 
 
@@ -138,7 +142,26 @@ def mark_notification_read(request, notification_id):
     """
     Đánh dấu thông báo là đã đọc.
     """
-    notification = get_object_or_404(Notification, pk=notification_id)
+    # Chỉ lấy các cột cần cho kiểm tra quyền trong một query
+    notification = get_object_or_404(
+        Notification.objects.values(
+            "sender_id", "receiver_id", "is_broadcast", "sender__role__role_name"
+        ),
+        pk=notification_id,
+    )
+
+    # Thông báo hàng loạt: trạng thái đọc nằm ở dòng người nhận của user
+    if notification["is_broadcast"]:
+        is_recipient = NotificationRecipient.objects.filter(
+            notification_id=notification_id, user=request.user
+        )
+        if is_recipient.filter(status=NotificationStatus.UNREAD.value).update(
+            status=NotificationStatus.READ.value
+        ):
+            decrement_unread(request.user.pk)
+        if is_recipient.exists() or notification["sender_id"] == request.user.pk:
+            messages.success(request, _("Thông báo đã được đánh dấu là đã đọc."))
+            return get_notification_redirect(request.user)
 
     # Kiểm tra quyền truy cập thông báo
     is_admin_or_manager = request.user.role.role_name in [
@@ -147,21 +170,40 @@ def mark_notification_read(request, notification_id):
     ]
     if not (
         (
-            notification.receiver is None
-            and notification.sender.role.role_name == UserRole.RESIDENT.value
+            notification["receiver_id"] is None
+            and not notification["is_broadcast"]
+            and notification["sender__role__role_name"] == UserRole.RESIDENT.value
             and is_admin_or_manager
         )
-        or (notification.receiver == request.user)
-        or (notification.sender == request.user)
+        or (notification["receiver_id"] == request.user.pk)
+        or (notification["sender_id"] == request.user.pk)
     ):
         messages.error(request, _("Bạn không có quyền xem thông báo này."))
         return get_notification_redirect(request.user)
 
     try:
-        notification.status = NotificationStatus.READ.value
-        notification.save()
+        updated = Notification.objects.filter(
+            pk=notification_id, status=NotificationStatus.UNREAD.value
+        ).update(status=NotificationStatus.READ.value)
+        if updated and notification["receiver_id"]:
+            decrement_unread(notification["receiver_id"])
         messages.success(request, _("Thông báo đã được đánh dấu là đã đọc."))
     except Exception as e:
         messages.error(request, _("Có lỗi xảy ra khi đánh dấu thông báo: %s") % str(e))
 
     return get_notification_redirect(request.user)
+
+
+@require_POST
+@login_required
+@csrf_protect
+def mark_all_notifications_read(request):
+    """
+    Đánh dấu tất cả thông báo gửi tới user hiện tại là đã đọc.
+    """
+    updated = mark_all_read(request.user)
+    messages.success(
+        request,
+        _("Đã đánh dấu %(count)s thông báo là đã đọc.") % {"count": updated},
+    )
+    return get_notification_redirect(request.user)
@@ -9,6 +9,10 @@ from ..forms.manage.notification_form import NotificationForm
 from ..models import Notification, User
 from ..constants import UserRole, NotificationStatus
 from ..utils.permissions import role_required
+from ..utils.notification_utils import (
+    broadcast_notification,
+    fan_out_notification,
+)
 
 
 @login_required
@@ -78,22 +82,15 @@ def manager_send_notification(request):
                     _("Vui lòng chọn ít nhất một người nhận hoặc tích gửi cho tất cả."),
                 )
             else:
-                for receiver_id in receivers:
-                    try:
-                        receiver = User.objects.get(user_id=receiver_id)
-                        Notification.objects.create(
-                            sender=request.user,
-                            receiver=receiver,
-                            title=title,
-                            message=message,
-                            status=NotificationStatus.UNREAD.value,
-                        )
-                    except User.DoesNotExist:
-                        messages.error(
-                            request,
-                            _(f"Người nhận với ID {receiver_id} không tồn tại."),
-                        )
-                        continue
+                # Gửi cho tất cả: lưu nội dung một lần cho cả nhóm người nhận
+                send = broadcast_notification if send_all else fan_out_notification
+                created, unknown_ids = send(request.user, receivers, title, message)
+                if unknown_ids:
+                    messages.error(
+                        request,
+                        _("Người nhận với ID %(ids)s không tồn tại.")
+                        % {"ids": ", ".join(unknown_ids)},
+                    )
                 messages.success(request, _("Thông báo đã được gửi thành công."))
                 return redirect("manager_notification_history")
         else:
@@ -143,22 +140,15 @@ def admin_send_notification(request):
                     _("Vui lòng chọn ít nhất một người nhận hoặc tích gửi cho tất cả."),
                 )
             else:
-                for receiver_id in receivers:
-                    try:
-                        receiver = User.objects.get(user_id=receiver_id)
-                        Notification.objects.create(
-                            sender=request.user,
-                            receiver=receiver,
-                            title=title,
-                            message=message,
-                            status=NotificationStatus.UNREAD.value,
-                        )
-                    except User.DoesNotExist:
-                        messages.error(
-                            request,
-                            _(f"Người nhận với ID {receiver_id} không tồn tại."),
-                        )
-                        continue
+                # Gửi cho tất cả: lưu nội dung một lần cho cả nhóm người nhận
+                send = broadcast_notification if send_all else fan_out_notification
+                created, unknown_ids = send(request.user, receivers, title, message)
+                if unknown_ids:
+                    messages.error(
+                        request,
+                        _("Người nhận với ID %(ids)s không tồn tại.")
+                        % {"ids": ", ".join(unknown_ids)},
+                    )
                 messages.success(request, _("Thông báo đã được gửi thành công."))
                 return redirect("admin_notification_history")
         else:
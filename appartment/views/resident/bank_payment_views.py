@@ -1,4 +1,5 @@
 import time, json
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.utils import timezone
@@ -119,8 +120,10 @@ def payos_webhook(request):
             payment.transaction_status = PaymentTransactionStatus.FAILED.value
             bill.status = PaymentStatus.UNPAID.value
 
-        bill.save()
-        payment.save()
+        # Hóa đơn, giao dịch và số liệu tổng hợp tháng được ghi cùng nhau
+        with transaction.atomic():
+            bill.save()
+            payment.save()
 
         return JsonResponse({"success": True}, status=200)
 
@@ -10,13 +10,13 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from appartment.constants import UserRole
 from appartment.utils.permissions import role_required
+from appartment.utils.notification_utils import bulk_notify
+from appartment.utils.role_utils import get_role_member_ids
 from ...models import (
     Bill,
     RoomResident,
     RentalPrice,
     DraftBill,
-    Notification,
-    User,
 )
 from ...constants import PaymentStatus, MONTH_YEAR_FORMAT
 
@@ -141,19 +141,20 @@ def reject_draft_bill(request, pk):
     draft_bill.save()
 
     # Tạo thông báo gửi cho các Quản lý
-    title = _(f"Cư dân từ chối HĐ nháp phòng {draft_bill.room.room_id}")
+    title = _(f"Cư dân từ chối HĐ nháp phòng {draft_bill.room_id}")
     message = (
         f"Cư dân {request.user.full_name} đã từ chối hóa đơn nháp "
         f"({draft_bill.get_draft_type_display()}) cho tháng {draft_bill.bill_month.strftime(MONTH_YEAR_FORMAT)}.\n\n"
         f"Lý do: {rejection_reason}"
     )
 
-    # Gửi đến tất cả các manager
-    managers = User.objects.filter(role__role_name=UserRole.APARTMENT_MANAGER.value)
-    for manager in managers:
-        Notification.objects.create(
-            sender=request.user, receiver=manager, title=title, message=message
-        )
+    # Gửi đến tất cả các manager: danh sách lấy từ cache, ghi bằng một bulk_create
+    bulk_notify(
+        request.user,
+        get_role_member_ids(UserRole.APARTMENT_MANAGER.value),
+        title,
+        message,
+    )
 
     messages.info(
         request, _("Bạn đã từ chối hóa đơn nháp và gửi phản hồi đến ban quản lý.")
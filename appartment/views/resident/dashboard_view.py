@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from ...models import Bill, RoomResident, Notification, DraftBill
+from ...utils.notification_utils import addressed_to
 from ...utils.permissions import role_required
 from ...constants import UserRole, PaymentStatus
 from django.db.models import Q
@@ -39,7 +40,7 @@ def resident_dashboard(request, context=None):
         pending_drafts |= qs
 
     # Thông báo gần nhất (receiver là user hiện tại)
-    latest_notifications = Notification.objects.filter(receiver=user).order_by(
+    latest_notifications = Notification.objects.filter(addressed_to(user)).order_by(
         "-created_at"
     )[:5]
 
@@ -4,16 +4,15 @@ from django.utils.timezone import now
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
+from datetime import date
 from django.core.paginator import Paginator
 
 
 from ...models import Room, RoomResident, User, RentalPrice
+from appartment.utils.room_history_utils import history_months, room_history_page
 from appartment.utils.permissions import role_required
 from ...constants import (
     DAY_MONTH_YEAR_FORMAT,
-    HISTORY_PER_PAGE_MAX,
     MONTH_YEAR_FORMAT,
     PRICE_CHANGES_PER_PAGE_MAX,
     UserRole,
@@ -174,18 +173,12 @@ def room_history(request, room_id):
         return redirect("resident_room_list")
 
     # Month list from move_in_date to move_out_date or today
-    month_list = []
-    current = room.move_in_date.date().replace(day=1)
     move_out_date = (
         room.move_out_date.date().replace(day=1)
         if room.move_out_date
         else date.today().replace(day=1)
     )
-
-    while current <= move_out_date:
-        month_list.append(current)
-        current += relativedelta(months=1)
-    month_list.reverse()
+    month_list = history_months(room.move_in_date.date(), move_out_date)
 
     prices = list(
         RentalPrice.objects.filter(
@@ -209,35 +202,10 @@ def room_history(request, room_id):
         initial_price.effective_date = room.move_in_date
         prices.insert(0, initial_price)
 
-    residents = RoomResident.objects.filter(room_id=room_id).select_related("user")
-
-    history = []
-
-    for month_start in month_list:
-        month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-
-        price_obj = (
-            RentalPrice.objects.filter(room_id=room_id, effective_date__lte=month_end)
-            .order_by("-effective_date")
-            .first()
-        )
-        price_in_month = price_obj.price if price_obj else None
-
-        users_in_month = [
-            {"full_name": res.user.full_name, "user_id": res.user.user_id}
-            for res in residents
-            if res.move_in_date.date() <= month_end
-            and (res.move_out_date is None or res.move_out_date.date() >= month_start)
-        ]
-
-        history.append(
-            {
-                "month": month_start,
-                "number_of_residents": len(users_in_month),
-                "residents": users_in_month,
-                "price": price_in_month,
-            }
-        )
+    # Giá theo tháng lấy từ toàn bộ lịch sử giá của phòng (một truy vấn, tăng dần)
+    room_prices = list(
+        RentalPrice.objects.filter(room_id=room_id).order_by("effective_date", "pk")
+    )
 
     # Paginate general_change_price
     price_changes = [
@@ -251,10 +219,10 @@ def room_history(request, room_id):
     price_page_number = request.GET.get("page1")
     price_page_obj = price_paginator.get_page(price_page_number)
 
-    # Paginate history
-    history_paginator = Paginator(history, HISTORY_PER_PAGE_MAX)
-    history_page_number = request.GET.get("page2")
-    history_page_obj = history_paginator.get_page(history_page_number)
+    # Paginate history: chỉ dựng giá và cư dân cho các tháng của trang hiện tại
+    history_page_obj = room_history_page(
+        room_id, month_list, room_prices, request.GET.get("page2")
+    )
 
     context = {
         "room_id": room_id,
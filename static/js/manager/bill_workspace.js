@@ -30,9 +30,25 @@ function billingWorkspace() {
                 });
                 return Object.values(summary);
             },
-            openModal(jsonString) {
-                this.modalData = JSON.parse(jsonString);
+            // Tải dữ liệu của modal cho một phòng khi mở (không nhúng sẵn vào trang)
+            openModal(modalDataUrl) {
+                this.modalData = {};
                 this.isModalOpen = true;
+                fetch(modalDataUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status === 'success') {
+                        this.modalData = data.modal_data;
+                    } else {
+                        alert('Lỗi: ' + data.message);
+                        this.closeModal();
+                    }
+                })
+                .catch(error => {
+                    console.error('Fetch Error:', error);
+                    alert('Đã có lỗi kết nối xảy ra. Vui lòng kiểm tra Console (F12).');
+                    this.closeModal();
+                });
             },
             closeModal() { this.isModalOpen = false; },
             openReminderModal() {